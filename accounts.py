@@ -0,0 +1,270 @@
+"""
+LinkedIn account pool
+
+Spreads scrape jobs over several LinkedIn accounts. Every account has its own
+request budget (jobs per rolling window), a cooldown between jobs and its own
+saved browser session, so aggregate throughput grows with the number of
+accounts while each individual account stays within safe limits.
+
+Accounts that run into checkpoints/captchas are drained (taken out of
+rotation) for a while instead of being retried straight away. When blocks
+pile up across accounts, a global circuit breaker pauses all new jobs, then
+lets a single trial job through before resuming.
+
+All of this state lives in the process that owns the pool. Queue workers
+(worker.py) each have their own pool, so an account must belong to one worker.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import time
+from collections import deque
+from typing import Dict, List, Optional
+
+from config import ACCOUNT_POOL_CONFIG, LINKEDIN_ACCOUNTS
+
+logger = logging.getLogger(__name__)
+
+
+def load_accounts() -> List[Dict[str, str]]:
+    """Load account credentials.
+
+    Priority: ``LINKEDIN_ACCOUNTS`` env var (JSON list of
+    ``{"email": ..., "password": ...}``), then the single ``EMAIL``/``PASSWORD``
+    env pair, then ``LINKEDIN_ACCOUNTS`` from config.py.
+    """
+    raw = os.getenv("LINKEDIN_ACCOUNTS")
+    if raw:
+        try:
+            accounts = json.loads(raw)
+            if accounts:
+                return accounts
+        except ValueError as e:
+            logger.error(f"Invalid LINKEDIN_ACCOUNTS env var, ignoring: {e}")
+
+    if os.getenv("EMAIL") and os.getenv("PASSWORD"):
+        return [{'email': os.getenv("EMAIL"), 'password': os.getenv("PASSWORD")}]
+
+    return list(LINKEDIN_ACCOUNTS)
+
+
+class Account:
+    """A single LinkedIn account and its usage bookkeeping"""
+
+    def __init__(self, email, password, session_dir):
+        self.email = email
+        self.password = password
+        slug = re.sub(r'[^a-zA-Z0-9]+', '_', email).strip('_').lower()
+        self.storage_state_path = os.path.join(session_dir, f"{slug}.json")
+
+        self.in_use = False
+        self.job_times = deque()   # start times of jobs inside the budget window
+        self.last_released = 0.0
+        self.challenge_strikes = 0
+        self.drained_until = 0.0
+        self.total_jobs = 0
+        self.failed_jobs = 0
+
+    def next_available_at(self, config, now) -> float:
+        """Earliest time (monotonic) this account may start a new job"""
+        while self.job_times and now - self.job_times[0] >= config['window_seconds']:
+            self.job_times.popleft()
+
+        ready = max(self.drained_until, self.last_released + config['cooldown_seconds'])
+        if len(self.job_times) >= config['max_jobs_per_window']:
+            ready = max(ready, self.job_times[0] + config['window_seconds'])
+        return ready
+
+    def to_dict(self, config, now) -> dict:
+        available_at = self.next_available_at(config, now)
+        return {
+            "email": self.email,
+            "in_use": self.in_use,
+            "drained": self.drained_until > now,
+            "available_in_seconds": 0 if self.in_use else round(max(0.0, available_at - now), 1),
+            "jobs_in_window": len(self.job_times),
+            "budget_per_window": config['max_jobs_per_window'],
+            "challenge_strikes": self.challenge_strikes,
+            "total_jobs": self.total_jobs,
+            "failed_jobs": self.failed_jobs
+        }
+
+
+class CircuitBreaker:
+    """Pool-wide breaker: closed -> open (no new jobs) -> half-open (one trial job)"""
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, config):
+        self.config = config
+        self.state = self.CLOSED
+        self.block_times = deque()  # blocked jobs inside the breaker window
+        self.open_until = 0.0
+        self.trips = 0
+        self.trial_account = None  # account running the half-open trial job
+
+    def _trip(self, now):
+        self.trips += 1
+        # Every trip in a row without a successful trial doubles the pause
+        cooldown = min(self.config['breaker_cooldown_seconds'] * 2 ** (self.trips - 1),
+                       self.config['breaker_max_cooldown_seconds'])
+        self.state = self.OPEN
+        self.open_until = now + cooldown
+        self.block_times.clear()
+        logger.warning(f"Circuit breaker open, pausing new jobs for {cooldown:.0f}s")
+
+    def record(self, now, success: bool, blocked: bool, trial: bool = False):
+        """Account for a finished job; `trial` when it was the half-open trial job.
+        Jobs started before the breaker tripped may still finish meanwhile"""
+        if trial:
+            self.trial_account = None
+        if blocked:
+            if self.state == self.HALF_OPEN:
+                self._trip(now)
+                return
+            self.block_times.append(now)
+            while now - self.block_times[0] >= self.config['breaker_window_seconds']:
+                self.block_times.popleft()
+            if len(self.block_times) >= self.config['breaker_threshold']:
+                self._trip(now)
+        elif success and trial and self.state == self.HALF_OPEN:
+            logger.info("Circuit breaker trial job succeeded, resuming jobs")
+            self.state = self.CLOSED
+            self.trips = 0
+
+    def allows(self, now) -> bool:
+        """Whether a new job may start now"""
+        if self.state == self.OPEN and now >= self.open_until:
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            return self.trial_account is None
+        return self.state == self.CLOSED
+
+    def to_dict(self, now) -> dict:
+        return {
+            "state": self.state,
+            "open_for_seconds": round(max(0.0, self.open_until - now), 1) if self.state == self.OPEN else 0,
+            "recent_blocks": len(self.block_times),
+            "trips": self.trips
+        }
+
+
+class AccountPool:
+    """Assigns scrape jobs to accounts according to their budgets and cooldowns"""
+
+    def __init__(self, accounts: List[Dict[str, str]], config: Optional[dict] = None):
+        self.config = dict(ACCOUNT_POOL_CONFIG)
+        if config:
+            self.config.update(config)
+
+        os.makedirs(self.config['session_dir'], exist_ok=True)
+        self.accounts = [
+            Account(a['email'], a['password'], self.config['session_dir'])
+            for a in accounts
+        ]
+        if not self.accounts:
+            raise ValueError("Account pool needs at least one account")
+
+        self.breaker = CircuitBreaker(self.config)
+        self._changed = asyncio.Condition()
+
+    def _pick(self, now) -> Optional[Account]:
+        """Least recently used account that is free right now"""
+        candidates = [
+            a for a in self.accounts
+            if not a.in_use and a.next_available_at(self.config, now) <= now
+        ]
+        if not candidates:
+            return None
+        return min(candidates, key=lambda a: a.last_released)
+
+    def _next_wakeup(self, now) -> float:
+        if self.breaker.state == CircuitBreaker.OPEN:
+            return max(0.1, self.breaker.open_until - now)
+        waits = [
+            a.next_available_at(self.config, now) - now
+            for a in self.accounts if not a.in_use
+        ]
+        # All accounts busy: wait for a release notification (poll as a safety net)
+        return max(0.1, min(waits)) if waits else 5.0
+
+    async def acquire(self, timeout: Optional[float] = None) -> Account:
+        """Wait for an account with budget left and mark it in use"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+
+        async with self._changed:
+            while True:
+                now = time.monotonic()
+                account = self._pick(now) if self.breaker.allows(now) else None
+                if account:
+                    if self.breaker.state == CircuitBreaker.HALF_OPEN:
+                        self.breaker.trial_account = account
+                    account.in_use = True
+                    account.job_times.append(now)
+                    account.total_jobs += 1
+                    logger.info(f"Assigned job to account {account.email}")
+                    return account
+
+                wait = self._next_wakeup(now)
+                if deadline is not None:
+                    if now >= deadline:
+                        raise TimeoutError("No LinkedIn account available within timeout")
+                    wait = min(wait, deadline - now)
+
+                try:
+                    await asyncio.wait_for(self._changed.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def release(self, account: Account, success: bool = True, challenged: bool = False):
+        """Return an account to the pool, draining it if it hit a challenge or rate limit"""
+        async with self._changed:
+            now = time.monotonic()
+            account.in_use = False
+            account.last_released = now
+
+            if not success:
+                account.failed_jobs += 1
+
+            if challenged:
+                account.challenge_strikes += 1
+                if account.challenge_strikes >= self.config['challenge_drain_threshold']:
+                    # Back off harder on every repeated drain
+                    factor = 2 ** (account.challenge_strikes - self.config['challenge_drain_threshold'])
+                    drain_for = min(self.config['drain_seconds'] * factor, self.config['max_drain_seconds'])
+                    account.drained_until = now + drain_for
+                    logger.warning(f"Account {account.email} hit a challenge, draining for {drain_for:.0f}s")
+            elif success:
+                account.challenge_strikes = 0
+
+            trial = self.breaker.trial_account is account
+            self.breaker.record(now, success, blocked=challenged, trial=trial)
+            self._changed.notify_all()
+
+    def status(self) -> List[dict]:
+        now = time.monotonic()
+        return [a.to_dict(self.config, now) for a in self.accounts]
+
+    def paused(self) -> bool:
+        """True while the circuit breaker holds back new jobs"""
+        return not self.breaker.allows(time.monotonic())
+
+    def breaker_status(self) -> dict:
+        return self.breaker.to_dict(time.monotonic())
+
+    def summary(self) -> dict:
+        """Accounts, how many are free and the breaker state, as served by GET /accounts"""
+        return {
+            "accounts": self.status(),
+            "available": self.available_count(),
+            "circuit_breaker": self.breaker_status()
+        }
+
+    def available_count(self) -> int:
+        now = time.monotonic()
+        return len([a for a in self.accounts if not a.in_use and a.next_available_at(self.config, now) <= now])
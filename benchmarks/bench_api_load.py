@@ -0,0 +1,416 @@
+"""
+Load test: the FastAPI service under a mix of concurrent requests
+
+Serves main.py with uvicorn on its own event loop thread. The scraper is
+replaced by a stub that skips the browser and reads its posts from the local
+stand-in site (served from another process); everything after that (post store, CSV/JSON files, results,
+cache) is the real code. Concurrent clients send a weighted mix of requests
+for a fixed time from a separate process (so they don't compete with the
+API for the GIL), while a monitor task measures the API loop's lag and a
+watchdog thread samples the loop thread's stack whenever it stops responding,
+so whatever blocks it is named in the report.
+
+    python benchmarks/bench_api_load.py --duration 20 --concurrency 32 \\
+        --mix scrape=1,status=4,results=4,all_results=1,health=1
+"""
+
+import argparse
+import asyncio
+import collections
+import itertools
+import json
+import multiprocessing
+import os
+import random
+import socket
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import traceback
+import urllib.request
+from concurrent.futures import ProcessPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.local_site import LocalSite
+
+# name -> (method, path template, JSON body for (keyword, posts))
+ENDPOINTS = {
+    "scrape": ("POST", "/scrape", lambda keyword, posts: {"input_keyword": keyword, "target_posts": posts}),
+    "status": ("GET", "/status/{keyword}", None),
+    "results": ("GET", "/results/{keyword}", None),
+    "all_results": ("GET", "/results", None),
+    "health": ("GET", "/health", None),
+    "accounts": ("GET", "/accounts", None),
+    "dashboard": ("GET", "/dashboard/summary", None)
+}
+
+_post_ids = itertools.count(7364323447457402881)
+
+
+def percentile(samples, q):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * q))] if ordered else 0.0
+
+
+def parse_mix(text):
+    mix = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in ENDPOINTS:
+            raise SystemExit(f"Unknown endpoint {name!r} in --mix (known: {', '.join(ENDPOINTS)})")
+        mix[name.strip()] = float(weight or 1)
+    return mix
+
+
+def serve_site(conn):
+    """Entry point of the site process: sends the site's URL and serves until the pipe closes"""
+    with LocalSite() as site:
+        conn.send(site.base_url)
+        try:
+            conn.recv()
+        except EOFError:
+            pass
+
+
+def make_stub_scraper(site_url, cards_per_scroll, pause_scale):
+    """Scraper class without a browser: cards come from the local site"""
+    from jobs import LinkedInPostScraperPlaywright
+
+    class _StubPage:
+        async def evaluate(self, *args):
+            return {}
+
+    def fetch(url):
+        # Follows the /feed/update/ redirect to the canonical /posts/ URL, like the real page links
+        with urllib.request.urlopen(url) as response:
+            return response.geturl(), response.read().decode()[:200]
+
+    class StubScraper(LinkedInPostScraperPlaywright):
+        async def start_browser(self):
+            self.page = _StubPage()
+
+        async def login_to_linkedin(self):
+            pass
+
+        async def search_hashtags(self, hashtags):
+            pass
+
+        async def navigate_to_posts_filter(self):
+            pass
+
+        async def apply_date_filter_past_week(self):
+            pass
+
+        async def prewarm(self):
+            await self.start_browser()
+            self.warm = True
+
+        async def _read_new_cards(self, prune):
+            urls = [f"{site_url}/feed/update/urn:li:activity:{next(_post_ids)}/" for _ in range(cards_per_scroll)]
+            return await asyncio.gather(*(asyncio.to_thread(fetch, url) for url in urls))
+
+        async def _pause(self, seconds):
+            await super()._pause(seconds * pause_scale)
+
+        async def close_browser(self):
+            pass
+
+    return StubScraper
+
+
+class LoopMonitor:
+    """Measures how late the loop wakes up from short sleeps; its heartbeat feeds the watchdog"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.lags = []
+        self.heartbeat = time.monotonic()
+
+    async def run(self):
+        while True:
+            started = time.monotonic()
+            await asyncio.sleep(self.interval)
+            self.heartbeat = time.monotonic()
+            self.lags.append(self.heartbeat - started - self.interval)
+
+
+class BlockingWatchdog(threading.Thread):
+    """Samples the loop thread's stack while the loop misses its heartbeat by `threshold`"""
+
+    def __init__(self, monitor, thread_id, threshold):
+        super().__init__(daemon=True)
+        self.monitor = monitor
+        self.thread_id = thread_id
+        self.threshold = threshold
+        self.stalls = collections.defaultdict(lambda: {"count": 0, "max_s": 0.0, "total_s": 0.0})
+        self._stopping = threading.Event()
+
+    @staticmethod
+    def _request(frame):
+        """The request being handled: the innermost frame holding the ASGI scope"""
+        while frame is not None:
+            scope = frame.f_locals.get("scope")
+            if isinstance(scope, dict) and scope.get("type") == "http":
+                endpoint = scope.get("endpoint")
+                return f"{scope['method']} {getattr(endpoint, '__name__', scope['path'])}"
+            frame = frame.f_back
+        return None
+
+    @classmethod
+    def _where(cls, frame):
+        """(request, code) of a stack: the repo frames (outermost first), or the innermost
+        library functions when the loop is stuck outside the repo"""
+        stack = traceback.extract_stack(frame)
+        ours = [f for f in stack if f.filename.startswith(ROOT) and os.sep + "benchmarks" + os.sep not in f.filename]
+        if ours:
+            code = " > ".join(f"{os.path.relpath(f.filename, ROOT)}:{f.lineno} {f.name}" for f in ours)
+        else:
+            code = " > ".join(f"{os.path.basename(f.filename)} {f.name}" for f in stack[-2:])
+        return cls._request(frame) or "(no request)", code
+
+    def run(self):
+        # A stall is charged to the stack seen most often while it lasted
+        stalled_on, seen, stall_age = None, collections.Counter(), 0.0
+        while not self._stopping.wait(self.threshold / 5):
+            beat = self.monitor.heartbeat
+            age = time.monotonic() - beat - self.monitor.interval
+            if age >= self.threshold:
+                if stalled_on != beat:
+                    if stalled_on is not None:
+                        self._record(seen, stall_age)
+                    stalled_on, seen = beat, collections.Counter()
+                frame = sys._current_frames().get(self.thread_id)
+                seen[self._where(frame) if frame else ("?", "?")] += 1
+                stall_age = age
+            elif stalled_on is not None:
+                self._record(seen, stall_age)
+                stalled_on = None
+        if stalled_on is not None:
+            self._record(seen, stall_age)
+
+    def _record(self, seen, seconds):
+        stall = self.stalls[seen.most_common(1)[0][0]]
+        stall["count"] += 1
+        stall["max_s"] = max(stall["max_s"], seconds)
+        stall["total_s"] += seconds
+
+    def stop(self):
+        self._stopping.set()
+        self.join()
+
+
+class ApiServer:
+    """main.app served by uvicorn on a thread with its own event loop"""
+
+    def __init__(self, app, lag_interval, block_threshold):
+        import uvicorn
+
+        # proto=IPPROTO_TCP: asyncio only sets TCP_NODELAY on sockets that say they are TCP
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP)
+        self.sock.bind(("127.0.0.1", 0))
+        self.server = uvicorn.Server(uvicorn.Config(app, log_level="warning", lifespan="on"))
+        self.monitor = LoopMonitor(lag_interval)
+        self.block_threshold = block_threshold
+        self.watchdog = None
+        self.thread = threading.Thread(target=lambda: asyncio.run(self._serve()), daemon=True)
+
+    @property
+    def address(self):
+        return self.sock.getsockname()
+
+    async def _serve(self):
+        self.watchdog = BlockingWatchdog(self.monitor, threading.get_ident(), self.block_threshold)
+        monitor = asyncio.create_task(self.monitor.run())
+        try:
+            await self.server.serve(sockets=[self.sock])
+        finally:
+            monitor.cancel()
+
+    def __enter__(self):
+        self.thread.start()
+        while not self.server.started:
+            if not self.thread.is_alive():
+                raise RuntimeError("API server failed to start")
+            time.sleep(0.05)
+        self.monitor.lags.clear()  # startup isn't part of the run
+        self.watchdog.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.watchdog.stop()
+        self.server.should_exit = True
+        self.thread.join(timeout=30)
+
+
+class HttpConnection:
+    """Minimal keep-alive HTTP/1.1 client, so client-side overhead stays out of the numbers"""
+
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+        self.reader = self.writer = None
+
+    async def request(self, method, path, body=None):
+        if self.writer is None:
+            self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+            self.writer.get_extra_info("socket").setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        payload = json.dumps(body).encode() if body is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}\r\nContent-Length: {len(payload)}\r\n"
+                f"Content-Type: application/json\r\n\r\n")
+        self.writer.write(head.encode() + payload)
+        try:
+            status = int((await self.reader.readuntil(b"\r\n")).split()[1])
+            headers = (await self.reader.readuntil(b"\r\n\r\n")).decode().lower()
+            length = int(headers.split("content-length:")[1].split("\r\n")[0])
+            await self.reader.readexactly(length)
+        except (OSError, asyncio.IncompleteReadError, IndexError, ValueError):
+            self.close()
+            raise
+        if "connection: close" in headers:
+            self.close()
+        return status
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.close()
+        self.reader = self.writer = None
+
+
+async def client(host, port, mix, keywords, posts, deadline, samples):
+    names, weights = list(mix), list(mix.values())
+    connection = HttpConnection(host, port)
+    while time.monotonic() < deadline:
+        name = random.choices(names, weights)[0]
+        method, path, body = ENDPOINTS[name]
+        keyword = random.choice(keywords)
+        started = time.monotonic()
+        try:
+            status = await connection.request(method, path.format(keyword=keyword),
+                                              body(keyword, posts) if body else None)
+        except (OSError, asyncio.IncompleteReadError, IndexError, ValueError) as e:
+            status = type(e).__name__
+        samples[name].append((time.monotonic() - started, status))
+    connection.close()
+
+
+def run_clients(address, mix, keywords, posts, duration, concurrency):
+    """Entry point of the client process: endpoint -> [(latency, status)]"""
+    samples = collections.defaultdict(list)
+
+    async def run():
+        deadline = time.monotonic() + duration
+        await asyncio.gather(*(client(*address, mix, keywords, posts, deadline, samples)
+                               for _ in range(concurrency)))
+
+    asyncio.run(run())
+    return dict(samples)
+
+
+def report(samples, elapsed, server, args):
+    print(f"\n{'endpoint':<12} {'requests':>8} {'req/s':>8} {'p50 ms':>8} {'p99 ms':>8} {'max ms':>8}  statuses")
+    total = 0
+    for name, results in sorted(samples.items()):
+        latencies = [latency * 1000 for latency, _ in results]
+        statuses = collections.Counter(str(status) for _, status in results)
+        total += len(results)
+        print(f"{name:<12} {len(results):>8} {len(results) / elapsed:>8.1f} {statistics.median(latencies):>8.1f} "
+              f"{percentile(latencies, 0.99):>8.1f} {max(latencies):>8.1f}  {dict(statuses)}")
+    print(f"{'total':<12} {total:>8} {total / elapsed:>8.1f}")
+
+    lags = [lag * 1000 for lag in server.monitor.lags]
+    print(f"\nevent loop lag: p50 {statistics.median(lags):.1f} ms, p99 {percentile(lags, 0.99):.1f} ms, "
+          f"max {max(lags):.1f} ms ({len(lags)} samples every {args.lag_interval * 1000:.0f} ms)")
+
+    import main
+    jobs = collections.Counter(job["status"] for job in main.scraping_jobs.values())
+    print(f"scrape jobs: {dict(jobs)}")
+
+    stalls = server.watchdog.stalls
+    if not stalls:
+        print(f"\nno stalls of {args.block_threshold * 1000:.0f} ms or more")
+        return False
+
+    by_request = collections.defaultdict(lambda: {"count": 0, "max_s": 0.0, "total_s": 0.0})
+    for (request, _), stall in stalls.items():
+        total = by_request[request]
+        total["count"] += stall["count"]
+        total["max_s"] = max(total["max_s"], stall["max_s"])
+        total["total_s"] += stall["total_s"]
+
+    def show(rows):
+        for label, stall in sorted(rows, key=lambda row: -row[1]["total_s"]):
+            print(f"  {stall['count']:>4}x  max {stall['max_s'] * 1000:>7.1f} ms  "
+                  f"total {stall['total_s'] * 1000:>8.1f} ms  {label}")
+
+    print(f"\nBLOCKING: the loop stalled for {args.block_threshold * 1000:.0f} ms or more while handling:")
+    show(by_request.items())
+    print("in:")
+    show((f"[{request}] {code}", stall) for (request, code), stall in stalls.items())
+    if (os.cpu_count() or 1) < 3:
+        print("(fewer than 3 CPUs: the client and site processes take CPU time from the API, "
+              "stalls in socket writes are mostly that)")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--duration", type=float, default=20, help="Seconds of load")
+    parser.add_argument("--concurrency", type=int, default=32, help="Concurrent clients")
+    parser.add_argument("--mix", default="scrape=1,status=4,results=4,all_results=1,health=1",
+                        help=f"Weighted request mix, endpoints: {', '.join(ENDPOINTS)}")
+    parser.add_argument("--keywords", type=int, default=20, help="Distinct keywords to request")
+    parser.add_argument("--posts", type=int, default=200, help="target_posts of every scrape")
+    parser.add_argument("--accounts", type=int, default=8, help="Stub accounts (parallel scrapes)")
+    parser.add_argument("--cards-per-scroll", type=int, default=10)
+    parser.add_argument("--pause-scale", type=float, default=0.01,
+                        help="Factor on the scraper's 2-4 s pause between scrolls")
+    parser.add_argument("--lag-interval", type=float, default=0.01, help="Loop lag sampling interval (s)")
+    parser.add_argument("--block-threshold", type=float, default=0.05, help="Stall that counts as blocking (s)")
+    parser.add_argument("--fail-on-blocking", action="store_true", help="Exit with 1 if the loop was blocked")
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    # Relative paths (posts.db, sessions, CSV/JSON output) land in a scratch directory
+    workdir = tempfile.mkdtemp(prefix="bench_api_load_")
+    os.chdir(workdir)
+    accounts = [{"email": f"bench{i}@example.com", "password": "unused"} for i in range(args.accounts)]
+    os.environ["LINKEDIN_ACCOUNTS"] = json.dumps(accounts)
+
+    import logging
+
+    import jobs
+    import main as api
+    from accounts import AccountPool
+
+    logging.getLogger().setLevel(logging.WARNING)
+    spawn = multiprocessing.get_context("spawn")
+    site_conn, child_conn = spawn.Pipe()
+    site = spawn.Process(target=serve_site, args=(child_conn,), daemon=True)
+    site.start()
+    jobs.LinkedInPostScraperPlaywright = make_stub_scraper(site_conn.recv(), args.cards_per_scroll, args.pause_scale)
+    # No budgets or cooldowns: only the number of accounts limits parallel scrapes
+    api.account_pool = AccountPool(accounts, config={"cooldown_seconds": 0, "max_jobs_per_window": 10 ** 9})
+
+    print(f"{args.concurrency} clients for {args.duration:.0f} s, mix {mix}, working dir {workdir}")
+    keywords = [f"keyword{i}" for i in range(args.keywords)]
+    try:
+        with ApiServer(api.app, args.lag_interval, args.block_threshold) as server, \
+                ProcessPoolExecutor(max_workers=1, mp_context=spawn) as pool:
+            started = time.monotonic()
+            samples = pool.submit(run_clients, server.address, mix, keywords, args.posts,
+                                  args.duration, args.concurrency).result()
+            elapsed = time.monotonic() - started
+            blocked = report(samples, elapsed, server, args)
+    finally:
+        site_conn.close()
+        site.join()
+
+    if blocked and args.fail_on_blocking:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
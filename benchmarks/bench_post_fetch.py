@@ -0,0 +1,93 @@
+"""
+Benchmark: resolving post URLs over HTTP vs. a browser tab per post
+
+Runs LinkedInPostScraperPlaywright.get_full_post_url in both fetch modes
+against the local stand-in site and reports per-post latency and memory:
+the Python heap peak and the peak RSS of this process and its children
+(Chromium in browser mode), sampled while the posts are fetched. Only the
+browser mode starts Chromium.
+
+    python benchmarks/bench_post_fetch.py --posts 50
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.local_site import LocalSite
+from http_fetch import PostFetcher
+from isolation import process_tree_rss_mb
+from linkedin_post_scraper import LinkedInPostScraperPlaywright
+from posts import parse_post
+
+SAMPLE_INTERVAL = 0.05  # seconds between RSS samples
+
+
+async def sample_peak_rss(peak):
+    """Keep peak["rss_mb"] at the highest process tree RSS seen until cancelled"""
+    while True:
+        peak["rss_mb"] = max(peak["rss_mb"], process_tree_rss_mb(os.getpid()))
+        await asyncio.sleep(SAMPLE_INTERVAL)
+
+
+async def run_mode(site, fetch_mode, posts):
+    scraper = LinkedInPostScraperPlaywright("bench@example.com", "unused", headless=True, fetch_mode=fetch_mode)
+    if scraper.fetch_mode == "browser":
+        await scraper.start_browser()
+    else:
+        # The stand-in site needs no session cookies, so no browser to take them from
+        scraper.fetcher = PostFetcher()
+    latencies = []
+    baseline_rss = process_tree_rss_mb(os.getpid())
+    peak = {"rss_mb": baseline_rss}
+    sampler = asyncio.create_task(sample_peak_rss(peak))
+
+    try:
+        tracemalloc.start()
+        for i in range(posts):
+            started = time.perf_counter()
+            url = await scraper.get_full_post_url(site.post_url(7364323447457402881 + i))
+            latencies.append((time.perf_counter() - started) * 1000)
+            assert parse_post(url) is not None, url
+        _, python_peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+    finally:
+        sampler.cancel()
+        await scraper.close_browser()
+
+    latencies.sort()
+    return {
+        "mode": scraper.fetch_mode,
+        "posts": posts,
+        "p50_ms": statistics.median(latencies),
+        "p99_ms": latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))],
+        "total_s": sum(latencies) / 1000,
+        "python_peak_mb": python_peak / 1024 / 1024,
+        "baseline_rss_mb": baseline_rss,
+        "peak_rss_mb": peak["rss_mb"]
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--posts", type=int, default=50)
+    args = parser.parse_args()
+
+    with LocalSite() as site:
+        results = [await run_mode(site, mode, args.posts) for mode in ("http", "browser")]
+
+    print(f"{'mode':<8} {'posts':>5} {'p50 ms':>8} {'p99 ms':>8} {'total s':>8} {'py peak MB':>11} "
+          f"{'RSS before':>11} {'RSS peak':>9}")
+    for r in results:
+        print(f"{r['mode']:<8} {r['posts']:>5} {r['p50_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['total_s']:>8.2f} "
+              f"{r['python_peak_mb']:>11.1f} {r['baseline_rss_mb']:>11.1f} {r['peak_rss_mb']:>9.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
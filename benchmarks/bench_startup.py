@@ -0,0 +1,82 @@
+"""
+Benchmark: API startup and cold vs. pre-warmed first page
+
+Imports main.py in fresh interpreters (startup cost of an API-only replica,
+and whether Playwright got loaded), then compares the time until a first page
+is open when a scrape has to start its own browser against one that takes a
+pre-warmed browser, using the local stand-in site.
+
+    python benchmarks/bench_startup.py --runs 5
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.local_site import LocalSite
+from jobs import LinkedInPostScraperPlaywright
+
+IMPORT_PROBE = (
+    "import json, sys, time; started = time.perf_counter(); import main; "
+    "print(json.dumps({'seconds': time.perf_counter() - started, "
+    "'playwright_loaded': 'playwright' in sys.modules}))"
+)
+
+
+def measure_import(runs):
+    samples = []
+    for _ in range(runs):
+        output = subprocess.run([sys.executable, "-c", IMPORT_PROBE], cwd=ROOT,
+                                capture_output=True, text=True, check=True).stdout
+        samples.append(json.loads(output.strip().splitlines()[-1]))
+    return {
+        "p50_s": statistics.median(s["seconds"] for s in samples),
+        "max_s": max(s["seconds"] for s in samples),
+        "playwright_loaded": any(s["playwright_loaded"] for s in samples)
+    }
+
+
+async def first_page(site, warm):
+    """Seconds from "scrape starts" until the first page is loaded"""
+    scraper = LinkedInPostScraperPlaywright("bench@example.com", "unused", headless=True)
+    try:
+        if warm:
+            # What the pre-warm does before any request arrives
+            await scraper.start_browser()
+            await scraper.page.goto("about:blank")
+
+        started = time.perf_counter()
+        if not warm:
+            await scraper.start_browser()
+        await scraper.page.goto(site.post_url(7364323447457402881))
+        return time.perf_counter() - started
+    finally:
+        await scraper.close_browser()
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    imports = measure_import(args.runs)
+    print(f"import main: p50 {imports['p50_s'] * 1000:.0f} ms, max {imports['max_s'] * 1000:.0f} ms, "
+          f"playwright loaded: {imports['playwright_loaded']}")
+
+    with LocalSite() as site:
+        for warm in (False, True):
+            samples = [await first_page(site, warm) for _ in range(args.runs)]
+            print(f"{'warm' if warm else 'cold'} first page: p50 {statistics.median(samples) * 1000:.0f} ms, "
+                  f"max {max(samples) * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,70 @@
+"""
+Local stand-in for the LinkedIn pages the scraper touches
+
+Serves post URLs that redirect to a canonical post page (with tracking
+parameters), like LinkedIn does, so benchmarks can run without network or
+credentials.
+
+    /feed/update/urn:li:activity:<id>/  -> 302 /posts/user_post-activity-<id>-abcd?trk=...
+    /posts/...                          -> 200 server-rendered post HTML
+"""
+
+import re
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+POST_HTML = """<!DOCTYPE html>
+<html><head><title>Post {id}</title></head>
+<body><article class="feed-shared-update-v2" data-id="urn:li:activity:{id}">
+<div class="update-components-text">We are hiring ML engineers! Post {id}. {filler}</div>
+</article></body></html>"""
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, like the real site
+
+    def do_GET(self):
+        match = re.search(r'activity[:-](\d+)', self.path)
+        if not match:
+            self._send(404, b"not found")
+        elif self.path.startswith("/feed/update/"):
+            self.send_response(302)
+            self.send_header("Location", f"/posts/user_post-activity-{match.group(1)}-abcd?trk=public_post")
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+        else:
+            body = POST_HTML.format(id=match.group(1), filler="lorem ipsum " * 400).encode()
+            self._send(200, body, "text/html; charset=utf-8")
+
+    def _send(self, status, body, content_type="text/plain"):
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LocalSite:
+    """Threaded HTTP server on a free localhost port"""
+
+    def __init__(self):
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    @property
+    def base_url(self):
+        return f"http://127.0.0.1:{self.server.server_address[1]}"
+
+    def post_url(self, activity_id):
+        return f"{self.base_url}/feed/update/urn:li:activity:{activity_id}/"
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.shutdown()
+        self.server.server_close()
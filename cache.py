@@ -0,0 +1,102 @@
+"""
+Keyword result cache
+
+Bounded LRU cache of finished scrape results with a time-to-live and a
+stale-while-revalidate window:
+
+    age <= ttl                    -> "fresh": serve as is
+    ttl < age <= ttl + stale_ttl  -> "stale": serve, but refresh in background
+    older                         -> "miss": evicted, scrape normally
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable, Optional, Tuple
+
+from config import CACHE_CONFIG
+
+FRESH = "fresh"
+STALE = "stale"
+MISS = "miss"
+
+
+class ResultCache:
+    """LRU result cache with TTL and stale-while-revalidate"""
+
+    def __init__(self, ttl_seconds=None, stale_ttl_seconds=None, max_entries=None):
+        self.ttl = CACHE_CONFIG['ttl_seconds'] if ttl_seconds is None else ttl_seconds
+        self.stale_ttl = CACHE_CONFIG['stale_ttl_seconds'] if stale_ttl_seconds is None else stale_ttl_seconds
+        self.max_entries = CACHE_CONFIG['max_entries'] if max_entries is None else max_entries
+
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._refreshing = set()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+
+    def get(self, key: Hashable) -> Tuple[Optional[Any], str]:
+        """Return (value, state) where state is FRESH, STALE or MISS"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None, MISS
+
+            stored_at, value = entry
+            age = time.time() - stored_at
+            if age > self.ttl + self.stale_ttl:
+                del self._entries[key]
+                self.misses += 1
+                return None, MISS
+
+            self._entries.move_to_end(key)
+            if age > self.ttl:
+                self.stale_hits += 1
+                return value, STALE
+            self.hits += 1
+            return value, FRESH
+
+    def set(self, key: Hashable, value: Any, stored_at: Optional[float] = None):
+        """Store a result. `stored_at` (epoch seconds) defaults to now"""
+        stored_at = time.time() if stored_at is None else stored_at
+        with self._lock:
+            current = self._entries.get(key)
+            if current and current[0] > stored_at:
+                return  # never replace a newer result with an older one
+            self._entries[key] = (stored_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def begin_refresh(self, key: Hashable) -> bool:
+        """Claim the background refresh for `key`. False if one is already running"""
+        with self._lock:
+            if key in self._refreshing:
+                return False
+            self._refreshing.add(key)
+            return True
+
+    def end_refresh(self, key: Hashable):
+        with self._lock:
+            self._refreshing.discard(key)
+
+    def invalidate(self, keyword: str):
+        """Drop every entry for a keyword (keys start with the keyword)"""
+        with self._lock:
+            for key in [k for k in self._entries if k[0] == keyword]:
+                del self._entries[key]
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "ttl_seconds": self.ttl,
+                "stale_ttl_seconds": self.stale_ttl,
+                "hits": self.hits,
+                "stale_hits": self.stale_hits,
+                "misses": self.misses,
+                "refreshing": len(self._refreshing)
+            }
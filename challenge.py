@@ -0,0 +1,139 @@
+"""
+Detection of pages that block a scrape
+
+LinkedIn answers suspicious sessions with a checkpoint/captcha, a rate-limit
+page (or HTTP 429/999), or silently logs the session out. Waiting for the
+selectors of the normal page burns 10-15 s per wait before failing, so the
+scrapers check every navigation with `check_page` and wait with
+`wait_for_page_or_block`, which return as soon as either the expected page or
+a blocking page shows up, and fail with a typed ScrapeBlocked error.
+
+Rate-limit pages are recognised by their wording, which posts can quote too,
+so the text is only looked at on pages that show neither the expected element
+nor any post.
+"""
+
+from typing import Optional
+
+CHALLENGE = "challenge"
+RATE_LIMITED = "rate_limited"
+LOGGED_OUT = "logged_out"
+
+# Not plain "/checkpoint": the login form itself posts to /checkpoint/lg/login-submit
+CHALLENGE_URL_MARKERS = ("/challenge", "/checkpoint/rp", "/captcha")
+LOGGED_OUT_URL_MARKERS = ("/authwall", "/uas/login", "/login", "/signup")
+RATE_LIMIT_STATUSES = (429, 999)  # 999: LinkedIn's "request denied" for bots
+
+CHALLENGE_SELECTOR = "#captcha-internal, iframe[src*='captcha'], form[action*='challenge'], .challenge-dialog"
+LOGIN_FORM_SELECTOR = "form.login__form, .join-form"
+# Post cards (feed, search results): user text that may quote a rate-limit message
+CONTENT_SELECTOR = ".feed-shared-update-v2, [data-urn^='urn:li:activity']"
+
+# Runs in the page: what classify_page needs, without waiting for anything.
+# The text is only read from pages without content
+PAGE_FACTS_JS = """
+([challengeSelector, loginFormSelector, contentSelector]) => {
+    const content = !!document.querySelector(contentSelector);
+    return {
+        path: location.pathname,
+        challenge: !!document.querySelector(challengeSelector),
+        loginForm: !!document.querySelector(loginFormSelector),
+        content: content,
+        text: content || !document.body ? '' : document.body.innerText.slice(0, 5000).toLowerCase()
+    };
+}
+"""
+
+# Resolves as soon as `readySelector` matches or the page is a blocking one
+WAIT_READY_OR_BLOCK_JS = """
+([readySelector, challengeSelector, challengeMarkers, loggedOutMarkers]) => {
+    const path = location.pathname;
+    return !!document.querySelector(readySelector)
+        || challengeMarkers.some(m => path.includes(m))
+        || loggedOutMarkers.some(m => path.startsWith(m))
+        || !!document.querySelector(challengeSelector);
+}
+"""
+
+
+class ScrapeBlocked(Exception):
+    """LinkedIn served a page that blocks the scrape; `kind` says which"""
+
+    kind = None
+
+    def __init__(self, message, url=None):
+        super().__init__(message)
+        self.url = url
+
+
+class ChallengeDetected(ScrapeBlocked):
+    """Checkpoint or captcha"""
+    kind = CHALLENGE
+
+
+class RateLimited(ScrapeBlocked):
+    """Rate-limit page or HTTP 429/999"""
+    kind = RATE_LIMITED
+
+
+class LoggedOut(ScrapeBlocked):
+    """The session isn't logged in (login wall/authwall)"""
+    kind = LOGGED_OUT
+
+
+BLOCK_ERRORS = {error.kind: error for error in (ChallengeDetected, RateLimited, LoggedOut)}
+
+
+def classify_page(facts: dict) -> Optional[str]:
+    """Kind of blocking page (CHALLENGE/RATE_LIMITED/LOGGED_OUT) from PAGE_FACTS_JS, None if normal.
+    `facts["content"]` is True when the page shows posts or the element the caller waits for"""
+    path = facts["path"]
+    if facts["challenge"] or any(m in path for m in CHALLENGE_URL_MARKERS):
+        return CHALLENGE
+    text = "" if facts["content"] else facts["text"]
+    if "too many requests" in text or ("you've reached the" in text and "limit" in text):
+        return RATE_LIMITED
+    if facts["loginForm"] or any(path.startswith(m) for m in LOGGED_OUT_URL_MARKERS):
+        return LOGGED_OUT
+    return None
+
+
+async def detect_block(page, response=None, allow_login=False, ready_selector=None) -> Optional[ScrapeBlocked]:
+    """The blocking error for the current page, or None when it looks normal.
+
+    `response` is the navigation response (for its status); `allow_login`
+    accepts the login page, for the step that is about to log in. A page where
+    `ready_selector` matches is never taken for a rate-limit page.
+    """
+    if response is not None and response.status in RATE_LIMIT_STATUSES:
+        return RateLimited(f"LinkedIn answered HTTP {response.status}", url=page.url)
+
+    content_selector = f"{CONTENT_SELECTOR}, {ready_selector}" if ready_selector else CONTENT_SELECTOR
+    try:
+        facts = await page.evaluate(PAGE_FACTS_JS, [CHALLENGE_SELECTOR, LOGIN_FORM_SELECTOR, content_selector])
+        kind = classify_page(facts)
+    except Exception:
+        # Page navigating away mid-check: judge by the URL alone
+        kind = CHALLENGE if any(m in page.url for m in CHALLENGE_URL_MARKERS) else None
+
+    if kind is None or (kind == LOGGED_OUT and allow_login):
+        return None
+    return BLOCK_ERRORS[kind](f"LinkedIn served a {kind.replace('_', ' ')} page", url=page.url)
+
+
+async def check_page(page, response=None, allow_login=False, ready_selector=None):
+    """Raise the typed ScrapeBlocked error if the current page blocks the scrape"""
+    blocked = await detect_block(page, response, allow_login=allow_login, ready_selector=ready_selector)
+    if blocked:
+        raise blocked
+
+
+async def wait_for_page_or_block(page, ready_selector: str, timeout: int = 10000, allow_login=False):
+    """Wait until `ready_selector` shows up, failing fast if a blocking page shows up first"""
+    markers = list(LOGGED_OUT_URL_MARKERS) if not allow_login else []
+    await page.wait_for_function(
+        WAIT_READY_OR_BLOCK_JS,
+        arg=[ready_selector, CHALLENGE_SELECTOR, list(CHALLENGE_URL_MARKERS), markers],
+        timeout=timeout
+    )
+    await check_page(page, allow_login=allow_login, ready_selector=ready_selector)
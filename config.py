@@ -11,6 +11,26 @@ LINKEDIN_CREDENTIALS = {
     'password': 'Anjaliandanuj19'
 }
 
+# Account pool used to shard scrape jobs over several accounts.
+# Override with the LINKEDIN_ACCOUNTS env var (JSON list of {"email", "password"}).
+LINKEDIN_ACCOUNTS = [LINKEDIN_CREDENTIALS]
+
+ACCOUNT_POOL_CONFIG = {
+    'max_jobs_per_window': 6,  # scrape jobs allowed per account per window
+    'window_seconds': 3600,
+    'cooldown_seconds': 120,  # pause between two jobs on the same account
+    'challenge_drain_threshold': 1,  # challenges before an account is drained
+    'drain_seconds': 6 * 3600,
+    'max_drain_seconds': 48 * 3600,
+    'session_dir': 'sessions',  # one saved browser session per account
+    # Global circuit breaker: this many blocked jobs (challenge/rate limit) within
+    # the window pause all new jobs, doubling the pause on every repeated trip
+    'breaker_threshold': 3,
+    'breaker_window_seconds': 600,
+    'breaker_cooldown_seconds': 300,
+    'breaker_max_cooldown_seconds': 3600
+}
+
 # Hashtags to search for (can be easily modified)
 HASHTAG_SETS = {
     'ai_ml_jobs': ['AIMLhiring']
@@ -43,3 +63,105 @@ DATE_FILTERS = {
 # Currently selected configuration
 CURRENT_HASHTAGS = HASHTAG_SETS['ai_ml_jobs']  # Change this to use different hashtag sets
 CURRENT_DATE_FILTER = 'past_week'  # Change this to use different date filters
+
+# Where scrape jobs run: 'local' runs them inside the API process,
+# 'queue' only enqueues them for worker.py processes to pick up
+EXECUTION_CONFIG = {
+    'mode': 'local'
+}
+
+# Shared work queue used in 'queue' mode
+QUEUE_CONFIG = {
+    'backend': 'sqlite',  # 'sqlite', 'redis' or 'memory'
+    'sqlite_path': 'scrape_queue.db',
+    'redis_url': 'redis://localhost:6379/0',
+    'lease_seconds': 120,  # a job goes back to the queue if not renewed in time
+    'heartbeat_seconds': 30,
+    'poll_seconds': 2,
+    'max_attempts': 3,
+    'memory_worker_concurrency': 1  # 'memory' backend: jobs run by a worker inside the API process
+}
+
+# Keyword result cache for POST /scrape
+CACHE_CONFIG = {
+    'ttl_seconds': 600,  # results younger than this are served straight away
+    'stale_ttl_seconds': 3600,  # after the TTL, served while a refresh runs
+    'max_entries': 256  # LRU bound on cached keyword/filter combinations
+}
+
+# Background refresh of watched keywords
+SCHEDULER_CONFIG = {
+    'enabled': False,
+    'jitter_fraction': 0.1,  # interval runs move by up to +/- 10% of the interval
+    'max_jitter_seconds': 300,  # cap on the jitter (also the random delay of cron runs)
+    'max_concurrent_refreshes': 1  # browsers the scheduler may run at the same time
+}
+
+# Each entry needs 'interval_seconds' or a 5-field 'cron' expression
+WATCHED_KEYWORDS = [
+    # {'keyword': 'aiml', 'interval_seconds': 1800, 'target_posts': 50},
+    # {'keyword': 'data science', 'cron': '*/30 8-20 * * 1-5'},
+]
+
+# HAR record/replay (offline, deterministic runs). Archives contain the login
+# request, credentials included, so keep them private.
+HAR_CONFIG = {
+    'har_dir': 'hars',
+    'default_name': 'linkedin_session'
+}
+
+# Post store with full-text index behind GET /search. Queue workers write to it
+# too, so it must be the same file for the API and its workers
+SEARCH_CONFIG = {
+    'db_path': 'posts.db'
+}
+
+# Run each scrape job in a child process with memory/time limits
+ISOLATION_CONFIG = {
+    'mode': 'inline',  # 'inline' (same process) or 'process'
+    'max_rss_mb': 1536,  # child + Playwright driver + Chromium
+    'max_seconds': 1800,
+    'check_interval_seconds': 1.0
+}
+
+# Browsers the API starts and logs in at startup (local execution, inline
+# isolation only), handed to the first scrape of their account
+PREWARM_CONFIG = {
+    'browsers': 0,  # 0 disables pre-warming
+    'headless': True,
+    'timeout_seconds': 90
+}
+
+LOGGING_CONFIG = {
+    'level': 'INFO',
+    'format': 'json',  # 'json' (one object per line, with job_id) or 'text'
+    'sample_every': 10,  # hot-loop events (per post/scroll): log every Nth...
+    'sample_interval_seconds': 5.0  # ...and at least one per interval
+}
+
+# Opt-in per-job Playwright traces / cProfile dumps (ScrapeRequest.trace)
+TRACE_CONFIG = {
+    'trace_dir': 'traces'
+}
+
+# Parquet export of the post store (needs pyarrow), served by GET /export/posts
+EXPORT_CONFIG = {
+    'enabled': False,  # compact on a schedule while the API runs
+    'export_dir': 'exports/posts',
+    'compact_interval_seconds': 3600,
+    'compression': 'zstd',
+    'batch_size': 64 * 1024  # rows per streamed record batch
+}
+
+# Per-job deadline and cancellation (job_control.py)
+JOB_CONFIG = {
+    'default_deadline_seconds': 1800,  # wall-clock budget of a scrape job
+    'grace_seconds': 10  # time a stopped job gets to wrap up before its task is cancelled
+}
+
+# Dashboard counters (dashboard.py)
+DASHBOARD_CONFIG = {
+    'days': 30,  # days kept in posts_per_day
+    'recent_activity': 50,  # job events kept in the recent activity feed
+    'max_tracked_jobs': 10000  # finished job IDs remembered so every job is counted once
+}
@@ -0,0 +1,142 @@
+"""
+Dashboard counters
+
+DashboardStats keeps the figures the dashboard shows up to date as jobs start
+and finish, so GET /dashboard/summary answers without going over the stored
+results:
+
+    - per keyword: jobs run, how they ended, posts collected, the latest result
+    - posts collected per day, for the last `days` days
+    - success/failure rates and the average duration of finished jobs
+    - a feed of the last `recent_activity` job events
+
+Counters live in memory and start from zero when the API restarts.
+"""
+
+import threading
+from collections import OrderedDict, deque
+from datetime import datetime
+from typing import Any, Dict, Optional
+
+from config import DASHBOARD_CONFIG
+from work_queue import CANCELLED, COMPLETED, EXPIRED, FAILED
+
+# How a job can end; local jobs use the queue's state names
+OUTCOMES = (COMPLETED, FAILED, CANCELLED, EXPIRED)
+
+
+class DashboardStats:
+    """Incrementally maintained dashboard summary"""
+
+    def __init__(self, days: Optional[int] = None, recent_activity: Optional[int] = None):
+        self.days = days or DASHBOARD_CONFIG['days']
+        self.max_finished_ids = DASHBOARD_CONFIG['max_tracked_jobs']
+        self._keywords: Dict[str, Dict[str, Any]] = {}
+        self._posts_per_day: "OrderedDict[str, int]" = OrderedDict()
+        self._recent = deque(maxlen=recent_activity or DASHBOARD_CONFIG['recent_activity'])
+        self._active: Dict[str, str] = {}  # job id -> keyword
+        # Jobs already counted, so a job reported twice (queue event and startup sync) counts once
+        self._finished_ids: "OrderedDict[str, None]" = OrderedDict()
+        self._outcomes = dict.fromkeys(OUTCOMES, 0)
+        self._jobs_started = 0
+        self._duration_total = 0.0
+        self._timed_jobs = 0
+        self._latest_posts_total = 0
+        self._keywords_with_results = 0
+        self._lock = threading.Lock()
+
+    def _keyword(self, keyword: str) -> Dict[str, Any]:
+        entry = self._keywords.get(keyword)
+        if entry is None:
+            entry = self._keywords[keyword] = dict(
+                jobs=0, posts_collected=0, latest_posts=None, last_status=None, last_run=None,
+                **dict.fromkeys(OUTCOMES, 0)
+            )
+        return entry
+
+    def _event(self, job_id: str, keyword: str, event: str, **fields):
+        self._recent.append(dict(at=datetime.now().isoformat(), job_id=job_id, keyword=keyword,
+                                 event=event, **fields))
+
+    def job_started(self, job_id: str, keyword: str):
+        with self._lock:
+            if job_id in self._active or job_id in self._finished_ids:
+                return
+            self._active[job_id] = keyword
+            self._keyword(keyword)["jobs"] += 1
+            self._jobs_started += 1
+            self._event(job_id, keyword, "started")
+
+    def job_finished(self, job_id: str, keyword: str, status: str, posts: int = 0,
+                     duration_seconds: Optional[float] = None, error: Optional[str] = None):
+        """Count a finished job (once); `posts` is what it collected"""
+        with self._lock:
+            if job_id in self._finished_ids:
+                return
+            self._finished_ids[job_id] = None
+            while len(self._finished_ids) > self.max_finished_ids:
+                self._finished_ids.popitem(last=False)
+            if self._active.pop(job_id, None) is None:
+                # Enqueued by another API process: never seen starting
+                self._keyword(keyword)["jobs"] += 1
+                self._jobs_started += 1
+
+            entry = self._keyword(keyword)
+            entry[status] += 1
+            entry["last_status"] = status
+            entry["last_run"] = datetime.now().isoformat()
+            self._outcomes[status] += 1
+            if duration_seconds is not None:
+                self._duration_total += duration_seconds
+                self._timed_jobs += 1
+
+            if posts:
+                entry["posts_collected"] += posts
+                day = datetime.now().date().isoformat()
+                self._posts_per_day[day] = self._posts_per_day.get(day, 0) + posts
+                self._posts_per_day.move_to_end(day)
+                while len(self._posts_per_day) > self.days:
+                    self._posts_per_day.popitem(last=False)
+
+            self._event(job_id, keyword, status, posts=posts,
+                        duration_seconds=None if duration_seconds is None else round(duration_seconds, 1),
+                        error=error)
+
+    def result_shown(self, keyword: str, posts: int):
+        """The result served for `keyword` now has `posts` posts (0 for a failed one)"""
+        with self._lock:
+            entry = self._keyword(keyword)
+            if entry["latest_posts"] is None:
+                self._keywords_with_results += 1
+            self._latest_posts_total += posts - (entry["latest_posts"] or 0)
+            entry["latest_posts"] = posts
+
+    def results_deleted(self, keyword: str):
+        with self._lock:
+            entry = self._keywords.get(keyword)
+            if entry and entry["latest_posts"] is not None:
+                self._latest_posts_total -= entry["latest_posts"]
+                self._keywords_with_results -= 1
+                entry["latest_posts"] = None
+
+    def summary(self) -> dict:
+        with self._lock:
+            finished = sum(self._outcomes.values())
+            succeeded = self._outcomes[COMPLETED]
+            return {
+                "totals": {
+                    "keywords_with_results": self._keywords_with_results,
+                    "posts_in_results": self._latest_posts_total,
+                    "jobs_started": self._jobs_started,
+                    "active_jobs": len(self._active),
+                    "finished_jobs": finished,
+                    **self._outcomes
+                },
+                "success_rate": round(succeeded / finished, 3) if finished else None,
+                "failure_rate": round(self._outcomes[FAILED] / finished, 3) if finished else None,
+                "average_duration_seconds": (round(self._duration_total / self._timed_jobs, 1)
+                                             if self._timed_jobs else None),
+                "keywords": {keyword: dict(entry) for keyword, entry in self._keywords.items()},
+                "posts_per_day": dict(self._posts_per_day),
+                "recent_activity": list(reversed(self._recent))
+            }
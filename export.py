@@ -0,0 +1,246 @@
+"""
+Columnar export of the post store for analytics
+
+PostExporter compacts posts.db (see search_index.py) into a Parquet dataset
+partitioned by keyword and collection date:
+
+    exports/posts/keyword=aiml/date=2026-10-19/part-0.parquet
+
+A post is in the partition of every keyword and day it was collected on
+(post_keywords in search_index.py), so one collected again on a later day
+also appears in that day's partition. Each compaction only rewrites the
+partitions that received posts since the previous one; rows carry the post
+text as of the last time their partition was written. `stream` reads the
+dataset with column projection and partition pruning and yields it as an
+Arrow IPC stream or a Parquet file, so analytics clients fetch only the
+columns they need.
+
+Needs `pyarrow` (pip install pyarrow); without it `available()` is False and
+the export endpoints answer 503. It is imported on first use, not with the API.
+"""
+
+import asyncio
+import importlib.util
+import io
+import json
+import logging
+import os
+import tempfile
+from datetime import datetime
+from typing import Iterator, List, Optional
+from urllib.parse import quote
+
+from config import EXPORT_CONFIG
+from search_index import get_post_index
+
+logger = logging.getLogger(__name__)
+
+STATE_FILE = "_compaction.json"
+COLUMNS = ["url", "activity_id", "keyword", "date", "collected_at", "text"]
+
+# Optional dependency, loaded by _load_pyarrow(): importing it adds ~120 ms to API startup
+pa = ds = pq = None
+
+
+def _load_pyarrow():
+    global pa, ds, pq
+    if pa is None:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+        pa, ds, pq = pyarrow, pyarrow.dataset, pyarrow.parquet
+
+
+def _file_schema():
+    # keyword and date live in the directory names
+    return pa.schema([
+        ("url", pa.string()),
+        ("activity_id", pa.int64()),
+        ("collected_at", pa.timestamp("us")),
+        ("text", pa.large_string())
+    ])
+
+
+def _dataset_schema():
+    schema = _file_schema()
+    return schema.append(pa.field("keyword", pa.string())).append(pa.field("date", pa.string()))
+
+
+def _partitioning():
+    return ds.partitioning(pa.schema([("keyword", pa.string()), ("date", pa.string())]), flavor="hive")
+
+
+class PostExporter:
+    """Parquet dataset compacted from the post store"""
+
+    def __init__(self, export_dir: Optional[str] = None, config: Optional[dict] = None):
+        if not self.available():
+            raise RuntimeError("PostExporter needs the `pyarrow` package")
+        self.config = dict(EXPORT_CONFIG)
+        if config:
+            self.config.update(config)
+        self.export_dir = export_dir or self.config['export_dir']
+        self.last_compaction = None
+        self._task: Optional[asyncio.Task] = None
+
+    @staticmethod
+    def available() -> bool:
+        return importlib.util.find_spec("pyarrow") is not None
+
+    def _partition_dir(self, keyword: str, date: str) -> str:
+        return os.path.join(self.export_dir, f"keyword={quote(keyword, safe='')}", f"date={date}")
+
+    def _load_state(self) -> dict:
+        try:
+            with open(os.path.join(self.export_dir, STATE_FILE), encoding='utf-8') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return {}
+
+    def _save_state(self, state: dict):
+        with open(os.path.join(self.export_dir, STATE_FILE), 'w', encoding='utf-8') as f:
+            json.dump(state, f)
+
+    def compact(self) -> dict:
+        """Rewrite the partitions that got posts since the last compaction (blocking)"""
+        _load_pyarrow()
+        started = datetime.now()
+        os.makedirs(self.export_dir, exist_ok=True)
+        state = self._load_state()
+        since = state.get("seq", 0)
+        index = get_post_index()
+
+        # Watermark taken before reading, so rows committed meanwhile are picked up next time
+        watermark = index.latest_seq()
+        partitions = index.partitions_since(since)
+        rows_written = 0
+        for keyword, date in partitions:
+            rows = index.partition_rows(keyword, date)
+            table = pa.table({
+                "url": [row["url"] for row in rows],
+                "activity_id": [row["activity_id"] for row in rows],
+                "collected_at": [datetime.fromisoformat(row["collected_at"]) for row in rows],
+                "text": [row["text"] for row in rows]
+            }, schema=_file_schema())
+            self._write_partition(keyword, date, table)
+            rows_written += len(rows)
+
+        state["seq"] = watermark
+        self._save_state(state)
+        self.last_compaction = {
+            "finished_at": datetime.now().isoformat(),
+            "seconds": round((datetime.now() - started).total_seconds(), 3),
+            "partitions": len(partitions),
+            "rows": rows_written
+        }
+        logger.info(f"Compacted {rows_written} posts into {len(partitions)} partitions")
+        return self.last_compaction
+
+    def _write_partition(self, keyword: str, date: str, table):
+        directory = self._partition_dir(keyword, date)
+        os.makedirs(directory, exist_ok=True)
+        # Write next to the target and swap, readers never see a half-written file
+        # (dot-prefixed, so dataset scans skip it)
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".", suffix=".tmp")
+        os.close(fd)
+        try:
+            pq.write_table(table, tmp_path, compression=self.config['compression'])
+            os.replace(tmp_path, os.path.join(directory, "part-0.parquet"))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+    def _scanner(self, columns: Optional[List[str]], keyword: Optional[str],
+                 since: Optional[str], until: Optional[str]):
+        _load_pyarrow()
+        columns = columns or COLUMNS
+        unknown = [c for c in columns if c not in COLUMNS]
+        if unknown:
+            raise ValueError(f"Unknown columns: {', '.join(unknown)} (available: {', '.join(COLUMNS)})")
+
+        os.makedirs(self.export_dir, exist_ok=True)
+        dataset = ds.dataset(self.export_dir, format="parquet", partitioning=_partitioning(),
+                             schema=_dataset_schema(), ignore_prefixes=["_", "."])
+        conditions = []
+        if keyword:
+            conditions.append(ds.field("keyword") == keyword.lower().strip())
+        if since:
+            conditions.append(ds.field("date") >= since)
+        if until:
+            conditions.append(ds.field("date") <= until)
+        condition = None
+        for c in conditions:
+            condition = c if condition is None else condition & c
+        return dataset.scanner(columns=columns, filter=condition, batch_size=self.config['batch_size'])
+
+    def stream(self, columns: Optional[List[str]] = None, keyword: Optional[str] = None,
+               since: Optional[str] = None, until: Optional[str] = None,
+               fmt: str = "arrow") -> Iterator[bytes]:
+        """Chunks of an Arrow IPC stream or Parquet file with the selected columns/partitions.
+
+        Raises ValueError for unknown columns before the first chunk.
+        """
+        scanner = self._scanner(columns, keyword, since, until)
+        return self._stream_arrow(scanner) if fmt == "arrow" else self._stream_parquet(scanner)
+
+    @staticmethod
+    def _stream_arrow(scanner) -> Iterator[bytes]:
+        sink = io.BytesIO()
+
+        def take():
+            chunk = sink.getvalue()
+            sink.seek(0)
+            sink.truncate()
+            return chunk
+
+        with pa.ipc.new_stream(sink, scanner.projected_schema) as writer:
+            for batch in scanner.to_batches():
+                if batch.num_rows:
+                    writer.write_batch(batch)
+                    yield take()
+        yield take()  # schema only (empty result) and the end-of-stream marker
+
+    def _stream_parquet(self, scanner) -> Iterator[bytes]:
+        # Parquet puts its metadata in a footer, so the file is built first and then streamed
+        with tempfile.TemporaryFile() as f:
+            with pq.ParquetWriter(f, scanner.projected_schema, compression=self.config['compression']) as writer:
+                for batch in scanner.to_batches():
+                    if batch.num_rows:
+                        writer.write_batch(batch)
+            f.seek(0)
+            while True:
+                chunk = f.read(1 << 20)
+                if not chunk:
+                    break
+                yield chunk
+
+    def status(self) -> dict:
+        return {
+            "export_dir": self.export_dir,
+            "interval_seconds": self.config['compact_interval_seconds'],
+            "seq": self._load_state().get("seq"),
+            "last_compaction": self.last_compaction
+        }
+
+    def start(self):
+        """Compact every EXPORT_CONFIG['compact_interval_seconds'] in the background"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def _loop(self):
+        while True:
+            try:
+                # Blocking SQLite reads and Parquet writes, keep them off the event loop
+                await asyncio.to_thread(self.compact)
+            except Exception as e:
+                logger.error(f"Export compaction failed: {e}")
+            await asyncio.sleep(self.config['compact_interval_seconds'])
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
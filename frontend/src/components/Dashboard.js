@@ -52,17 +52,15 @@ const Dashboard = () => {
 
     const loadStats = async () => {
         try {
-            const response = await api.get('/health');
-            const allResults = await api.get('/results');
-
-            const totalJobs = Object.values(allResults.data.results || {})
-                .reduce((sum, result) => sum + (result.total_posts || 0), 0);
+            // Counters kept by the API, no need to fetch and add up every result
+            const response = await api.get('/dashboard/summary');
+            const { totals } = response.data;
 
             setStats({
-                totalScrapes: Object.keys(allResults.data.results || {}).length,
-                totalJobs,
+                totalScrapes: totals.keywords_with_results,
+                totalJobs: totals.posts_in_results,
                 savedJobs: savedJobs.length,
-                activeScrapingTasks: response.data.active_scraping_tasks || 0
+                activeScrapingTasks: totals.active_jobs
             });
         } catch (error) {
             console.error('Failed to load stats:', error);
@@ -102,6 +100,12 @@ const Dashboard = () => {
                         } else if (statusResponse.data.status === 'failed') {
                             clearInterval(pollInterval);
                             toast.error(`Scraping failed for "${keyword}"`);
+                        } else if (['cancelled', 'expired'].includes(statusResponse.data.status)) {
+                            // Stopped early, the posts collected until then are kept
+                            clearInterval(pollInterval);
+                            toast(`Scraping ${statusResponse.data.status} for "${keyword}"`);
+                            loadResults();
+                            loadStats();
                         }
                     } catch (error) {
                         clearInterval(pollInterval);
@@ -0,0 +1,98 @@
+"""
+Lightweight HTTP fetch path for post pages
+
+Opening a Chromium tab per post just to follow redirects costs a full page
+render. PostFetcher does the same with a pooled async HTTP client (keep-alive,
+HTTP/2 when `h2` is installed) that carries the cookies of the logged-in
+browser context. Callers fall back to the browser when it returns None.
+
+Needs `httpx` (pip install "httpx[http2]"); without it `available()` is False
+and the scraper keeps using browser tabs.
+"""
+
+import logging
+from typing import List, Optional
+
+try:
+    import httpx
+except ImportError:  # optional dependency
+    httpx = None
+
+try:
+    import h2  # noqa: F401  (only needed for HTTP/2 support in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_USER_AGENT = "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36"
+
+# Landing on one of these means the session was not accepted
+BLOCKED_PATH_MARKERS = ("/login", "/authwall", "/checkpoint", "/uas/login")
+
+
+class PostFetcher:
+    """Pooled HTTP client for post pages sharing the browser session cookies"""
+
+    def __init__(self, cookies: Optional[List[dict]] = None, user_agent=DEFAULT_USER_AGENT,
+                 timeout=10.0, max_connections=20):
+        if httpx is None:
+            raise RuntimeError("PostFetcher needs the `httpx` package")
+
+        jar = httpx.Cookies()
+        for cookie in cookies or []:
+            jar.set(cookie['name'], cookie['value'],
+                    domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+
+        self.client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            follow_redirects=True,
+            timeout=timeout,
+            cookies=jar,
+            headers={
+                'User-Agent': user_agent,
+                'Accept-Language': 'en-US,en;q=0.9',
+                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8'
+            },
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections)
+        )
+
+    @staticmethod
+    def available() -> bool:
+        return httpx is not None
+
+    @classmethod
+    async def from_context(cls, context, **kwargs) -> "PostFetcher":
+        """Build a fetcher carrying the cookies of a Playwright browser context"""
+        return cls(cookies=await context.cookies(), **kwargs)
+
+    async def _get(self, url: str):
+        try:
+            response = await self.client.get(url)
+        except httpx.HTTPError as e:
+            logger.debug(f"HTTP fetch failed for {url}: {e}")
+            return None
+
+        if response.status_code >= 400:
+            logger.debug(f"HTTP fetch of {url} returned {response.status_code}")
+            return None
+        if any(marker in response.url.path for marker in BLOCKED_PATH_MARKERS):
+            logger.debug(f"HTTP fetch of {url} was redirected to {response.url.path}")
+            return None
+        return response
+
+    async def resolve(self, url: str) -> Optional[str]:
+        """Follow redirects and return the final URL without tracking parameters"""
+        response = await self._get(url)
+        if response is None:
+            return None
+        return str(response.url).split('?')[0]
+
+    async def fetch_html(self, url: str) -> Optional[str]:
+        """Server-rendered HTML of a post page"""
+        response = await self._get(url)
+        return response.text if response is not None else None
+
+    async def close(self):
+        await self.client.aclose()
@@ -0,0 +1,182 @@
+"""
+Process isolation for scrape jobs
+
+With ISOLATION_CONFIG['mode'] = 'process' every scrape job runs in its own
+child process (and process group, which Playwright's driver and Chromium
+inherit). A watchdog in the parent samples the RSS of the whole process tree
+and the elapsed time, and kills the group when a limit is exceeded. Posts and
+the final result come back to the parent over a pipe, so a runaway browser
+can't grow the memory of the API process.
+"""
+
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import time
+from types import SimpleNamespace
+from typing import Any, Callable, Dict, Optional
+
+from config import ISOLATION_CONFIG
+from job_control import absorb_cancel
+from log_utils import current_job_id, job_context, setup_logging
+from posts import PostBatch, parse_post
+
+logger = logging.getLogger(__name__)
+
+
+class JobKilled(Exception):
+    """The watchdog killed a job that exceeded its memory or time limit"""
+
+
+def process_rss_mb(pid: int) -> float:
+    """RSS of one process, from /proc (Linux only, 0 elsewhere)"""
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except (FileNotFoundError, ProcessLookupError, PermissionError):
+        pass
+    return 0.0
+
+
+def process_tree_rss_mb(pid: int) -> float:
+    """RSS of a process and all its descendants, from /proc (Linux only, 0 elsewhere)"""
+    total = 0.0
+    stack = [pid]
+    while stack:
+        current = stack.pop()
+        total += process_rss_mb(current)
+        try:
+            for task in os.listdir(f"/proc/{current}/task"):
+                with open(f"/proc/{current}/task/{task}/children") as f:
+                    stack.extend(int(child) for child in f.read().split())
+        except (FileNotFoundError, ProcessLookupError, PermissionError):
+            continue
+    return total
+
+
+def _child_main(payload, account_info, job_id, conn):
+    """Entry point of the child process: run the scrape and report over `conn`"""
+    if hasattr(os, "setsid"):
+        os.setsid()  # own process group, so the watchdog can kill Chromium with us
+    setup_logging()
+
+    from worker import ScrapeFailed, run_scrape
+
+    account = SimpleNamespace(**account_info)
+    try:
+        with job_context(job_id):
+            result = asyncio.run(run_scrape(payload, account, on_post=lambda url: conn.send(("post", url))))
+        conn.send(("result", result))
+    except ScrapeFailed as e:
+        conn.send(("error", str(e), e.challenged, e.kind))
+    except Exception as e:
+        conn.send(("error", str(e), False, None))
+    finally:
+        conn.close()
+
+
+def _kill_group(process):
+    try:
+        os.killpg(process.pid, signal.SIGKILL)
+    except (AttributeError, ProcessLookupError, PermissionError):
+        # No process group yet (or not POSIX): at least kill the child itself
+        process.kill()
+    process.join(timeout=5)
+
+
+async def run_isolated(payload: Dict[str, Any], account, on_post: Optional[Callable[[str], None]] = None,
+                       config: Optional[dict] = None, control=None) -> Dict[str, Any]:
+    """Run `worker.run_scrape` for one job in a child process under the watchdog.
+
+    When `control` (job_control.JobControl) stops the job, the process group is
+    killed and the posts received so far are stored and returned.
+    """
+    from worker import ScrapeFailed, stopped_result, store_posts
+
+    config = config or ISOLATION_CONFIG
+    account_info = {
+        "email": account.email,
+        "password": account.password,
+        "storage_state_path": account.storage_state_path
+    }
+    ctx = multiprocessing.get_context("spawn")
+    parent_conn, child_conn = ctx.Pipe(duplex=False)
+    process = ctx.Process(target=_child_main, args=(payload, account_info, current_job_id(), child_conn))
+    process.start()
+    child_conn.close()
+
+    started = time.monotonic()
+    peak_rss = 0.0
+    outcome = None
+    posts = PostBatch()
+    stopped = None
+
+    try:
+        while True:
+            # Check liveness before draining so messages sent right before exiting aren't missed
+            alive = process.is_alive()
+            closed = False
+            while outcome is None and parent_conn.poll():
+                try:
+                    message = parent_conn.recv()
+                except EOFError:
+                    closed = True
+                    break
+                if message[0] == "post":
+                    record = parse_post(message[1])
+                    if record is not None:
+                        posts.add(record)
+                    if on_post:
+                        on_post(message[1])
+                else:
+                    outcome = message
+            if outcome is not None:
+                break
+            if closed or not alive:
+                raise JobKilled(f"Scrape process exited without a result (exit code {process.exitcode})")
+            if control is not None and control.stop_requested():
+                stopped = control.stop_reason
+                _kill_group(process)  # the posts are already here, don't wait for a graceful exit
+                break
+
+            rss = process_tree_rss_mb(process.pid)
+            peak_rss = max(peak_rss, rss)
+            if rss > config['max_rss_mb']:
+                raise JobKilled(f"Scrape process used {rss:.0f} MB (limit {config['max_rss_mb']} MB)")
+            elapsed = time.monotonic() - started
+            if elapsed > config['max_seconds']:
+                raise JobKilled(f"Scrape process ran {elapsed:.0f}s (limit {config['max_seconds']}s)")
+
+            await asyncio.sleep(config['check_interval_seconds'])
+    except JobKilled as e:
+        logger.error(f"Killing scrape job for {payload.get('input_keyword')}: {e}")
+        _kill_group(process)
+        raise ScrapeFailed(str(e)) from e
+    except asyncio.CancelledError:
+        _kill_group(process)
+        if not absorb_cancel(control):
+            raise
+        stopped = control.stop_reason
+    finally:
+        if process.is_alive():
+            # Give the child a moment to exit by itself after sending its result
+            await asyncio.to_thread(process.join, 10)
+        if process.is_alive():
+            _kill_group(process)
+        parent_conn.close()
+
+    if stopped:
+        logger.info(f"Job {stopped}, killed scrape process after {len(posts)} posts")
+        collected_at = await store_posts(payload["input_keyword"], posts)
+        return stopped_result(payload, stopped, posts, collected_at)
+
+    if outcome[0] == "error":
+        raise ScrapeFailed(outcome[1], challenged=outcome[2], kind=outcome[3])
+
+    result = outcome[1]
+    result["peak_rss_mb"] = round(peak_rss, 1)
+    return result
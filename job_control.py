@@ -0,0 +1,117 @@
+"""
+Cancellation and deadlines for scrape jobs
+
+Every job gets a JobControl. Cancelling it (POST /jobs/{id}/cancel) or
+reaching its deadline first asks the scraper to stop: the scroll loop checks
+`stop_requested()` and its pauses return early, so the run ends normally with
+the posts collected so far, closes the browser and releases the account. If
+the job is stuck somewhere else (a navigation, a selector wait) the task it
+runs in is cancelled outright after `grace_seconds`; run_scrape turns that
+into the same partial result.
+"""
+
+import asyncio
+from typing import Optional
+
+from config import JOB_CONFIG
+
+CANCELLED = "cancelled"
+EXPIRED = "expired"
+
+
+class JobStopped(Exception):
+    """The job was cancelled or ran out of time before it produced anything"""
+
+    def __init__(self, reason):
+        super().__init__(f"Job {reason}")
+        self.reason = reason
+
+
+class JobControl:
+    """Cancellation flag and deadline of one job. Create it on the event loop"""
+
+    def __init__(self, deadline_seconds: Optional[float] = None, grace_seconds: Optional[float] = None):
+        self.deadline_seconds = deadline_seconds or JOB_CONFIG['default_deadline_seconds']
+        if self.deadline_seconds < 0:
+            raise ValueError(f"deadline_seconds must be positive, got {self.deadline_seconds}")
+        grace_seconds = grace_seconds if grace_seconds is not None else JOB_CONFIG['grace_seconds']
+        # Short deadlines still leave most of the budget for scraping
+        self.grace_seconds = min(grace_seconds, self.deadline_seconds / 4)
+        self.stop_reason: Optional[str] = None
+        self._stopped = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        loop = asyncio.get_running_loop()
+        # Soft stop a little before the deadline, so the run can still save and close
+        self._timers = [
+            loop.call_later(max(0.0, self.deadline_seconds - self.grace_seconds), self.cancel, EXPIRED),
+            loop.call_later(self.deadline_seconds, self._hard_cancel)
+        ]
+
+    def attach(self, task: asyncio.Task):
+        """The task to cancel when a stop request isn't honoured in time"""
+        self._task = task
+
+    def detach(self):
+        """Nothing left to cut short (results are being stored, the account released)"""
+        self._task = None
+
+    def cancel(self, reason: str = CANCELLED):
+        if self.stop_reason is not None:
+            return
+        self.stop_reason = reason
+        self._stopped.set()
+        self._timers.append(asyncio.get_running_loop().call_later(self.grace_seconds, self._hard_cancel))
+
+    def _hard_cancel(self):
+        if self.stop_reason is None:
+            self.stop_reason = EXPIRED
+            self._stopped.set()
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+
+    def stop_requested(self) -> bool:
+        return self.stop_reason is not None
+
+    async def sleep(self, seconds: float):
+        """asyncio.sleep that returns as soon as a stop is requested"""
+        try:
+            await asyncio.wait_for(self._stopped.wait(), timeout=seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    async def run(self, coro):
+        """Await `coro`, abandoning it with JobStopped when a stop is requested first"""
+        task = asyncio.ensure_future(coro)
+        stopped = asyncio.ensure_future(self._stopped.wait())
+        try:
+            await asyncio.wait({task, stopped}, return_when=asyncio.FIRST_COMPLETED)
+        except asyncio.CancelledError:
+            task.cancel()
+            raise
+        finally:
+            stopped.cancel()
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
+            raise JobStopped(self.stop_reason)
+        return task.result()
+
+    def close(self):
+        for timer in self._timers:
+            timer.cancel()
+        self.detach()
+
+
+def absorb_cancel(control: Optional[JobControl]) -> bool:
+    """In an `except asyncio.CancelledError` block: True if the cancellation came
+    from `control` (the job should wrap up with partial results), False if it
+    must propagate"""
+    if control is None or control.stop_reason is None:
+        return False
+    task = asyncio.current_task()
+    if hasattr(task, "uncancel"):
+        task.uncancel()
+    return True
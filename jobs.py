@@ -4,8 +4,14 @@ import json
 import os
 import time
 import logging
-from playwright.async_api import async_playwright
 import random
+from urllib.parse import parse_qsl, unquote, urlencode, urlparse, urlunparse
+
+from challenge import LoggedOut, ScrapeBlocked, check_page, wait_for_page_or_block
+from isolation import process_rss_mb
+from log_utils import LogSampler, setup_logging
+from pipeline import stream_callback
+from posts import PostBatch, parse_post
 
 from dotenv import load_dotenv
 
@@ -14,30 +20,110 @@ load_dotenv()
 EMAIL = os.getenv("EMAIL")
 PASSWORD = os.getenv("PASSWORD")
 
+SEARCH_PAGE_URL = "https://www.linkedin.com/search/results/content/"
+
+POST_CARD_SELECTOR = ".feed-shared-update-v2"
+POST_LINK_SELECTOR = "a[href*='/posts/'], a[href*='/feed/update/']"
+POST_TEXT_SELECTOR = ".update-components-text"
+
+# Safety net on top of the job deadline (JobControl)
+MAX_SCROLL_ATTEMPTS = 500
+
+# Runs with target_posts at or above this prune processed cards from the page
+PRUNE_CARDS_MIN_TARGET = 100
+
+# Reads the link and text of every unprocessed card, then marks the card and drops its
+# subtree (text, images, video players) so later passes and the page's memory
+# don't grow with the scroll depth. Cards without a link get one more pass in
+# case they were still rendering.
+EXTRACT_AND_PRUNE_JS = """
+([cardSelector, linkSelector, textSelector]) => {
+    const cards = [];
+    for (const card of document.querySelectorAll(cardSelector + ':not([data-scraper-done])')) {
+        const link = card.querySelector(linkSelector);
+        if (!link && !card.hasAttribute('data-scraper-seen')) {
+            card.setAttribute('data-scraper-seen', '1');
+            continue;
+        }
+        const text = card.querySelector(textSelector);
+        cards.push([link ? link.getAttribute('href') : null, text ? text.innerText.trim() : null]);
+        card.setAttribute('data-scraper-done', '1');
+        card.replaceChildren();
+        card.style.minHeight = '0';
+    }
+    return cards;
+}
+"""
+
+PAGE_METRICS_JS = """
+(cardSelector) => ({
+    cards_in_dom: document.querySelectorAll(cardSelector + ':not([data-scraper-done])').length,
+    dom_nodes: document.getElementsByTagName('*').length,
+    js_heap_mb: performance.memory ? Math.round(performance.memory.usedJSHeapSize / 10485.76) / 100 : null
+})
+"""
+
 class LinkedInPostScraperPlaywright:
-    def __init__(self, email=EMAIL, password=PASSWORD, headless=False):
-        self.EMAIL = email
-        self.PASSWORD = password
+    def __init__(self, email=EMAIL, password=PASSWORD, headless=False, storage_state_path=None, prune_cards=None,
+                 har_mode=None, har_path=None, trace_path=None, control=None):
+        self.email = email
+        self.password = password
         self.headless = headless
+        # HAR archives: "record" saves the session's traffic to har_path,
+        # "replay" serves the whole session from it without touching the network
+        self.har_mode = har_mode
+        self.har_path = har_path
+        # Saved sessions would make recordings and replays take different paths
+        self.storage_state_path = None if har_mode else storage_state_path  # per-account saved session
         self.page = None
         self.browser = None
-        self.post_links = []
-        
-        # Setup logging
-        logging.basicConfig(level=logging.INFO)
+        self.context = None
+        self.posts = PostBatch()  # posts of the last collection, with their text when the card showed it
+        self.prune_cards = prune_cards  # None: decided by target_posts (PRUNE_CARDS_MIN_TARGET)
+        self.scroll_stats = []  # per-scroll read time, DOM size, JS heap and Chromium RSS of the last collection
+        self._cdp = None  # browser-level CDP session, for the Chromium process list
+        self.high_water_mark = None  # newest activity id seen by the last collection
+        self.challenged = False  # set when LinkedIn answers with a checkpoint/captcha or rate limit
+        self.blocked = None  # kind of the blocking page that failed the run (challenge.py)
+        self.warm = False  # browser already started and logged in by prewarm()
+        self.trace_path = trace_path  # Playwright trace of the whole run is written here
+        self.control = control  # job_control.JobControl: cancellation and deadline of the run
+        self.stopped = None  # why collection stopped early (cancelled/expired), if it did
+
         self.logger = logging.getLogger(__name__)
+
+    @property
+    def post_links(self):
+        """Canonical URLs of the collected posts"""
+        return self.posts.urls()
     
     async def start_browser(self):
         """Initialize Playwright browser"""
+        # Imported here so the API and read-only replicas start without loading Playwright
+        from playwright.async_api import async_playwright
+
         try:
             self.playwright = await async_playwright().start()
             self.browser = await self.playwright.chromium.launch(
                 headless=self.headless,
                 args=['--no-sandbox', '--disable-dev-shm-usage']
             )
-            self.page = await self.browser.new_page()
-            
-            
+            # Isolated context per account, restoring its session when we have one
+            context_options = {}
+            if self.storage_state_path and os.path.exists(self.storage_state_path):
+                context_options['storage_state'] = self.storage_state_path
+            if self.har_mode == "record":
+                os.makedirs(os.path.dirname(self.har_path) or ".", exist_ok=True)
+                context_options['record_har_path'] = self.har_path
+            self.context = await self.browser.new_context(**context_options)
+            if self.trace_path:
+                await self.context.tracing.start(screenshots=True, snapshots=True)
+            if self.har_mode == "replay":
+                # not_found="abort": anything missing from the archive fails instead of going online
+                await self.context.route_from_har(self.har_path, not_found="abort")
+                self.logger.info(f"Replaying session from {self.har_path}")
+            self.page = await self.context.new_page()
+
             self.logger.info("Browser started successfully")
             
         except Exception as e:
@@ -47,11 +133,29 @@ class LinkedInPostScraperPlaywright:
     async def login_to_linkedin(self):
         """Login to LinkedIn with provided credentials"""
         try:
+            if self.context and self.storage_state_path and os.path.exists(self.storage_state_path):
+                # Started by start_browser already, importing it again is free
+                from playwright.async_api import TimeoutError as PlaywrightTimeoutError
+
+                self.logger.info("Restoring saved LinkedIn session")
+                try:
+                    response = await self.page.goto("https://www.linkedin.com/feed/")
+                    await check_page(self.page, response)
+                    await wait_for_page_or_block(self.page, ".search-global-typeahead", timeout=5000)
+                    self.logger.info("Saved session is still valid")
+                    return
+                except LoggedOut:
+                    self.logger.info("Saved session expired, logging in again")
+                except PlaywrightTimeoutError:
+                    # Slow feed: not a block, the login form decides
+                    self.logger.info("Saved session didn't load in time, logging in again")
+
             self.logger.info("Navigating to LinkedIn login page")
-            await self.page.goto("https://www.linkedin.com/login")
+            response = await self.page.goto("https://www.linkedin.com/login")
+            await check_page(self.page, response, allow_login=True)
             
             # Wait for login form
-            await self.page.wait_for_selector("#username", timeout=10000)
+            await wait_for_page_or_block(self.page, "#username", timeout=10000, allow_login=True)
             
             # Enter credentials
             await self.page.fill("#username", self.email)
@@ -60,19 +164,38 @@ class LinkedInPostScraperPlaywright:
             # Click login button
             await self.page.click("button[type='submit']")
             
-            # Wait for successful login
-            await self.page.wait_for_selector(
-                ".search-global-typeahead, .feed-container-theme",
-                timeout=15000
+            # Wait for successful login, or fail as soon as a checkpoint shows up
+            # (the login page itself is still showing right after the click)
+            await wait_for_page_or_block(
+                self.page, ".search-global-typeahead, .feed-container-theme", timeout=15000, allow_login=True
             )
             
             self.logger.info("Successfully logged into LinkedIn")
+            if self.storage_state_path:
+                os.makedirs(os.path.dirname(self.storage_state_path) or ".", exist_ok=True)
+                await self.context.storage_state(path=self.storage_state_path)
             await asyncio.sleep(2)
             
         except Exception as e:
+            self._note_blocked(e)
             self.logger.error(f"Login failed: {e}")
             raise
-    
+
+    def _note_blocked(self, error):
+        """Remember a blocking page; challenges and rate limits count against the account"""
+        if isinstance(error, ScrapeBlocked):
+            self.blocked = error.kind
+            self.challenged = not isinstance(error, LoggedOut)
+
+    async def prewarm(self):
+        """Start the browser, restore the session and park on an empty search page,
+        so the next run_scraping() starts directly with the search"""
+        await self.start_browser()
+        await self.login_to_linkedin()
+        await self.page.goto(SEARCH_PAGE_URL)
+        self.warm = True
+        self.logger.info("Browser pre-warmed")
+
     async def search_hashtags(self, hashtags):
         """Search for hashtags on LinkedIn"""
         try:
@@ -81,17 +204,19 @@ class LinkedInPostScraperPlaywright:
             
             # Find and use search bar
             search_input = ".search-global-typeahead__input"
-            await self.page.wait_for_selector(search_input, timeout=10000)
+            await check_page(self.page)
+            await wait_for_page_or_block(self.page, search_input, timeout=10000)
             await self.page.fill(search_input, search_query)
             await self.page.press(search_input, "Enter")
             
             # Wait for search results
-            await self.page.wait_for_selector(".search-results-container", timeout=10000)
+            await wait_for_page_or_block(self.page, ".search-results-container", timeout=10000)
             
             self.logger.info("Search results loaded")
             await asyncio.sleep(2)
             
         except Exception as e:
+            self._note_blocked(e)
             self.logger.error(f"Search failed: {e}")
             raise
     
@@ -186,49 +311,204 @@ class LinkedInPostScraperPlaywright:
             self.logger.error(f"Failed to apply 'Date posted' filter: {e}")
             raise
 
+    async def sort_by_latest(self):
+        """Sort the results by date ('Latest') instead of relevance.
 
-    async def collect_post_links(self, target_count=50):
-        """Collect post links by scrolling"""
-        self.post_links = []
+        Uses the 'Sort by' filter, or the sortBy URL parameter when that isn't
+        there. Returns whether the results ended up sorted by date.
+        """
+        self.logger.info("Sorting results by date")
+        try:
+            for selectors in (["#searchFilter_sortBy", "button:has-text('Sort by')", "button[aria-label*='Sort by']"],
+                              ["input#sortBy-date_posted", "input[value='date_posted']", "label:has-text('Latest')"],
+                              ["button:has-text('Show results')"]):
+                for selector in selectors:
+                    try:
+                        await self.page.wait_for_selector(selector, timeout=3000)
+                        await self.page.click(selector)
+                        break
+                    except:
+                        continue
+            await asyncio.sleep(2)
+
+            if not self._sorted_by_date():
+                # Same search, sorted through the URL
+                url = urlparse(self.page.url)
+                query = dict(parse_qsl(url.query))
+                query["sortBy"] = '"date_posted"'
+                response = await self.page.goto(urlunparse(url._replace(query=urlencode(query))))
+                await check_page(self.page, response)
+            await wait_for_page_or_block(self.page, POST_CARD_SELECTOR, timeout=10000)
+        except ScrapeBlocked as e:
+            self._note_blocked(e)
+            raise
+        except Exception as e:
+            self.logger.warning(f"Could not sort results by date: {e}")
+            return False
+
+        return self._sorted_by_date()
+
+    def _sorted_by_date(self):
+        return '"date_posted"' in unquote(self.page.url)
+
+    async def _read_new_cards(self, prune):
+        """(href, text) of the cards that weren't processed yet; either can be None"""
+        if prune:
+            # One round trip: read, mark and collapse the new cards in-page
+            return await self.page.evaluate(
+                EXTRACT_AND_PRUNE_JS, [POST_CARD_SELECTOR, POST_LINK_SELECTOR, POST_TEXT_SELECTOR]
+            )
+
+        cards = []
+        for post in await self.page.query_selector_all(POST_CARD_SELECTOR):
+            try:
+                link_element = await post.query_selector(POST_LINK_SELECTOR)
+                if not link_element:
+                    continue
+                text_element = await post.query_selector(POST_TEXT_SELECTOR)
+                cards.append((
+                    await link_element.get_attribute('href'),
+                    (await text_element.inner_text()).strip() if text_element else None
+                ))
+            except Exception:
+                continue
+        return cards
+
+    async def _pause(self, seconds):
+        """Sleep between scrolls, cut short when the job is cancelled or expires"""
+        if self.control:
+            await self.control.sleep(seconds)
+        else:
+            await asyncio.sleep(seconds)
+
+    async def _browser_rss_mb(self):
+        """RSS of this browser's Chromium processes (browser, renderers, GPU...), None if unknown"""
+        try:
+            if self._cdp is None:
+                self._cdp = await self.browser.new_browser_cdp_session()
+            info = await self._cdp.send("SystemInfo.getProcessInfo")
+        except Exception:
+            return None
+        rss = sum(process_rss_mb(process["id"]) for process in info["processInfo"])
+        return round(rss, 1) if rss else None
+
+    async def _record_scroll_stats(self, scroll_attempts, read_ms):
+        try:
+            metrics = await self.page.evaluate(PAGE_METRICS_JS, POST_CARD_SELECTOR)
+        except Exception:
+            metrics = {}
+        self.scroll_stats.append({
+            "scroll": scroll_attempts,
+            "posts": len(self.posts),
+            "read_ms": round(read_ms, 1),
+            **metrics,
+            "browser_rss_mb": await self._browser_rss_mb()
+        })
+
+    def scroll_summary(self):
+        """First, last and peak values of the last collection's scroll stats"""
+        if not self.scroll_stats:
+            return {"scrolls": 0}
+        peak = {}
+        for key in ("read_ms", "cards_in_dom", "dom_nodes", "js_heap_mb", "browser_rss_mb"):
+            values = [stats[key] for stats in self.scroll_stats if stats.get(key) is not None]
+            if values:
+                peak[key] = max(values)
+        return {
+            "scrolls": self.scroll_stats[-1]["scroll"],
+            "first": self.scroll_stats[0],
+            "last": self.scroll_stats[-1],
+            "peak": peak
+        }
+
+    async def collect_post_links(self, target_count=50, since_activity_id=None, max_known_streak=10, on_post=None,
+                                 sorted_by_date=True):
+        """Collect post links by scrolling
+
+        With `since_activity_id` (incremental mode) only posts newer than that
+        high-water mark are collected, and collection stops once
+        `max_known_streak` already-known posts were seen in a row. Both rely on
+        the results being sorted by date; with `sorted_by_date` False every post
+        is collected and the mark is only carried forward.
+
+        `on_post` (async callable) receives the canonical URL of every post as
+        soon as it is collected, so downstream work can start before scrolling
+        finishes. Collected posts are kept in `self.posts`.
+
+        Per-scroll read time, cards left in the DOM and JS heap size are
+        recorded in `self.scroll_stats`.
+        """
+        self.posts = PostBatch()
+        self.scroll_stats = []
+        self.high_water_mark = since_activity_id
+        if not sorted_by_date:
+            since_activity_id = None
+        prune = self.prune_cards if self.prune_cards is not None else target_count >= PRUNE_CARDS_MIN_TARGET
         scroll_attempts = 0
-        max_scroll_attempts = 20000000000
+        self.stopped = None
+        known_posts = set()
+        known_streak = 0
+        reached_known = False
+        # Per-post and per-scroll events are sampled, a run would log hundreds of lines otherwise
+        post_log = LogSampler(self.logger)
+        scroll_log = LogSampler(self.logger)
         
         try:
-            self.logger.info(f"Starting to collect {target_count} post links")
+            self.logger.info(f"Starting to collect {target_count} post links (prune cards: {prune})")
             
-            while len(self.post_links) < target_count and scroll_attempts < max_scroll_attempts:
-                # Get all post elements
-                posts = await self.page.query_selector_all(".feed-shared-update-v2")
+            while len(self.posts) < target_count and scroll_attempts < MAX_SCROLL_ATTEMPTS and not reached_known:
+                if self.control and self.control.stop_requested():
+                    self.stopped = self.control.stop_reason
+                    self.logger.info(f"Stopping collection ({self.stopped}) with {len(self.posts)} posts")
+                    break
+
+                # Get the links of all post elements
+                read_started = time.perf_counter()
+                cards = await self._read_new_cards(prune)
+                read_ms = (time.perf_counter() - read_started) * 1000
                 
-                for post in posts:
+                for post_href, post_text in cards:
                     try:
-                        # Look for post links
-                        link_element = await post.query_selector("a[href*='/posts/'], a[href*='/feed/update/']")
-                        if link_element:
-                            post_url = await link_element.get_attribute('href')
-                            
-                            if post_url and post_url not in self.post_links:
+                        post = parse_post(post_href)
+                        if post is not None and post not in self.posts:
+                            post_id = post.activity_id
+                            if self.high_water_mark is None or post_id > self.high_water_mark:
+                                self.high_water_mark = post_id
+
+                            if since_activity_id and post_id <= since_activity_id:
+                                if post_id not in known_posts:
+                                    known_posts.add(post_id)
+                                    known_streak += 1
+                                    if known_streak >= max_known_streak:
+                                        self.logger.info("Reached previously collected posts, stopping")
+                                        reached_known = True
+                                        break
+                                continue
+                            known_streak = 0
 
-                                if post_url.startswith("/"):
-                                    post_url = f"https://www.linkedin.com{post_url}"
-                                    
-                                self.post_links.append(post_url)
-                                self.logger.info(f"Collected post {len(self.post_links)}: {post_url}")
+                            self.posts.add(post, post_text)
+                            post_log.info("Collected post %d: %s", len(self.posts), post.url,
+                                          posts=len(self.posts))
+                            if on_post:
+                                await on_post(post.url)
+                            
+                            if len(self.posts) >= target_count:
+                                break
                                 
-                                if len(self.post_links) >= target_count:
-                                    break
-                                    
                     except Exception:
                         continue
+
+                await self._record_scroll_stats(scroll_attempts, read_ms)
                 
                 # Scroll down for more posts
-                if len(self.post_links) < target_count:
+                if len(self.posts) < target_count and not reached_known:
                     await self.page.evaluate("window.scrollTo(0, document.body.scrollHeight)")
-                    await asyncio.sleep(random.uniform(2, 4))
+                    await self._pause(random.uniform(2, 4))
                     scroll_attempts += 1
-                    self.logger.info(f"Scrolled {scroll_attempts} times, collected {len(self.post_links)} posts")
+                    scroll_log.info("Scrolled %d times, collected %d posts", scroll_attempts, len(self.posts),
+                                    scroll=scroll_attempts, posts=len(self.posts))
             
-            self.logger.info(f"Collection completed. Total posts collected: {len(self.post_links)}")
+            self.logger.info(f"Collection completed. Total posts collected: {len(self.posts)}")
             
         except Exception as e:
             self.logger.error(f"Error collecting post links: {e}")
@@ -237,13 +517,9 @@ class LinkedInPostScraperPlaywright:
     async def save_to_csv(self, filename="linkedin_posts_playwright.csv"):
         """Save to CSV file"""
         try:
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(['Post_URL'])
-                for link in self.post_links:
-                    writer.writerow([link])
-            
-            self.logger.info(f"Saved {len(self.post_links)} posts to {filename}")
+            # Written from a worker thread: the API runs scrapes on its event loop
+            await asyncio.to_thread(self._write_csv, filename, self.posts.urls())
+            self.logger.info(f"Saved {len(self.posts)} posts to {filename}")
             
         except Exception as e:
             self.logger.error(f"Failed to save CSV: {e}")
@@ -253,37 +529,64 @@ class LinkedInPostScraperPlaywright:
         """Save to JSON file"""
         try:
             data = {
-                "total_posts": len(self.post_links),
+                "total_posts": len(self.posts),
                 "collection_timestamp": time.strftime("%Y-%m-%d %H:%M:%S"),
-                "post_links": self.post_links
+                "post_links": self.posts.urls()
             }
             
-            with open(filename, 'w', encoding='utf-8') as jsonfile:
-                json.dump(data, jsonfile, indent=2, ensure_ascii=False)
-            
-            self.logger.info(f"Saved {len(self.post_links)} posts to {filename}")
+            await asyncio.to_thread(self._write_json, filename, data)
+            self.logger.info(f"Saved {len(self.posts)} posts to {filename}")
             
         except Exception as e:
             self.logger.error(f"Failed to save JSON: {e}")
             raise
+
+    @staticmethod
+    def _write_csv(filename, links):
+        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['Post_URL'])
+            for link in links:
+                writer.writerow([link])
+
+    @staticmethod
+    def _write_json(filename, data):
+        with open(filename, 'w', encoding='utf-8') as jsonfile:
+            json.dump(data, jsonfile, indent=2, ensure_ascii=False)
     
     async def close_browser(self):
         """Close browser"""
+        self._cdp = None
+        if self.context and self.trace_path:
+            try:
+                os.makedirs(os.path.dirname(self.trace_path) or ".", exist_ok=True)
+                await self.context.tracing.stop(path=self.trace_path)
+            except Exception as e:
+                self.logger.warning(f"Failed to save trace to {self.trace_path}: {e}")
+        if self.context:
+            # Closing the context is what writes a recorded HAR to disk
+            await self.context.close()
         if self.browser:
             await self.browser.close()
         if hasattr(self, 'playwright'):
             await self.playwright.stop()
         self.logger.info("Browser closed")
     
-    async def run_scraping(self, hashtags, target_posts=50, save_format="both"):
+    async def run_scraping(self, hashtags, target_posts=50, save_format="both", since_activity_id=None, on_post=None):
         """Main scraping method"""
         try:
-            await self.start_browser()
-            await self.login_to_linkedin()
+            if not self.warm:
+                await self.start_browser()
+                await self.login_to_linkedin()
             await self.search_hashtags(hashtags)
             await self.navigate_to_posts_filter()
             await self.apply_date_filter_past_week()
-            await self.collect_post_links(target_posts)
+            # Stopping at known posts only works when the newest come first
+            sorted_by_date = bool(since_activity_id) and await self.sort_by_latest()
+            if since_activity_id and not sorted_by_date:
+                self.logger.warning("Results aren't sorted by date, collecting without skipping known posts")
+            await self.collect_post_links(target_posts, since_activity_id=since_activity_id, on_post=on_post,
+                                          sorted_by_date=sorted_by_date)
             
             # Save results
             if save_format in ["csv", "both"]:
@@ -299,8 +602,21 @@ class LinkedInPostScraperPlaywright:
         finally:
             await self.close_browser()
 
+    def stream_posts(self, hashtags, target_posts=50, save_format="both", since_activity_id=None, queue_size=10):
+        """Async iterator over post URLs, yielded as soon as each one is collected.
+
+        Scrolling pauses while `queue_size` posts are waiting to be consumed.
+        """
+        return stream_callback(
+            lambda on_post: self.run_scraping(
+                hashtags, target_posts, save_format, since_activity_id=since_activity_id, on_post=on_post
+            ),
+            queue_size=queue_size
+        )
+
 # Async usage example
 async def main():
+    setup_logging()
     INPUT = "aiml"
     HASHTAGS = [INPUT + " hiring"]
     TARGET_POSTS = 50
@@ -2,6 +2,7 @@
 import asyncio
 import csv
 import json
+import os
 import time
 import logging
 from playwright.async_api import async_playwright
@@ -9,24 +10,41 @@ import random
 from datetime import datetime
 from typing import List, Optional
 
+from accounts import load_accounts
+from challenge import check_page, wait_for_page_or_block
+from http_fetch import PostFetcher
+from log_utils import LogSampler, setup_logging
+from pipeline import stream_callback
+from posts import PostBatch, canonical_url, parse_post
+
 
 class LinkedInPostScraperPlaywright:
-    def __init__(self, email, password, headless=False):
+    def __init__(self, email, password, headless=False, fetch_mode="http", har_mode=None, har_path=None):
         self.email = email
         self.password = password
         self.headless = headless
+        # "http": resolve post URLs with a pooled HTTP client, browser tab only as fallback
+        # "browser": always open a tab per post
+        self.fetch_mode = fetch_mode if PostFetcher.available() else "browser"
+        # HAR archives: "record" saves the session's traffic to har_path,
+        # "replay" serves the whole session from it without touching the network
+        self.har_mode = har_mode
+        self.har_path = har_path
+        if har_mode == "replay":
+            self.fetch_mode = "browser"  # the HTTP client would bypass the archive
         self.page = None
         self.browser = None
         self.context = None
-        self.post_links = []
+        self.fetcher = None
+        self.posts = PostBatch()
 
-        # Setup logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
         self.logger = logging.getLogger(__name__)
 
+    @property
+    def post_links(self):
+        """Canonical URLs of the collected posts"""
+        return self.posts.urls()
+
     async def start_browser(self):
         """Initialize Playwright browser with realistic settings"""
         try:
@@ -41,11 +59,20 @@ class LinkedInPostScraperPlaywright:
             )
 
             # Create context with realistic settings
+            context_options = {}
+            if self.har_mode == "record":
+                os.makedirs(os.path.dirname(self.har_path) or ".", exist_ok=True)
+                context_options['record_har_path'] = self.har_path
             self.context = await self.browser.new_context(
                 user_agent="Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/120.0.0.0 Safari/537.36",
                 viewport={'width': 1366, 'height': 768},
-                locale='en-US'
+                locale='en-US',
+                **context_options
             )
+            if self.har_mode == "replay":
+                # not_found="abort": anything missing from the archive fails instead of going online
+                await self.context.route_from_har(self.har_path, not_found="abort")
+                self.logger.info(f"Replaying session from {self.har_path}")
 
             # Add extra headers
             await self.context.set_extra_http_headers({
@@ -65,10 +92,11 @@ class LinkedInPostScraperPlaywright:
         """Login to LinkedIn with provided credentials"""
         try:
             self.logger.info("Navigating to LinkedIn login page")
-            await self.page.goto("https://www.linkedin.com/login", wait_until='networkidle')
+            response = await self.page.goto("https://www.linkedin.com/login", wait_until='networkidle')
+            await check_page(self.page, response, allow_login=True)
 
             # Wait for login form
-            await self.page.wait_for_selector("#username", timeout=10000)
+            await wait_for_page_or_block(self.page, "#username", timeout=10000, allow_login=True)
 
             # Human-like typing with delays
             await self.page.type("#username", self.email, delay=random.randint(50, 150))
@@ -79,14 +107,11 @@ class LinkedInPostScraperPlaywright:
             # Click login button
             await self.page.click("button[type='submit']")
 
-            # Wait for successful login with multiple selectors
-            try:
-                await self.page.wait_for_selector(".search-global-typeahead", timeout=15000)
-            except:
-                try:
-                    await self.page.wait_for_selector(".feed-container-theme", timeout=10000)
-                except:
-                    await self.page.wait_for_selector(".global-nav", timeout=10000)
+            # Wait for successful login (any of the feed selectors), failing fast on a checkpoint
+            await wait_for_page_or_block(
+                self.page, ".search-global-typeahead, .feed-container-theme, .global-nav",
+                timeout=15000, allow_login=True
+            )
 
             self.logger.info("Successfully logged into LinkedIn")
             await asyncio.sleep(random.uniform(2, 4))
@@ -109,14 +134,14 @@ class LinkedInPostScraperPlaywright:
                 ".search-global-typeahead input"
             ]
 
+            await check_page(self.page)
+            await wait_for_page_or_block(self.page, ", ".join(search_selectors), timeout=10000)
+
             search_input = None
             for selector in search_selectors:
-                try:
-                    await self.page.wait_for_selector(selector, timeout=5000)
+                if await self.page.query_selector(selector):
                     search_input = selector
                     break
-                except:
-                    continue
 
             if not search_input:
                 raise Exception("Could not find search input")
@@ -127,7 +152,7 @@ class LinkedInPostScraperPlaywright:
             await self.page.press(search_input, "Enter")
 
             # Wait for search results
-            await self.page.wait_for_selector(".search-results-container", timeout=15000)
+            await wait_for_page_or_block(self.page, ".search-results-container", timeout=15000)
 
             self.logger.info("Search results loaded")
             await asyncio.sleep(random.uniform(2, 3))
@@ -240,17 +265,31 @@ class LinkedInPostScraperPlaywright:
             # Continue execution even if filter fails
 
     async def get_full_post_url(self, partial_url: str) -> Optional[str]:
-        """Open post in new tab to get full URL as requested"""
+        """Resolve the canonical URL of the post a link leads to, over HTTP when
+        possible, else in a new tab. None if it doesn't lead to a post."""
+        # Make URL absolute if needed
+        if not partial_url.startswith('http'):
+            full_url = f"https://www.linkedin.com{partial_url}"
+        else:
+            full_url = partial_url
+
+        if self.fetch_mode == "http":
+            try:
+                if self.fetcher is None:
+                    self.fetcher = await PostFetcher.from_context(self.context)
+                resolved = await self.fetcher.resolve(full_url)
+                post_url = canonical_url(resolved) if resolved else None
+                if post_url:
+                    return post_url
+                # Login wall, redirect to the feed...: the browser session may still get through
+                self.logger.debug(f"HTTP fetch of {partial_url} didn't land on a post, using browser tab")
+            except Exception as e:
+                self.logger.debug(f"HTTP fetch failed for {partial_url}, using browser tab: {e}")
+
         try:
             # Create new page for this specific post
             new_page = await self.context.new_page()
 
-            # Make URL absolute if needed
-            if not partial_url.startswith('http'):
-                full_url = f"https://www.linkedin.com{partial_url}"
-            else:
-                full_url = partial_url
-
             # Navigate to post
             await new_page.goto(full_url, wait_until='domcontentloaded', timeout=10000)
             await asyncio.sleep(1)
@@ -261,28 +300,30 @@ class LinkedInPostScraperPlaywright:
             # Close the tab as requested
             await new_page.close()
 
-            # Clean URL (remove tracking parameters)
-            clean_url = final_url.split('?')[0]
-            return clean_url
+            return canonical_url(final_url)
 
         except Exception as e:
             self.logger.debug(f"Could not get full URL for {partial_url}: {e}")
-            # Return cleaned partial URL as fallback
-            if not partial_url.startswith('http'):
-                partial_url = f"https://www.linkedin.com{partial_url}"
-            return partial_url.split('?')[0]
-
-    async def collect_post_links(self, target_count=50):
-        """Collect post links by scrolling and opening each post in new tab"""
-        self.post_links = []
+            return canonical_url(partial_url)
+
+    async def collect_post_links(self, target_count=50, on_post=None):
+        """Collect post links by scrolling, opening a post in a new tab when its link doesn't name it
+
+        `on_post` (async callable) receives the canonical URL of every post as soon as it is collected.
+        """
+        self.posts = PostBatch()
         scroll_attempts = 0
         max_scroll_attempts = 50  # Increased for better collection
-        processed_posts = set()  # Track processed posts to avoid duplicates
+        processed_links = set()  # Track processed links to avoid duplicates
+        # Per-view, per-post and per-scroll events are sampled
+        view_log = LogSampler(self.logger)
+        post_log = LogSampler(self.logger)
+        scroll_log = LogSampler(self.logger)
 
         try:
             self.logger.info(f"Starting to collect {target_count} post links")
 
-            while len(self.post_links) < target_count and scroll_attempts < max_scroll_attempts:
+            while len(self.posts) < target_count and scroll_attempts < max_scroll_attempts:
                 # Wait for content to load
                 await asyncio.sleep(random.uniform(2, 3))
 
@@ -304,10 +345,10 @@ class LinkedInPostScraperPlaywright:
                     except:
                         continue
 
-                self.logger.info(f"Found {len(posts)} post elements on current view")
+                view_log.info("Found %d post elements on current view", len(posts), elements=len(posts))
 
                 for post in posts:
-                    if len(self.post_links) >= target_count:
+                    if len(self.posts) >= target_count:
                         break
 
                     try:
@@ -333,23 +374,26 @@ class LinkedInPostScraperPlaywright:
                             except:
                                 continue
 
-                        if partial_url and partial_url not in processed_posts:
-                            processed_posts.add(partial_url)
+                        if partial_url and partial_url not in processed_links:
+                            processed_links.add(partial_url)
 
-                            # Get full URL by opening in new tab (as requested)
-                            full_url = await self.get_full_post_url(partial_url)
+                            # Links naming their post need no tab; others are opened to find it
+                            record = parse_post(partial_url) or parse_post(await self.get_full_post_url(partial_url))
 
-                            if full_url and full_url not in self.post_links:
-                                self.post_links.append(full_url)
-                                self.logger.info(f"Collected post {len(self.post_links)}: {full_url}")
+                            if record is not None and self.posts.add(record):
+                                post_log.info("Collected post %d: %s", len(self.posts), record.url,
+                                              posts=len(self.posts))
+                                if on_post:
+                                    await on_post(record.url)
 
                     except Exception as e:
                         self.logger.debug(f"Error processing post: {e}")
                         continue
 
                 # Scroll down for more posts if needed
-                if len(self.post_links) < target_count:
-                    self.logger.info(f"Scrolling for more posts... (collected: {len(self.post_links)}/{target_count})")
+                if len(self.posts) < target_count:
+                    scroll_log.info("Scrolling for more posts... (collected: %d/%d)", len(self.posts), target_count,
+                                    posts=len(self.posts))
 
                     # Scroll gradually
                     await self.page.evaluate("window.scrollBy(0, window.innerHeight)")
@@ -364,7 +408,7 @@ class LinkedInPostScraperPlaywright:
                         self.logger.info("Reached bottom of page")
                         break
 
-            self.logger.info(f"Collection completed. Total posts collected: {len(self.post_links)}")
+            self.logger.info(f"Collection completed. Total posts collected: {len(self.posts)}")
 
         except Exception as e:
             self.logger.error(f"Error collecting post links: {e}")
@@ -374,15 +418,11 @@ class LinkedInPostScraperPlaywright:
         """Save to CSV file with enhanced data"""
         try:
             timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            rows = [[link, timestamp, 'New Tab Opening Method'] for link in self.posts.urls()]
+            # Written from a worker thread so the event loop keeps serving meanwhile
+            await asyncio.to_thread(self._write_csv, filename, rows)
 
-            with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
-                writer = csv.writer(csvfile)
-                writer.writerow(['Post_URL', 'Collected_At', 'Collection_Method'])
-
-                for link in self.post_links:
-                    writer.writerow([link, timestamp, 'New Tab Opening Method'])
-
-            self.logger.info(f"Saved {len(self.post_links)} posts to {filename}")
+            self.logger.info(f"Saved {len(self.posts)} posts to {filename}")
 
         except Exception as e:
             self.logger.error(f"Failed to save CSV: {e}")
@@ -393,7 +433,7 @@ class LinkedInPostScraperPlaywright:
         try:
             data = {
                 "scraping_metadata": {
-                    "total_posts": len(self.post_links),
+                    "total_posts": len(self.posts),
                     "collection_timestamp": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
                     "collection_method": "Individual tab opening for each post",
                     "user_agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36",
@@ -402,21 +442,38 @@ class LinkedInPostScraperPlaywright:
                         "date_filter": "Past week"
                     }
                 },
-                "post_links": self.post_links
+                "post_links": self.posts.urls()
             }
 
-            with open(filename, 'w', encoding='utf-8') as jsonfile:
-                json.dump(data, jsonfile, indent=2, ensure_ascii=False)
+            await asyncio.to_thread(self._write_json, filename, data)
 
-            self.logger.info(f"Saved {len(self.post_links)} posts to {filename}")
+            self.logger.info(f"Saved {len(self.posts)} posts to {filename}")
 
         except Exception as e:
             self.logger.error(f"Failed to save JSON: {e}")
             raise
 
+    @staticmethod
+    def _write_csv(filename, rows):
+        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(['Post_URL', 'Collected_At', 'Collection_Method'])
+            writer.writerows(rows)
+
+    @staticmethod
+    def _write_json(filename, data):
+        with open(filename, 'w', encoding='utf-8') as jsonfile:
+            json.dump(data, jsonfile, indent=2, ensure_ascii=False)
+
     async def close_browser(self):
         """Close browser and cleanup"""
         try:
+            if self.fetcher:
+                await self.fetcher.close()
+                self.fetcher = None
+            if self.context:
+                # Closing the context is what writes a recorded HAR to disk
+                await self.context.close()
             if self.browser:
                 await self.browser.close()
             if hasattr(self, 'playwright'):
@@ -425,7 +482,7 @@ class LinkedInPostScraperPlaywright:
         except Exception as e:
             self.logger.error(f"Error closing browser: {e}")
 
-    async def run_scraping(self, hashtags: List[str], target_posts=50, save_format="both"):
+    async def run_scraping(self, hashtags: List[str], target_posts=50, save_format="both", on_post=None):
         """Main scraping method with all requested features"""
         try:
             # Start browser with realistic settings
@@ -444,7 +501,7 @@ class LinkedInPostScraperPlaywright:
             await self.apply_date_filter_past_week()
 
             # Collect post links by opening each in new tab
-            await self.collect_post_links(target_posts)
+            await self.collect_post_links(target_posts, on_post=on_post)
 
             # Save results in requested formats
             if save_format in ["csv", "both"]:
@@ -460,14 +517,25 @@ class LinkedInPostScraperPlaywright:
         finally:
             await self.close_browser()
 
+    def stream_posts(self, hashtags: List[str], target_posts=50, save_format="both", queue_size=10):
+        """Async iterator over post URLs, yielded as soon as each one is collected.
+
+        Scrolling pauses while `queue_size` posts are waiting to be consumed.
+        """
+        return stream_callback(
+            lambda on_post: self.run_scraping(hashtags, target_posts, save_format, on_post=on_post),
+            queue_size=queue_size
+        )
+
 
 # Configuration for easy modification (modular design as requested)
 class ScrapingConfig:
     """Configuration class for easy hashtag and parameter modification"""
 
-    # Login credentials
-    EMAIL = "mathsfodnahai@gmail.com"
-    PASSWORD = "Anjaliandanuj19"
+    # Login credentials (first account of the pool, see accounts.py)
+    ACCOUNTS = load_accounts()
+    EMAIL = ACCOUNTS[0]['email']
+    PASSWORD = ACCOUNTS[0]['password']
 
     # Hashtag sets (easily changeable as requested)
     HASHTAG_SETS = {
@@ -484,11 +552,15 @@ class ScrapingConfig:
     TARGET_POSTS = 50
     HEADLESS_MODE = False  # Set to True for background operation
     SAVE_FORMAT = "both"  # "csv", "json", or "both"
+    FETCH_MODE = "http"  # "http" (pooled HTTP client, browser fallback) or "browser"
+    HAR_MODE = None  # None (live), "record" or "replay" (offline, from HAR_PATH)
+    HAR_PATH = "hars/linkedin_session.har"
 
 
 # Main execution function
 async def main():
     """Enhanced main function with all requested features"""
+    setup_logging()
     config = ScrapingConfig()
 
     print("🚀 LinkedIn Post URL Scraper - Enhanced Version")
@@ -503,7 +575,10 @@ async def main():
     scraper = LinkedInPostScraperPlaywright(
         email=config.EMAIL,
         password=config.PASSWORD,
-        headless=config.HEADLESS_MODE
+        headless=config.HEADLESS_MODE,
+        fetch_mode=config.FETCH_MODE,
+        har_mode=config.HAR_MODE,
+        har_path=config.HAR_PATH
     )
 
     try:
@@ -0,0 +1,137 @@
+"""
+Logging setup shared by the API, workers and scrapers
+
+setup_logging() installs one non-blocking handler on the root logger: records
+go onto an in-memory queue (QueueHandler) and a background thread
+(QueueListener) formats and writes them, so log I/O never runs on the event
+loop. With LOGGING_CONFIG['format'] = 'json' every record is one JSON object.
+
+The ID of the scrape job being run is kept in a context variable and added to
+every record logged while it runs:
+
+    with job_context(job_id):
+        await scrape_keyword(...)
+
+Hot loops (one event per post or per scroll) log through LogSampler, which
+only lets every Nth event and at most one event per interval through.
+"""
+
+import atexit
+import contextlib
+import contextvars
+import json
+import logging
+import logging.handlers
+import queue
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+from config import LOGGING_CONFIG
+
+job_id_var: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("job_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "job_id"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+
+
+@contextlib.contextmanager
+def job_context(job_id: Optional[str]):
+    """Tag the records logged inside the block (and tasks started from it) with `job_id`"""
+    token = job_id_var.set(job_id)
+    try:
+        yield
+    finally:
+        job_id_var.reset(token)
+
+
+def current_job_id() -> Optional[str]:
+    return job_id_var.get()
+
+
+class JobIdFilter(logging.Filter):
+    """Adds the current job ID as `record.job_id`"""
+
+    def filter(self, record):
+        if not hasattr(record, "job_id"):
+            record.job_id = job_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including fields passed with `extra`"""
+
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "job_id": getattr(record, "job_id", None)
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class LogSampler:
+    """Lets through every `every`-th event, and at least one per `min_interval` seconds"""
+
+    def __init__(self, logger: logging.Logger, every: Optional[int] = None,
+                 min_interval: Optional[float] = None):
+        self.logger = logger
+        self.every = every or LOGGING_CONFIG['sample_every']
+        self.min_interval = min_interval if min_interval is not None else LOGGING_CONFIG['sample_interval_seconds']
+        self.count = 0
+        self.suppressed = 0
+        self._last_emit = 0.0
+
+    def log(self, level, msg, *args, **fields):
+        """Log `msg % args` if this event is sampled; `fields` go into the record"""
+        self.count += 1
+        now = time.monotonic()
+        if self.count % self.every != 0 and now - self._last_emit < self.min_interval:
+            self.suppressed += 1
+            return
+        if self.logger.isEnabledFor(level):
+            self.logger.log(level, msg, *args, extra=dict(fields, suppressed=self.suppressed))
+        self.suppressed = 0
+        self._last_emit = now
+
+    def info(self, msg, *args, **fields):
+        self.log(logging.INFO, msg, *args, **fields)
+
+
+def setup_logging(level: Optional[str] = None, fmt: Optional[str] = None):
+    """Route the root logger through a queue to a background writer (idempotent)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler()
+    if (fmt or LOGGING_CONFIG['format']) == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - [%(job_id)s] %(message)s"
+        ))
+
+    records = queue.SimpleQueue()
+    handler = logging.handlers.QueueHandler(records)
+    # Filter on the producing side: the context variable isn't visible from the listener thread
+    handler.addFilter(JobIdFilter())
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(level or LOGGING_CONFIG['level'])
+
+    _listener = logging.handlers.QueueListener(records, output, respect_handler_level=False)
+    _listener.start()
+    atexit.register(_listener.stop)
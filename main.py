@@ -1,22 +1,73 @@
-from fastapi import FastAPI, HTTPException, BackgroundTasks
+import time
+
+# Startup time is measured from here to the end of the lifespan startup
+_IMPORT_STARTED = time.monotonic()
+
+from collections import deque
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, HTTPException, BackgroundTasks, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
-from typing import List, Optional, Dict, Any
+from fastapi.responses import FileResponse, JSONResponse, StreamingResponse
+from pydantic import BaseModel, Field
+from typing import List, Literal, Optional, Dict, Any
 from datetime import datetime
 import logging
 import asyncio
+import os
+import uuid
 
-# Import your scraper
-from jobs import LinkedInPostScraperPlaywright
+# The scraper (and Playwright) is imported by worker.py only when a scrape runs
+from accounts import AccountPool, load_accounts
+from cache import STALE, ResultCache
+from dashboard import DashboardStats
+from config import EXECUTION_CONFIG, EXPORT_CONFIG, ISOLATION_CONFIG, JOB_CONFIG, QUEUE_CONFIG, SCHEDULER_CONFIG
+from export import PostExporter
+from job_control import JobControl
+from log_utils import job_context, setup_logging
+from posts import PostBatch
+from prewarm import BrowserPrewarmer
+from scheduler import KeywordScheduler
+from search_index import get_post_index
+from work_queue import ACTIVE_STATES, COMPLETED, QUEUED, RUNNING, STOPPED_STATES, MemoryWorkQueue, create_queue
+from worker import ScrapeWorker, scrape_keyword, trace_path_for
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Warm browsers only where this process scrapes itself
+    if EXECUTION_CONFIG['mode'] == "local" and ISOLATION_CONFIG['mode'] == "inline":
+        prewarmer.start()
+    if SCHEDULER_CONFIG['enabled']:
+        keyword_scheduler.start()
+    if EXPORT_CONFIG['enabled'] and post_exporter is not None:
+        post_exporter.start()
+    if job_queue is not None:
+        await _load_from_queue()
+    queue_worker_task = None
+    if queue_worker is not None:
+        queue_worker_task = asyncio.create_task(
+            queue_worker.run_forever(concurrency=QUEUE_CONFIG['memory_worker_concurrency'])
+        )
+    startup_metrics["startup_seconds"] = round(time.monotonic() - _IMPORT_STARTED, 3)
+    logger.info(f"API started in {startup_metrics['startup_seconds']}s")
+    yield
+    if queue_worker_task is not None:
+        queue_worker.stop()
+        queue_worker_task.cancel()
+        await asyncio.gather(queue_worker_task, return_exceptions=True)
+    await keyword_scheduler.stop()
+    await prewarmer.stop()
+    if post_exporter is not None:
+        await post_exporter.stop()
 
 app = FastAPI(
     title="LinkedIn Job Scraper API",
     version="1.0.0",
-    description="API for scraping LinkedIn job posts based on keywords"
+    description="API for scraping LinkedIn job posts based on keywords",
+    lifespan=lifespan
 )
 
-# Logging
-logging.basicConfig(level=logging.INFO)
+# Logging (JSON records with the job ID, written off the event loop)
+setup_logging()
 logger = logging.getLogger(__name__)
 
 # CORS
@@ -33,6 +84,14 @@ class ScrapeRequest(BaseModel):
     input_keyword: str
     target_posts: int = 50
     headless: bool = True
+    # Offline runs: "record" captures the session to hars/<har_name>.har, "replay" serves it from there
+    har_mode: Optional[Literal["record", "replay"]] = None
+    har_name: Optional[str] = None
+    # Opt-in diagnostics, fetched afterwards from GET /jobs/{job_id}/trace
+    trace: Optional[Literal["playwright", "profile"]] = None
+    # Wall-clock budget; the job stops with the posts it has by then (default JOB_CONFIG).
+    # Must leave room for the grace_seconds a stopping job gets to wrap up
+    deadline_seconds: Optional[int] = Field(None, gt=JOB_CONFIG['grace_seconds'])
 
 class ScrapeResponse(BaseModel):
     success: bool
@@ -44,9 +103,144 @@ class ScrapeResponse(BaseModel):
     csv_filename: Optional[str] = None
     json_filename: Optional[str] = None
 
+class WatchRequest(BaseModel):
+    keyword: str
+    interval_seconds: Optional[int] = Field(None, gt=0)
+    cron: Optional[str] = None
+    target_posts: int = 50
+
 # ------------------ STORAGE ------------------
 scraping_results: Dict[str, Any] = {}
 scraping_status: Dict[str, str] = {}
+scraping_jobs: Dict[str, Dict[str, Any]] = {}
+job_controls: Dict[str, JobControl] = {}  # running local jobs, for POST /jobs/{job_id}/cancel
+account_pool = AccountPool(load_accounts())
+result_cache = ResultCache()
+dashboard_stats = DashboardStats()
+prewarmer = BrowserPrewarmer(account_pool)
+post_exporter = PostExporter() if PostExporter.available() else None
+# Filled in once: how long startup and the first scrape after it took
+startup_metrics: Dict[str, Any] = {
+    "startup_seconds": None,
+    "first_scrape_seconds": None,
+    "first_post_seconds": None,
+    "first_scrape_warm": None
+}
+
+# Filters every scrape applies (Posts content filter, past week); part of the cache key
+SCRAPE_FILTERS = ("content:posts", "date_posted:past_week")
+
+def _cache_key(keyword: str, target_posts: int, har_mode: Optional[str] = None, har_name: Optional[str] = None):
+    # Replayed runs are cached apart from live ones
+    return (keyword.lower().strip(), SCRAPE_FILTERS, target_posts, har_mode, har_name)
+
+def _merge_incremental(keyword: str, result: Dict[str, Any], target_posts: int) -> Dict[str, Any]:
+    """Put the new posts of an incremental scrape in front of the previous ones"""
+    previous = scraping_results.get(keyword, {})
+    if not previous.get("success"):
+        return result
+
+    new_links = result["links"]
+    # Joined on post IDs: older results may hold the same posts under other URL shapes
+    posts = PostBatch.from_urls(new_links + previous["links"])
+    links = posts.urls()[:max(target_posts, len(new_links))]
+    return dict(result, links=links, total_posts=len(links), new_posts=len(new_links))
+
+# In 'queue' mode scrapes run in worker.py processes and the queue is the source of truth
+job_queue = create_queue() if EXECUTION_CONFIG['mode'] == "queue" else None
+# The memory backend only exists inside this process, so a worker here runs its jobs
+queue_worker = ScrapeWorker(job_queue, account_pool) if isinstance(job_queue, MemoryWorkQueue) else None
+
+# Queue events (finished jobs) taken in so far, and the finished jobs whose results
+# the status/result views haven't read yet, in the order they finished
+queue_events = {"seq": 0}
+unread_jobs: "deque[dict]" = deque()
+queue_sync_lock = asyncio.Lock()
+QUEUE_EVENT_BATCH = 1000
+
+async def _load_from_queue():
+    """At startup: the latest result of every keyword; jobs finishing from now on come as events"""
+    queue_events["seq"] = await asyncio.to_thread(job_queue.last_event_seq)
+    for kw, job in (await asyncio.to_thread(job_queue.latest_by_keyword)).items():
+        _sync_job(kw, job)
+
+async def _read_queue_events():
+    """Count the jobs that finished since the last call. Cheap: no results are read.
+    Call with queue_sync_lock held"""
+    while True:
+        events = await asyncio.to_thread(job_queue.events_since, queue_events["seq"], QUEUE_EVENT_BATCH)
+        for event in events:
+            queue_events["seq"] = event["seq"]
+            # Duration from enqueueing, queue wait included
+            duration = datetime.fromisoformat(event["finished_at"]) - datetime.fromisoformat(event["created_at"])
+            dashboard_stats.job_finished(event["job_id"], event["keyword"], event["status"], posts=event["posts"],
+                                         duration_seconds=duration.total_seconds(), error=event["error"])
+            if not event["hidden"]:
+                unread_jobs.append(event)
+        if len(events) < QUEUE_EVENT_BATCH:
+            return
+
+async def _sync_from_queue(keyword: Optional[str] = None):
+    """Refresh the local status/result views from the shared queue"""
+    if job_queue is None:
+        return
+
+    # SQLite/Redis round trips; SQLite may wait on a worker's write lock
+    async with queue_sync_lock:
+        await _read_queue_events()
+        # Every finished job in turn, so an incremental refresh is merged even when
+        # another job of its keyword finished after it
+        while unread_jobs:
+            job = await asyncio.to_thread(job_queue.get, unread_jobs.popleft()["job_id"])
+            _sync_job(job["keyword"], job)
+        active = await asyncio.to_thread(job_queue.active_jobs, keyword)
+
+    for job in active:
+        _sync_job(job["keyword"], job)
+
+def _sync_job(kw: str, job: dict):
+    payload = job["payload"]
+    is_refresh = payload.get("refresh", False)
+    cache_key = _cache_key(kw, payload.get("target_posts", 50), payload.get("har_mode"), payload.get("har_name"))
+    if job["status"] not in ACTIVE_STATES and is_refresh:
+        result_cache.end_refresh(cache_key)
+
+    if job["status"] in ACTIVE_STATES:
+        dashboard_stats.job_started(job["id"], kw)
+        # A background refresh keeps serving the previous result meanwhile
+        if not (is_refresh and kw in scraping_results):
+            scraping_status[kw] = "in_progress"
+        return
+
+    if job["status"] in STOPPED_STATES:
+        # Partial results are shown but not cached; a refresh keeps the previous result
+        if job["result"] and not (is_refresh and scraping_results.get(kw, {}).get("success")):
+            scraping_results[kw] = job["result"]
+            scraping_status[kw] = job["status"]
+            dashboard_stats.result_shown(kw, job["result"]["total_posts"])
+        elif not job["result"] and scraping_status.get(kw) == "in_progress":
+            # Cancelled before a worker picked it up
+            scraping_status[kw] = job["status"]
+    elif job["status"] == COMPLETED:
+        result = job["result"]
+        if job["payload"].get("since_activity_id"):
+            result = _merge_incremental(kw, result, job["payload"].get("target_posts", 50))
+        scraping_status[kw] = "completed"
+        scraping_results[kw] = result
+        dashboard_stats.result_shown(kw, result["total_posts"])
+        result_cache.set(cache_key, result,
+                         stored_at=datetime.fromisoformat(result["timestamp"]).timestamp())
+    elif is_refresh and scraping_results.get(kw, {}).get("success"):
+        logger.warning(f"Background refresh failed for {kw}, keeping previous result: {job['error']}")
+    else:
+        scraping_status[kw] = "failed"
+        scraping_results[kw] = {
+            "success": False,
+            "error": job["error"],
+            "timestamp": job["updated_at"],
+            "keyword": job["payload"]["input_keyword"]
+        }
+        dashboard_stats.result_shown(kw, 0)
 
 # ------------------ ROUTES ------------------
 @app.get("/")
@@ -58,13 +252,49 @@ async def root():
             "POST /scrape": "Start scraping job posts",
             "GET /results/{keyword}": "Get scraping results",
             "GET /status/{keyword}": "Check scraping status",
-            "GET /health": "Health check"
+            "GET /jobs/{job_id}": "Get a scrape job",
+            "GET /jobs/{job_id}/trace": "Download the trace/profile of a job started with trace",
+            "POST /jobs/{job_id}/cancel": "Stop a queued or running job, keeping the posts it collected",
+            "GET /health": "Health check",
+            "GET /livez": "Liveness probe",
+            "GET /readyz": "Readiness probe with warm browser capacity",
+            "GET /accounts": "Account pool status",
+            "GET /cache": "Result cache statistics",
+            "GET /dashboard/summary": "Per-keyword totals, posts per day, success rate, recent activity",
+            "GET /schedule": "Watched keywords and their last refresh",
+            "POST /schedule": "Watch a keyword",
+            "DELETE /schedule/{keyword}": "Stop watching a keyword",
+            "GET /search?q=": "Full-text search over collected posts",
+            "GET /export/posts": "Stream collected posts as Arrow/Parquet (columns, keyword, since, until)",
+            "POST /export/compact": "Compact new posts into the Parquet export now"
         }
     }
 
 @app.post("/scrape")
 async def scrape_linkedin_jobs(request: ScrapeRequest, background_tasks: BackgroundTasks):
     keyword = request.input_keyword.lower().strip()
+    await _sync_from_queue(keyword)
+
+    cache_key = _cache_key(keyword, request.target_posts, request.har_mode, request.har_name)
+    # A recording always has to hit the network
+    cached, cache_state = result_cache.get(cache_key) if request.har_mode != "record" else (None, None)
+    if cached is not None:
+        scraping_results[keyword] = cached
+        scraping_status[keyword] = "completed"
+        dashboard_stats.result_shown(keyword, cached["total_posts"])
+        if cache_state == STALE and result_cache.begin_refresh(cache_key):
+            logger.info(f"Serving stale result for {keyword}, refreshing in background")
+            await _start_job(request, background_tasks, refresh=True)
+        return {
+            "success": True,
+            "message": f"Cached results for keyword: {keyword}",
+            "status": "completed",
+            "cached": True,
+            "cache_state": cache_state,
+            "keyword": keyword,
+            "target_posts": request.target_posts,
+            "total_posts": cached["total_posts"]
+        }
 
     if keyword in scraping_status and scraping_status[keyword] == "in_progress":
         return {
@@ -74,71 +304,162 @@ async def scrape_linkedin_jobs(request: ScrapeRequest, background_tasks: Backgro
         }
 
     scraping_status[keyword] = "in_progress"
-    background_tasks.add_task(run_scraping_task, request)
+    job_id = await _start_job(request, background_tasks)
 
     return {
         "success": True,
         "message": f"Scraping started for keyword: {keyword}",
         "status": "in_progress",
+        "job_id": job_id,
         "keyword": keyword,
         "target_posts": request.target_posts
     }
 
-async def run_scraping_task(request: ScrapeRequest):
+async def _start_job(request: ScrapeRequest, background_tasks: BackgroundTasks, refresh: bool = False) -> str:
+    """Enqueue (queue mode) or schedule (local mode) a scrape job"""
     keyword = request.input_keyword.lower().strip()
+    if job_queue is not None:
+        job_id = await asyncio.to_thread(job_queue.enqueue, keyword, dict(request.dict(), refresh=refresh))
+        dashboard_stats.job_started(job_id, keyword)
+        return job_id
 
-    try:
-        logger.info(f"Starting scraping for keyword: {keyword}")
+    job_id = uuid.uuid4().hex
+    scraping_jobs[job_id] = {
+        "id": job_id,
+        "keyword": keyword,
+        "status": "in_progress",
+        "refresh": refresh,
+        "created_at": datetime.now().isoformat(),
+        "links": []  # filled while the scrape runs
+    }
+    job_controls[job_id] = JobControl(request.deadline_seconds)
+    dashboard_stats.job_started(job_id, keyword)
+    background_tasks.add_task(run_scraping_task, request, job_id, refresh)
+    return job_id
 
-        EMAIL = "mathsfodnahai@gmail.com"
-        PASSWORD = "Anjaliandanuj19"
-        HASHTAGS = [request.input_keyword + " hiring"]
+async def run_scraping_task(request: ScrapeRequest, job_id: str, refresh: bool = False):
+    keyword = request.input_keyword.lower().strip()
+    cache_key = _cache_key(keyword, request.target_posts, request.har_mode, request.har_name)
 
-        scraper = LinkedInPostScraperPlaywright(
-            EMAIL, PASSWORD, headless=request.headless
-        )
-        collected_links = await scraper.run_scraping(
-            hashtags=HASHTAGS,
-            target_posts=request.target_posts,
-            save_format="both"   # will auto-save CSV + JSON
-        )
+    started = time.monotonic()
+    with job_context(job_id):
+        try:
+            logger.info(f"Starting scraping for keyword: {keyword}")
 
-        timestamp = datetime.now().isoformat()
-        csv_filename = "linkedin_posts_playwright.csv"
-        json_filename = "linkedin_posts_playwright.json"
+            links = scraping_jobs[job_id]["links"]
+            first_scrape = startup_metrics["first_scrape_seconds"] is None
 
-        scraping_results[keyword] = {
-            "success": True,
-            "links": collected_links,
-            "total_posts": len(collected_links),
-            "timestamp": timestamp,
-            "keyword": request.input_keyword,
-            "csv_filename": csv_filename,
-            "json_filename": json_filename
-        }
+            def on_post(link):
+                if first_scrape and not links:
+                    startup_metrics["first_post_seconds"] = round(time.monotonic() - started, 3)
+                links.append(link)
 
-        scraping_status[keyword] = "completed"
-        logger.info(f"Scraping completed for keyword: {keyword}. Found {len(collected_links)} posts")
+            result = await scrape_keyword(request.dict(), account_pool, on_post=on_post,
+                                          prewarmer=prewarmer, control=job_controls[job_id])
+            if result.get("stopped"):
+                scraping_jobs[job_id]["status"] = result["stopped"]
+                logger.info(f"Scraping {result['stopped']} for keyword: {keyword} after {result['total_posts']} posts")
+                dashboard_stats.job_finished(job_id, keyword, result["stopped"], posts=result["total_posts"],
+                                             duration_seconds=time.monotonic() - started)
+                # Partial results aren't cached; a refresh keeps serving the previous result
+                if scraping_jobs[job_id].get("discarded"):
+                    return
+                if not (refresh and scraping_results.get(keyword, {}).get("success")):
+                    scraping_results[keyword] = result
+                    scraping_status[keyword] = result["stopped"]
+                    dashboard_stats.result_shown(keyword, result["total_posts"])
+                return
+
+            if first_scrape and startup_metrics["first_scrape_seconds"] is None:
+                startup_metrics["first_scrape_seconds"] = round(time.monotonic() - started, 3)
+                startup_metrics["first_scrape_warm"] = result.get("warm_start")
+            scraping_results[keyword] = result
+            result_cache.set(cache_key, result)
 
+            scraping_status[keyword] = "completed"
+            scraping_jobs[job_id]["status"] = "completed"
+            dashboard_stats.job_finished(job_id, keyword, "completed", posts=result["total_posts"],
+                                         duration_seconds=time.monotonic() - started)
+            dashboard_stats.result_shown(keyword, result["total_posts"])
+            logger.info(f"Scraping completed for keyword: {keyword}. Found {result['total_posts']} posts")
+
+        except Exception as e:
+            logger.error(f"Scraping failed for keyword {keyword}: {str(e)}")
+            scraping_jobs[job_id]["status"] = "failed"
+            dashboard_stats.job_finished(job_id, keyword, "failed", duration_seconds=time.monotonic() - started,
+                                         error=str(e))
+            if refresh and scraping_results.get(keyword, {}).get("success"):
+                # Keep serving the previous result, the next request retries the refresh
+                return
+            scraping_results[keyword] = {
+                "success": False,
+                "error": str(e),
+                "error_type": getattr(e, "kind", None),  # challenge / rate_limited / logged_out
+                "timestamp": datetime.now().isoformat(),
+                "keyword": request.input_keyword
+            }
+            scraping_status[keyword] = "failed"
+            dashboard_stats.result_shown(keyword, 0)
+
+        finally:
+            job_controls.pop(job_id).close()
+            if refresh:
+                result_cache.end_refresh(cache_key)
+
+async def refresh_watched_keyword(keyword: str, target_posts: int, since_activity_id: Optional[int]) -> Dict[str, Any]:
+    """Incremental scrape used by the scheduler; returns the raw (new posts only) result"""
+    payload = {
+        "input_keyword": keyword,
+        "target_posts": target_posts,
+        "headless": True,
+        "since_activity_id": since_activity_id,
+        "refresh": True
+    }
+
+    if job_queue is not None:
+        job_id = await asyncio.to_thread(job_queue.enqueue, keyword, payload)
+        dashboard_stats.job_started(job_id, keyword)
+        while True:
+            await asyncio.sleep(QUEUE_CONFIG['poll_seconds'])
+            job = await asyncio.to_thread(job_queue.get, job_id)
+            if job["status"] not in ACTIVE_STATES:
+                break
+        await _sync_from_queue(keyword)
+        if job["status"] != COMPLETED:
+            raise RuntimeError(job["error"])
+        return job["result"]
+
+    job_id = uuid.uuid4().hex
+    dashboard_stats.job_started(job_id, keyword)
+    started = time.monotonic()
+    try:
+        result = await scrape_keyword(payload, account_pool)
     except Exception as e:
-        logger.error(f"Scraping failed for keyword {keyword}: {str(e)}")
-        scraping_results[keyword] = {
-            "success": False,
-            "error": str(e),
-            "timestamp": datetime.now().isoformat(),
-            "keyword": request.input_keyword
-        }
-        scraping_status[keyword] = "failed"
+        dashboard_stats.job_finished(job_id, keyword, "failed", duration_seconds=time.monotonic() - started,
+                                     error=str(e))
+        raise
+    dashboard_stats.job_finished(job_id, keyword, result.get("stopped") or "completed",
+                                 posts=result["total_posts"], duration_seconds=time.monotonic() - started)
+    merged = _merge_incremental(keyword, result, target_posts)
+    scraping_results[keyword] = merged
+    scraping_status[keyword] = "completed"
+    dashboard_stats.result_shown(keyword, merged["total_posts"])
+    result_cache.set(_cache_key(keyword, target_posts), merged)
+    return result
+
+keyword_scheduler = KeywordScheduler(refresh_watched_keyword)
 
 @app.get("/status/{keyword}")
 async def get_scraping_status(keyword: str):
     keyword = keyword.lower().strip()
+    await _sync_from_queue(keyword)
     status = scraping_status.get(keyword, "not_found")
     return {"keyword": keyword, "status": status, "timestamp": datetime.now().isoformat()}
 
 @app.get("/results/{keyword}")
 async def get_results(keyword: str):
     keyword = keyword.lower().strip()
+    await _sync_from_queue(keyword)
 
     if keyword not in scraping_results:
         raise HTTPException(status_code=404, detail=f"No results found for {keyword}. Start scraping first.")
@@ -150,26 +471,212 @@ async def get_results(keyword: str):
 
 @app.get("/results")
 async def get_all_results():
+    await _sync_from_queue()
     return {"total_keywords": len(scraping_results), "results": scraping_results}
 
+async def _cancel_job(job_id: str) -> Optional[str]:
+    """Cancel a job; returns its status afterwards, None if it isn't known"""
+    if job_queue is not None:
+        return await asyncio.to_thread(job_queue.request_cancel, job_id)
+
+    job = scraping_jobs.get(job_id)
+    if job is None:
+        return None
+    control = job_controls.get(job_id)
+    if control is not None:
+        control.cancel()
+    return job["status"]
+
 @app.delete("/results/{keyword}")
 async def delete_results(keyword: str):
     keyword = keyword.lower().strip()
+    # Stop scrapes that would write the deleted results back
+    if job_queue is not None:
+        async with queue_sync_lock:
+            for job in await asyncio.to_thread(job_queue.active_jobs, keyword):
+                await _cancel_job(job["id"])
+            # Otherwise the next sync reads the keyword's finished jobs back in
+            await asyncio.to_thread(job_queue.clear_keyword, keyword)
+            for event in [e for e in unread_jobs if e["keyword"] == keyword]:
+                unread_jobs.remove(event)
+    else:
+        for job_id, job in scraping_jobs.items():
+            if job["keyword"] == keyword and job_id in job_controls:
+                job["discarded"] = True
+                await _cancel_job(job_id)
     scraping_results.pop(keyword, None)
+    dashboard_stats.results_deleted(keyword)
     scraping_status.pop(keyword, None)
+    result_cache.invalidate(keyword)
     return {"message": f"Results deleted for keyword: {keyword}"}
 
 @app.get("/health")
 async def health_check():
+    await _sync_from_queue()
     return {
         "status": "healthy",
         "timestamp": datetime.now().isoformat(),
         "active_scraping_tasks": len([k for k,v in scraping_status.items() if v=="in_progress"]),
-        "total_results": len(scraping_results)
+        "total_results": len(scraping_results),
+        "execution_mode": EXECUTION_CONFIG['mode']
+    }
+
+@app.get("/livez")
+async def liveness():
+    return {"status": "alive", "timestamp": datetime.now().isoformat()}
+
+@app.get("/readyz")
+async def readiness():
+    # Not ready while the startup pre-warm runs or after it failed; with pre-warming
+    # disabled nothing is known about the browser before the first scrape. Depleted
+    # (warm browsers lost to challenges) still serves scrapes, with a cold start
+    warm = prewarmer.status()
+    ready = warm["state"] in ("disabled", "ready", "depleted")
+    body = {
+        "ready": ready,
+        "execution_mode": EXECUTION_CONFIG['mode'],
+        "available_accounts": account_pool.available_count(),
+        "warm_capacity": warm["warm_browsers"],
+        "depleted_capacity": warm["depleted"],
+        "prewarm": warm,
+        "startup": startup_metrics
+    }
+    return JSONResponse(status_code=200 if ready else 503, content=body)
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    if job_queue is not None:
+        job = await asyncio.to_thread(job_queue.get, job_id)
+    else:
+        job = scraping_jobs.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    return job
+
+@app.post("/jobs/{job_id}/cancel")
+async def cancel_job(job_id: str):
+    """Stop a job: a queued one never runs, a running one stops scrolling and keeps
+    the posts collected so far (status 'cancelled' once it has wrapped up)"""
+    status = await _cancel_job(job_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail=f"Job {job_id} not found")
+    if status not in (QUEUED, RUNNING, "in_progress") and status not in STOPPED_STATES:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} already {status}")
+    return {"job_id": job_id, "status": status, "cancel_requested": status not in STOPPED_STATES}
+
+@app.get("/jobs/{job_id}/trace")
+async def get_job_trace(job_id: str):
+    """Playwright trace (open with `playwright show-trace`) or cProfile dump of a traced job"""
+    for kind, media_type in (("playwright", "application/zip"), ("profile", "application/octet-stream")):
+        path = trace_path_for(job_id, kind)
+        if os.path.exists(path):
+            return FileResponse(path, media_type=media_type, filename=os.path.basename(path))
+
+    job = await asyncio.to_thread(job_queue.get, job_id) if job_queue is not None else None
+    if not job or not job["payload"].get("trace"):
+        raise HTTPException(status_code=404, detail=f"No trace for job {job_id}")
+    # Queue mode: the worker that ran the job wrote the file on its own machine
+    if job["status"] in ACTIVE_STATES:
+        raise HTTPException(status_code=409, detail=f"Job {job_id} is {job['status']}, its trace is written when it ends")
+    result = job.get("result") or {}
+    where = (f"{result['trace_file']} on worker host {result['trace_host']}" if result.get("trace_file")
+             else "TRACE_CONFIG['trace_dir'] on the worker host that ran it")
+    raise HTTPException(status_code=409, detail=f"The trace of job {job_id} is not on this machine: "
+                                                f"it was written to {where}")
+
+@app.get("/accounts")
+async def get_accounts():
+    if job_queue is not None:
+        # Jobs run with the workers' accounts; each worker reports its own pool
+        return {"workers": await asyncio.to_thread(job_queue.workers)}
+    return account_pool.summary()
+
+@app.get("/dashboard/summary")
+async def get_dashboard_summary():
+    """Dashboard figures from counters kept up to date as jobs finish"""
+    if job_queue is not None:
+        async with queue_sync_lock:
+            await _read_queue_events()
+    return dashboard_stats.summary()
+
+@app.get("/cache")
+async def get_cache_stats():
+    return result_cache.stats()
+
+@app.get("/schedule")
+async def get_schedule():
+    return {
+        "enabled": SCHEDULER_CONFIG['enabled'],
+        "watched": keyword_scheduler.status()
     }
 
+@app.post("/schedule")
+async def watch_keyword(request: WatchRequest):
+    try:
+        entry = keyword_scheduler.watch(
+            request.keyword, interval_seconds=request.interval_seconds,
+            cron=request.cron, target_posts=request.target_posts
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return entry.to_dict()
+
+@app.delete("/schedule/{keyword}")
+async def unwatch_keyword(keyword: str):
+    if not keyword_scheduler.unwatch(keyword):
+        raise HTTPException(status_code=404, detail=f"{keyword} is not watched")
+    return {"message": f"Stopped watching keyword: {keyword.lower().strip()}"}
+
+@app.get("/search")
+async def search_posts(
+    q: str = Query(..., min_length=1),
+    page: int = Query(1, ge=1),
+    page_size: int = Query(20, ge=1, le=100),
+    keyword: Optional[str] = None,
+    mode: Literal["any", "all"] = "any"
+):
+    try:
+        return await asyncio.to_thread(get_post_index().search, q, page, page_size, keyword, mode)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _require_exporter() -> PostExporter:
+    if post_exporter is None:
+        raise HTTPException(status_code=503, detail="Parquet export needs the pyarrow package")
+    return post_exporter
+
+@app.get("/export")
+async def get_export_status():
+    return _require_exporter().status()
+
+@app.post("/export/compact")
+async def compact_export():
+    return await asyncio.to_thread(_require_exporter().compact)
+
+@app.get("/export/posts")
+async def export_posts(
+    columns: Optional[str] = Query(None, description="Comma-separated, e.g. url,keyword,date"),
+    keyword: Optional[str] = None,
+    since: Optional[str] = Query(None, description="First collection date, YYYY-MM-DD"),
+    until: Optional[str] = Query(None, description="Last collection date, YYYY-MM-DD"),
+    format: Literal["arrow", "parquet"] = "arrow"
+):
+    """Stream the compacted export; only the requested columns and partitions are read"""
+    exporter = _require_exporter()
+    selected = [c.strip() for c in columns.split(",") if c.strip()] if columns else None
+    try:
+        chunks = exporter.stream(selected, keyword, since, until, fmt=format)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    media_type = "application/vnd.apache.arrow.stream" if format == "arrow" else "application/vnd.apache.parquet"
+    filename = f"posts.{'arrows' if format == 'arrow' else 'parquet'}"
+    return StreamingResponse(chunks, media_type=media_type,
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
+
 @app.get("/keywords")
 async def get_keywords():
+    await _sync_from_queue()
     return {"keywords": list(scraping_results.keys()), "count": len(scraping_results)}
 
 # ------------------ RUN ------------------
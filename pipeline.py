@@ -0,0 +1,115 @@
+"""
+Streaming helpers for the scrape pipeline
+
+Scrapers report every post through an `on_post` callback while they scroll.
+`stream_callback` turns such a run into an async iterator, and `stage` chains
+downstream processing (extraction, ranking, emailing, ...) onto it. Every hop
+goes through a bounded asyncio.Queue, so a slow stage makes the stages before
+it wait instead of buffering the whole run in memory.
+
+    posts = scraper.stream_posts(["aiml hiring"], target_posts=50)
+    async for summary in stage(posts, summarize, concurrency=4):
+        ...
+"""
+
+import asyncio
+from typing import AsyncIterator, Awaitable, Callable, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+_DONE = object()
+
+
+class _Failure:
+    """Carries an exception from a stage task to the consumer"""
+
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+async def _drain_task(task: asyncio.Task):
+    if not task.done():
+        task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+async def stream_callback(run: Callable[[Callable[[T], Awaitable[None]]], Awaitable[object]],
+                          queue_size: int = 10) -> AsyncIterator[T]:
+    """Run `run(on_item)` in the background and yield each item it reports.
+
+    `on_item` blocks while `queue_size` items are waiting to be consumed.
+    Errors raised by `run` are re-raised to the consumer after the items
+    produced before the failure; closing the iterator early cancels `run`.
+    """
+    queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def produce():
+        try:
+            await run(queue.put)
+        finally:
+            await queue.put(_DONE)
+
+    producer = asyncio.create_task(produce())
+    try:
+        while True:
+            item = await queue.get()
+            if item is _DONE:
+                break
+            yield item
+        await producer  # surface errors from the producer
+    finally:
+        await _drain_task(producer)
+
+
+async def stage(source: AsyncIterator[T], fn: Callable[[T], Awaitable[R]],
+                concurrency: int = 1, queue_size: int = 10) -> AsyncIterator[R]:
+    """Apply `fn` to every item of `source` with up to `concurrency` workers.
+
+    Results are yielded as soon as they are ready (not in input order). The
+    first error from `source` or `fn` is re-raised to the consumer.
+    """
+    inbox: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+    outbox: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+
+    async def feed():
+        try:
+            async for item in source:
+                await inbox.put(item)
+        except Exception as e:
+            await outbox.put(_Failure(e))
+        finally:
+            for _ in range(concurrency):
+                await inbox.put(_DONE)
+
+    async def work():
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                await outbox.put(_DONE)
+                return
+            try:
+                result = await fn(item)
+            except Exception as e:
+                await outbox.put(_Failure(e))
+                return
+            await outbox.put(result)
+
+    feeder = asyncio.create_task(feed())
+    workers = [asyncio.create_task(work()) for _ in range(concurrency)]
+    try:
+        finished = 0
+        while finished < concurrency:
+            result = await outbox.get()
+            if result is _DONE:
+                finished += 1
+            elif isinstance(result, _Failure):
+                raise result.error
+            else:
+                yield result
+    finally:
+        for task in workers + [feeder]:
+            await _drain_task(task)
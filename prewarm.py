@@ -0,0 +1,159 @@
+"""
+Pre-warmed browsers for the API
+
+Starting Chromium and restoring a LinkedIn session takes several seconds
+before a scrape can even search. With PREWARM_CONFIG['browsers'] > 0 the API
+does that in the background at startup, for the first accounts of the pool,
+and parks each browser on an empty search page. The next scrape that gets one
+of these accounts takes its browser instead of starting a new one; when the
+scrape ends the account is warmed up again, unless LinkedIn showed it a
+challenge. Capacity lost that way (or to a failed re-warm) is reported as
+depleted in `status`.
+
+Warming only restores/creates the session, it doesn't use the account's job
+budget.
+"""
+
+import asyncio
+import logging
+import time
+from typing import Dict, Optional, Set
+
+from config import PREWARM_CONFIG
+
+logger = logging.getLogger(__name__)
+
+DISABLED = "disabled"
+WARMING = "warming"
+READY = "ready"
+DEPLETED = "depleted"  # warmed up once, but no browser is warm, in use or warming now
+FAILED = "failed"
+
+
+class BrowserPrewarmer:
+    """Keeps logged-in browsers ready for the accounts it warmed"""
+
+    def __init__(self, account_pool, config: Optional[dict] = None):
+        self.config = dict(PREWARM_CONFIG)
+        if config:
+            self.config.update(config)
+        self.account_pool = account_pool
+        self.state = DISABLED
+        self.error = None
+        self.prewarm_seconds = None
+        self._warm: Dict[str, object] = {}  # email -> warm scraper
+        self._in_use: Set[str] = set()  # emails whose warm browser a scrape took
+        self._warming: Dict[str, asyncio.Task] = {}
+        self._startup_task: Optional[asyncio.Task] = None
+
+    def start(self):
+        """Warm up browsers in the background (no-op when disabled)"""
+        if self.config['browsers'] <= 0 or self._startup_task is not None:
+            return
+        self.state = WARMING
+        # Registered right away so a scrape arriving meanwhile waits for its browser
+        tasks = [self._warming_task(account) for account in self.account_pool.accounts[:self.config['browsers']]]
+        self._startup_task = asyncio.create_task(self._warm_startup(tasks))
+
+    async def _warm_startup(self, tasks):
+        started = time.monotonic()
+        warmed = sum(await asyncio.gather(*tasks))
+        self.prewarm_seconds = round(time.monotonic() - started, 2)
+
+        if warmed:
+            self.state = READY
+            logger.info(f"Pre-warmed {warmed} browser(s) in {self.prewarm_seconds}s")
+        else:
+            self.state = FAILED
+            logger.error(f"Browser pre-warm failed: {self.error}")
+
+    def _warming_task(self, account) -> asyncio.Task:
+        task = self._warming.get(account.email)
+        if task is None:
+            task = asyncio.create_task(self._warm_one(account))
+            self._warming[account.email] = task
+        return task
+
+    async def _warm_one(self, account) -> bool:
+        scraper = None
+        try:
+            from jobs import LinkedInPostScraperPlaywright
+
+            scraper = LinkedInPostScraperPlaywright(
+                account.email, account.password, headless=self.config['headless'],
+                storage_state_path=account.storage_state_path
+            )
+            await asyncio.wait_for(scraper.prewarm(), timeout=self.config['timeout_seconds'])
+            self._warm[account.email] = scraper
+            if self.state == FAILED:
+                self.state = READY
+            return True
+        except Exception as e:
+            self.error = f"{account.email}: {e}"
+            logger.warning(f"Could not pre-warm a browser for {account.email}: {e}")
+            if scraper is not None:
+                await scraper.close_browser()
+            return False
+        except asyncio.CancelledError:
+            if scraper is not None:
+                await scraper.close_browser()
+            raise
+        finally:
+            self._warming.pop(account.email, None)
+
+    async def take(self, account):
+        """Hand over the warm browser of `account` (waiting for one being warmed), or None"""
+        task = self._warming.get(account.email)
+        if task is not None:
+            await asyncio.shield(task)
+        scraper = self._warm.pop(account.email, None)
+        if scraper is not None:
+            self._in_use.add(account.email)
+        return scraper
+
+    def rewarm(self, account):
+        """Warm `account` up again in the background after its browser was used"""
+        self._in_use.discard(account.email)
+        if self.state != DISABLED and account.email not in self._warm:
+            self._warming_task(account)
+
+    def retire(self, account):
+        """The browser of `account` ended on a challenge: leave the account cold"""
+        self._in_use.discard(account.email)
+
+    def capacity(self) -> int:
+        """Browsers ready to be handed over right now"""
+        return len(self._warm)
+
+    def depleted(self) -> int:
+        """Browsers of the configured ones that are neither warm, in use nor warming"""
+        if self.state == DISABLED:
+            return 0
+        target = min(self.config['browsers'], len(self.account_pool.accounts))
+        return max(0, target - len(self._warm) - len(self._in_use) - len(self._warming))
+
+    def status(self) -> dict:
+        state = self.state
+        if state == READY and not (self._warm or self._in_use or self._warming):
+            state = DEPLETED
+        return {
+            "state": state,
+            "warm_browsers": self.capacity(),
+            "in_use": len(self._in_use),
+            "warming": len(self._warming),
+            "depleted": self.depleted(),
+            "prewarm_seconds": self.prewarm_seconds,
+            "error": self.error
+        }
+
+    async def stop(self):
+        tasks = list(self._warming.values()) + ([self._startup_task] if self._startup_task else [])
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        for scraper in self._warm.values():
+            try:
+                await scraper.close_browser()
+            except Exception as e:
+                logger.warning(f"Failed to close pre-warmed browser: {e}")
+        self._warm.clear()
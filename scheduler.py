@@ -0,0 +1,248 @@
+"""
+Watched keyword scheduler
+
+Re-crawls a set of watched keywords in the background, either every
+`interval_seconds` or on a 5-field cron expression ("*/30 8-20 * * 1-5").
+Each refresh passes the keyword's high-water mark (newest activity id seen so
+far) so only posts newer than the previous refresh are fetched.
+
+Runs are jittered and the first run of every keyword is spread over its
+interval, so a restart doesn't launch a browser per keyword at once.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from config import SCHEDULER_CONFIG, WATCHED_KEYWORDS
+
+logger = logging.getLogger(__name__)
+
+
+class CronSchedule:
+    """Minimal cron expression: minute hour day-of-month month day-of-week.
+
+    Supports `*`, numbers, ranges (`8-20`), lists (`1,15`) and steps (`*/5`,
+    `0-30/10`). Day of week is 0-6 with 0 = Sunday (7 is accepted as Sunday).
+    """
+
+    FIELDS = [(0, 59), (0, 23), (1, 31), (1, 12), (0, 7)]
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Cron expression needs 5 fields: {expression!r}")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, self.weekdays = [
+            self._parse_field(part, low, high) for part, (low, high) in zip(parts, self.FIELDS)
+        ]
+        self.weekdays = {d % 7 for d in self.weekdays}
+        self.any_day = parts[2] == "*"
+        self.any_weekday = parts[4] == "*"
+
+    @staticmethod
+    def _parse_field(field, low, high):
+        values = set()
+        for item in field.split(","):
+            step = None
+            if "/" in item:
+                item, step = item.split("/")
+                step = int(step)
+            if item == "*":
+                start, end = low, high
+            elif "-" in item:
+                start, end = (int(v) for v in item.split("-"))
+            else:
+                # "N/step" runs from N to the end of the range, like cron
+                start = int(item)
+                end = start if step is None else high
+            if step is None:
+                step = 1
+            values.update(range(start, end + 1, step))
+        if not values or min(values) < low or max(values) > high:
+            raise ValueError(f"Invalid cron field: {field!r}")
+        return values
+
+    def _day_matches(self, dt):
+        weekday = (dt.weekday() + 1) % 7  # cron counts from Sunday
+        if self.any_day and self.any_weekday:
+            return True
+        if self.any_day:
+            return weekday in self.weekdays
+        if self.any_weekday:
+            return dt.day in self.days
+        # Like cron: when both are restricted, either one matching is enough
+        return dt.day in self.days or weekday in self.weekdays
+
+    def next_after(self, after: datetime) -> datetime:
+        """First matching minute strictly after `after`"""
+        dt = after.replace(second=0, microsecond=0) + timedelta(minutes=1)
+        limit = dt + timedelta(days=366 * 4)
+        while dt < limit:
+            if dt.month not in self.months or not self._day_matches(dt):
+                dt = (dt + timedelta(days=1)).replace(hour=0, minute=0)
+            elif dt.hour not in self.hours:
+                dt = (dt + timedelta(hours=1)).replace(minute=0)
+            elif dt.minute not in self.minutes:
+                dt += timedelta(minutes=1)
+            else:
+                return dt
+        raise ValueError(f"Cron expression never fires: {self.expression!r}")
+
+
+class WatchedKeyword:
+    """Schedule and refresh bookkeeping for one watched keyword"""
+
+    def __init__(self, keyword, interval_seconds=None, cron=None, target_posts=50):
+        if not interval_seconds and not cron:
+            raise ValueError(f"Watched keyword {keyword!r} needs interval_seconds or cron")
+        if interval_seconds is not None and interval_seconds <= 0:
+            raise ValueError(f"interval_seconds of {keyword!r} must be positive, got {interval_seconds}")
+        self.keyword = keyword.lower().strip()
+        self.interval_seconds = interval_seconds
+        self.cron = CronSchedule(cron) if cron else None
+        self.target_posts = target_posts
+
+        self.high_water_mark: Optional[int] = None
+        self.next_run_at: Optional[float] = None  # epoch seconds
+        self.last_refresh_at: Optional[str] = None
+        self.last_latency_seconds: Optional[float] = None
+        self.last_status: Optional[str] = None
+        self.last_error: Optional[str] = None
+        self.last_new_posts: Optional[int] = None
+        self.refresh_count = 0
+        self.running = False
+
+    def schedule_next(self, config, first=False):
+        now = time.time()
+        if self.cron:
+            jitter = random.uniform(0, config['max_jitter_seconds'])
+            self.next_run_at = self.cron.next_after(datetime.fromtimestamp(now)).timestamp() + jitter
+        elif first:
+            # Spread the first runs over the interval instead of firing all at startup
+            self.next_run_at = now + random.uniform(0, self.interval_seconds)
+        else:
+            spread = min(self.interval_seconds * config['jitter_fraction'], config['max_jitter_seconds'])
+            self.next_run_at = now + self.interval_seconds + random.uniform(-spread, spread)
+
+    def to_dict(self) -> dict:
+        return {
+            "keyword": self.keyword,
+            "interval_seconds": self.interval_seconds,
+            "cron": self.cron.expression if self.cron else None,
+            "target_posts": self.target_posts,
+            "high_water_mark": self.high_water_mark,
+            "next_run_at": datetime.fromtimestamp(self.next_run_at).isoformat() if self.next_run_at else None,
+            "last_refresh_at": self.last_refresh_at,
+            "last_latency_seconds": self.last_latency_seconds,
+            "last_status": self.last_status,
+            "last_error": self.last_error,
+            "last_new_posts": self.last_new_posts,
+            "refresh_count": self.refresh_count,
+            "running": self.running
+        }
+
+
+# refresh(keyword, target_posts, since_activity_id) -> result dict of the scrape
+RefreshFn = Callable[[str, int, Optional[int]], Awaitable[dict]]
+
+
+class KeywordScheduler:
+    """Background loop refreshing watched keywords"""
+
+    def __init__(self, refresh: RefreshFn, watched: Optional[List[dict]] = None, config: Optional[dict] = None):
+        self.refresh = refresh
+        self.config = dict(SCHEDULER_CONFIG)
+        if config:
+            self.config.update(config)
+
+        self._semaphore = asyncio.Semaphore(self.config['max_concurrent_refreshes'])
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running = set()
+
+        self.watched: Dict[str, WatchedKeyword] = {}
+        for item in (WATCHED_KEYWORDS if watched is None else watched):
+            self.watch(**item)
+
+    def watch(self, keyword, interval_seconds=None, cron=None, target_posts=50) -> WatchedKeyword:
+        entry = WatchedKeyword(keyword, interval_seconds, cron, target_posts)
+        previous = self.watched.get(entry.keyword)
+        if previous:
+            entry.high_water_mark = previous.high_water_mark
+        entry.schedule_next(self.config, first=True)
+        self.watched[entry.keyword] = entry
+        self._wakeup.set()
+        return entry
+
+    def unwatch(self, keyword) -> bool:
+        removed = self.watched.pop(keyword.lower().strip(), None) is not None
+        self._wakeup.set()
+        return removed
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+            logger.info(f"Scheduler started with {len(self.watched)} watched keywords")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            for task in list(self._running):
+                task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            self._wakeup.clear()
+            now = time.time()
+            for entry in list(self.watched.values()):
+                if not entry.running and entry.next_run_at <= now:
+                    entry.running = True
+                    task = asyncio.create_task(self._refresh_keyword(entry))
+                    self._running.add(task)
+                    task.add_done_callback(self._running.discard)
+
+            upcoming = [e.next_run_at for e in self.watched.values() if not e.running]
+            sleep_for = max(0.5, min(upcoming) - now) if upcoming else 60
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=sleep_for)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _refresh_keyword(self, entry: WatchedKeyword):
+        try:
+            async with self._semaphore:
+                started = time.monotonic()
+                logger.info(f"Scheduled refresh of {entry.keyword} (since {entry.high_water_mark})")
+                try:
+                    result = await self.refresh(entry.keyword, entry.target_posts, entry.high_water_mark)
+                    if result.get("high_water_mark"):
+                        entry.high_water_mark = result["high_water_mark"]
+                    entry.last_new_posts = result.get("total_posts", 0)
+                    entry.last_status = "completed"
+                    entry.last_error = None
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    logger.error(f"Scheduled refresh of {entry.keyword} failed: {e}")
+                    entry.last_status = "failed"
+                    entry.last_error = str(e)
+
+                entry.last_latency_seconds = round(time.monotonic() - started, 2)
+                entry.last_refresh_at = datetime.now().isoformat()
+                entry.refresh_count += 1
+        finally:
+            entry.running = False
+            entry.schedule_next(self.config)
+            self._wakeup.set()
+
+    def status(self) -> List[dict]:
+        return [entry.to_dict() for entry in self.watched.values()]
@@ -0,0 +1,213 @@
+"""
+Full-text search over collected posts
+
+Posts (URL, text) are stored in SQLite with an FTS5 index kept in sync by
+triggers, so every ingest updates the index incrementally. Queries are ranked
+with BM25 and return highlighted snippets. A post can be collected for several
+keywords: `post_keywords` records every (post, keyword, day) it was collected
+on, and the keyword filter and the export partitions are read from it.
+
+Free-text queries ("remote MLOps pytorch") match posts containing any of the
+words, best matches first; use mode="all" to require every word. Queries that
+already use FTS5 syntax (quotes, AND/OR/NOT, NEAR, prefix*) are passed through.
+
+In queue mode workers write the posts they collect to their own
+SEARCH_CONFIG['db_path']; point it at the same file as the API's (one machine
+or a shared volume) for GET /search and the export to see them.
+"""
+
+import re
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+from config import SEARCH_CONFIG
+
+FTS_SYNTAX_RE = re.compile(r'"|\*|\b(AND|OR|NOT|NEAR)\b')
+WORD_RE = re.compile(r'\w+', re.UNICODE)
+
+
+class PostIndex:
+    """SQLite post store with an FTS5 (BM25) index"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS posts (
+            id INTEGER PRIMARY KEY,
+            url TEXT NOT NULL UNIQUE,
+            activity_id INTEGER,
+            text TEXT NOT NULL DEFAULT '',
+            collected_at TEXT NOT NULL
+        );
+
+        -- One row per keyword and day a post was collected on; collected_at is the latest time that day.
+        -- seq is renumbered on every write, in commit order (see add_posts)
+        CREATE TABLE IF NOT EXISTS post_keywords (
+            post_id INTEGER NOT NULL REFERENCES posts (id) ON DELETE CASCADE,
+            keyword TEXT NOT NULL,
+            day TEXT NOT NULL,
+            collected_at TEXT NOT NULL,
+            seq INTEGER NOT NULL,
+            PRIMARY KEY (post_id, keyword, day)
+        ) WITHOUT ROWID;
+        CREATE INDEX IF NOT EXISTS idx_post_keywords_keyword ON post_keywords (keyword, day);
+        CREATE INDEX IF NOT EXISTS idx_post_keywords_seq ON post_keywords (seq);
+
+        CREATE VIRTUAL TABLE IF NOT EXISTS posts_fts USING fts5(
+            text, content='posts', content_rowid='id', tokenize='porter unicode61'
+        );
+
+        CREATE TRIGGER IF NOT EXISTS posts_ai AFTER INSERT ON posts BEGIN
+            INSERT INTO posts_fts (rowid, text) VALUES (new.id, new.text);
+        END;
+        CREATE TRIGGER IF NOT EXISTS posts_ad AFTER DELETE ON posts BEGIN
+            INSERT INTO posts_fts (posts_fts, rowid, text) VALUES ('delete', old.id, old.text);
+        END;
+        -- Re-collections only move collected_at; reindex when the text changed
+        CREATE TRIGGER IF NOT EXISTS posts_au AFTER UPDATE OF text ON posts BEGIN
+            INSERT INTO posts_fts (posts_fts, rowid, text) VALUES ('delete', old.id, old.text);
+            INSERT INTO posts_fts (rowid, text) VALUES (new.id, new.text);
+        END;
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA foreign_keys=ON")
+        return conn
+
+    def add_posts(self, posts: Iterable[dict]) -> int:
+        """Insert or update posts (dicts with url, keyword, text and optionally
+        activity_id/collected_at). Returns the number of rows written."""
+        now = datetime.now().isoformat()
+        rows = [
+            (p['url'], p.get('activity_id'), p.get('text') or '', p.get('collected_at') or now,
+             p['keyword'].lower().strip())
+            for p in posts
+        ]
+        if not rows:
+            return 0
+        with self._connect() as conn:
+            # Keep the existing text when a re-scrape didn't capture any
+            conn.executemany(
+                "INSERT INTO posts (url, activity_id, text, collected_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(url) DO UPDATE SET "
+                "text = CASE WHEN excluded.text != '' THEN excluded.text ELSE posts.text END, "
+                "collected_at = excluded.collected_at",
+                [row[:4] for row in rows]
+            )
+            # seq is taken inside the write transaction, which holds SQLite's single write
+            # lock until commit: rows committed later always get a higher seq, unlike
+            # collected_at, which the caller computes before its write gets the lock
+            conn.executemany(
+                "INSERT INTO post_keywords (post_id, keyword, day, collected_at, seq) "
+                "SELECT id, ?, substr(?, 1, 10), ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM post_keywords) "
+                "FROM posts WHERE url = ? "
+                "ON CONFLICT(post_id, keyword, day) DO UPDATE SET "
+                "collected_at = excluded.collected_at, seq = excluded.seq",
+                [(keyword, collected_at, collected_at, url) for url, _, _, collected_at, keyword in rows]
+            )
+        return len(rows)
+
+    @staticmethod
+    def build_query(query: str, mode: str = "any") -> Optional[str]:
+        """Turn user input into an FTS5 MATCH expression"""
+        if FTS_SYNTAX_RE.search(query):
+            return query
+        words = WORD_RE.findall(query)
+        if not words:
+            return None
+        joiner = " OR " if mode == "any" else " "
+        return joiner.join(f'"{word}"' for word in words)
+
+    def search(self, query: str, page: int = 1, page_size: int = 20,
+               keyword: Optional[str] = None, mode: str = "any") -> dict:
+        """One page of posts matching `query`, best first. Raises ValueError for invalid FTS syntax"""
+        match = self.build_query(query, mode)
+        if match is None:
+            return {"query": query, "total": 0, "page": page, "page_size": page_size, "results": []}
+        where = "posts_fts MATCH ?"
+        params = [match]
+        if keyword:
+            where += " AND rowid IN (SELECT post_id FROM post_keywords WHERE keyword = ?)"
+            params.append(keyword.lower().strip())
+
+        try:
+            with self._connect() as conn:
+                total = conn.execute(f"SELECT COUNT(*) FROM posts_fts WHERE {where}", params).fetchone()[0]
+                # Rank inside FTS first, then join only the rows of this page
+                rows = conn.execute(
+                    "SELECT posts.id, posts.url, posts.collected_at, hits.snippet, hits.score FROM ("
+                    "    SELECT rowid, snippet(posts_fts, 0, '<mark>', '</mark>', '…', 24) AS snippet,"
+                    "           bm25(posts_fts) AS score"
+                    f"    FROM posts_fts WHERE {where} ORDER BY score LIMIT ? OFFSET ?"
+                    ") AS hits JOIN posts ON posts.id = hits.rowid ORDER BY hits.score",
+                    params + [page_size, (page - 1) * page_size]
+                ).fetchall()
+                keywords = {row["id"]: [] for row in rows}
+                for row in conn.execute(
+                    f"SELECT DISTINCT post_id, keyword FROM post_keywords "
+                    f"WHERE post_id IN ({', '.join('?' * len(keywords))}) ORDER BY keyword",
+                    list(keywords)
+                ):
+                    keywords[row["post_id"]].append(row["keyword"])
+        except sqlite3.OperationalError as e:
+            raise ValueError(f"Invalid search query: {e}")
+
+        return {
+            "query": query,
+            "total": total,
+            "page": page,
+            "page_size": page_size,
+            # bm25() is lower-is-better; flip it so higher means more relevant
+            "results": [
+                {"url": row["url"], "keywords": keywords[row["id"]], "collected_at": row["collected_at"],
+                 "snippet": row["snippet"], "score": round(-row["score"], 4)}
+                for row in rows
+            ]
+        }
+
+    def latest_seq(self) -> int:
+        """seq of the last committed post_keywords write, 0 for an empty store"""
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM post_keywords").fetchone()[0]
+
+    def partitions_since(self, seq: int = 0) -> List[tuple]:
+        """(keyword, date) pairs written to after `seq` (see latest_seq)"""
+        with self._connect() as conn:
+            return [tuple(row) for row in conn.execute(
+                "SELECT DISTINCT keyword, day FROM post_keywords WHERE seq > ?", (seq,)
+            )]
+
+    def partition_rows(self, keyword: str, date: str) -> List[sqlite3.Row]:
+        """All posts collected for `keyword` on `date` (YYYY-MM-DD)"""
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT posts.url, posts.activity_id, post_keywords.collected_at, posts.text "
+                "FROM post_keywords JOIN posts ON posts.id = post_keywords.post_id "
+                "WHERE post_keywords.keyword = ? AND post_keywords.day = ? ORDER BY posts.id",
+                (keyword, date)
+            ).fetchall()
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return conn.execute("SELECT COUNT(*) FROM posts").fetchone()[0]
+
+
+_index: Optional[PostIndex] = None
+_index_lock = threading.Lock()
+
+
+def get_post_index() -> PostIndex:
+    """Process-wide PostIndex on SEARCH_CONFIG['db_path']"""
+    global _index
+    with _index_lock:
+        if _index is None:
+            _index = PostIndex(SEARCH_CONFIG['db_path'])
+        return _index
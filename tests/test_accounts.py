@@ -0,0 +1,153 @@
+import asyncio
+
+import pytest
+
+from accounts import AccountPool, CircuitBreaker
+from config import ACCOUNT_POOL_CONFIG
+
+BREAKER_CONFIG = dict(ACCOUNT_POOL_CONFIG, breaker_threshold=2, breaker_window_seconds=60,
+                      breaker_cooldown_seconds=100, breaker_max_cooldown_seconds=250)
+
+
+def _pool(tmp_path, emails=("a@example.com", "b@example.com"), **config):
+    config = dict({'cooldown_seconds': 0, 'session_dir': str(tmp_path)}, **config)
+    return AccountPool([{'email': email, 'password': 'pw'} for email in emails], config)
+
+
+def _open_breaker():
+    breaker = CircuitBreaker(BREAKER_CONFIG)
+    breaker.record(0, success=False, blocked=True)
+    breaker.record(1, success=False, blocked=True)
+    return breaker
+
+
+def test_breaker_opens_after_threshold_blocks():
+    breaker = CircuitBreaker(BREAKER_CONFIG)
+    breaker.record(0, success=False, blocked=True)
+    assert breaker.allows(1)
+    breaker.record(1, success=False, blocked=True)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert not breaker.allows(50)
+
+
+def test_breaker_forgets_blocks_outside_its_window():
+    breaker = CircuitBreaker(BREAKER_CONFIG)
+    breaker.record(0, success=False, blocked=True)
+    breaker.record(61, success=False, blocked=True)
+    assert breaker.state == CircuitBreaker.CLOSED
+
+
+def test_half_open_lets_one_trial_job_through():
+    breaker = _open_breaker()
+    assert breaker.allows(101)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    breaker.trial_account = "a"
+    assert not breaker.allows(102)
+
+
+def test_successful_trial_closes_the_breaker():
+    breaker = _open_breaker()
+    breaker.allows(101)
+    breaker.trial_account = "a"
+    breaker.record(110, success=True, blocked=False, trial=True)
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.trips == 0
+    assert breaker.allows(111)
+
+
+def test_blocked_trial_reopens_with_a_doubled_pause():
+    breaker = _open_breaker()
+    breaker.allows(101)
+    breaker.trial_account = "a"
+    breaker.record(110, success=False, blocked=True, trial=True)
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.open_until == 110 + 200
+    assert breaker.trial_account is None
+
+    breaker.allows(310)
+    breaker.record(320, success=False, blocked=True, trial=True)
+    assert breaker.open_until == 320 + 250  # capped
+
+
+def test_failed_trial_without_block_keeps_half_open():
+    breaker = _open_breaker()
+    breaker.allows(101)
+    breaker.trial_account = "a"
+    breaker.record(110, success=False, blocked=False, trial=True)
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.allows(111)
+
+
+def test_pool_hands_out_least_recently_used_account(tmp_path):
+    async def scenario():
+        pool = _pool(tmp_path)
+        first = await pool.acquire(timeout=1)
+        second = await pool.acquire(timeout=1)
+        assert {first.email, second.email} == {"a@example.com", "b@example.com"}
+        await pool.release(second)
+        await pool.release(first)
+        assert (await pool.acquire(timeout=1)) is second
+
+    asyncio.run(scenario())
+
+
+def test_pool_waits_for_a_release(tmp_path):
+    async def scenario():
+        pool = _pool(tmp_path, emails=("a@example.com",))
+        account = await pool.acquire(timeout=1)
+        with pytest.raises(TimeoutError):
+            await pool.acquire(timeout=0.05)
+
+        waiter = asyncio.create_task(pool.acquire(timeout=1))
+        await asyncio.sleep(0)
+        await pool.release(account)
+        assert (await waiter) is account
+
+    asyncio.run(scenario())
+
+
+def test_pool_keeps_the_per_account_budget(tmp_path):
+    async def scenario():
+        pool = _pool(tmp_path, emails=("a@example.com",), max_jobs_per_window=2)
+        for _ in range(2):
+            await pool.release(await pool.acquire(timeout=1))
+        assert pool.available_count() == 0
+        with pytest.raises(TimeoutError):
+            await pool.acquire(timeout=0.05)
+        assert pool.status()[0]["jobs_in_window"] == 2
+
+    asyncio.run(scenario())
+
+
+def test_challenged_account_is_drained(tmp_path):
+    async def scenario():
+        pool = _pool(tmp_path)
+        account = await pool.acquire(timeout=1)
+        await pool.release(account, success=False, challenged=True)
+
+        status = {a["email"]: a for a in pool.status()}[account.email]
+        assert status["drained"]
+        assert status["challenge_strikes"] == 1
+        assert status["failed_jobs"] == 1
+        # Only the other account is handed out meanwhile
+        assert (await pool.acquire(timeout=1)) is not account
+
+    asyncio.run(scenario())
+
+
+def test_pool_pauses_while_breaker_is_open(tmp_path):
+    async def scenario():
+        pool = _pool(tmp_path, breaker_threshold=1)
+        account = await pool.acquire(timeout=1)
+        await pool.release(account, success=False, challenged=True)
+        assert pool.paused()
+        assert pool.summary()["circuit_breaker"]["state"] == CircuitBreaker.OPEN
+        with pytest.raises(TimeoutError):
+            await pool.acquire(timeout=0.05)
+
+    asyncio.run(scenario())
+
+
+def test_pool_needs_an_account(tmp_path):
+    with pytest.raises(ValueError):
+        _pool(tmp_path, emails=())
@@ -0,0 +1,124 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+from config import TRACE_CONFIG
+from work_queue import SQLiteWorkQueue
+
+
+@pytest.fixture
+def api(tmp_path, monkeypatch):
+    """The API in queue mode on a SQLite queue; tests play the worker"""
+    queue = SQLiteWorkQueue(str(tmp_path / "queue.db"))
+    monkeypatch.setattr(main, "job_queue", queue)
+    monkeypatch.setattr(main, "scraping_results", {})
+    monkeypatch.setattr(main, "scraping_status", {})
+    monkeypatch.setattr(main, "result_cache", main.ResultCache())
+    monkeypatch.setattr(main, "dashboard_stats", main.DashboardStats())
+    monkeypatch.setattr(main, "queue_events", {"seq": 0})
+    monkeypatch.setattr(main, "unread_jobs", main.deque())
+    monkeypatch.setattr(main, "queue_sync_lock", main.asyncio.Lock())
+    return TestClient(main.app), queue
+
+
+def _url(activity_id):
+    return f"https://www.linkedin.com/feed/update/urn:li:activity:{activity_id}/"
+
+
+def _run_job(queue, keyword, links):
+    job = queue.claim("w1", lease_seconds=60)
+    assert job["keyword"] == keyword
+    queue.complete(job["id"], "w1", {
+        "success": True, "links": links, "total_posts": len(links),
+        "timestamp": job["created_at"], "keyword": keyword
+    })
+    return job["id"]
+
+
+def test_deleted_results_stay_deleted(api):
+    client, queue = api
+    assert client.post("/scrape", json={"input_keyword": "aiml"}).json()["status"] == "in_progress"
+    _run_job(queue, "aiml", [_url(7364323447457402881)])
+    assert client.get("/results/aiml").json()["total_posts"] == 1
+
+    client.delete("/results/aiml")
+    assert client.get("/results/aiml").status_code == 404
+    assert client.get("/status/aiml").json()["status"] == "not_found"
+    assert client.get("/results").json()["total_keywords"] == 0
+
+    # Not served from the cache either: a new scrape is started
+    response = client.post("/scrape", json={"input_keyword": "aiml"}).json()
+    assert response["status"] == "in_progress"
+    assert not response.get("cached")
+    _run_job(queue, "aiml", [])
+    assert client.get("/results/aiml").json()["total_posts"] == 0
+
+
+def test_every_finished_job_is_counted_and_merged(api):
+    client, queue = api
+    client.post("/scrape", json={"input_keyword": "aiml", "target_posts": 10})
+    _run_job(queue, "aiml", [_url(7364323447457402881)])
+    assert client.get("/results/aiml").json()["total_posts"] == 1
+
+    # A scheduled refresh and a user scrape of the same keyword finish between two syncs
+    refresh = queue.enqueue("aiml", {"input_keyword": "aiml", "target_posts": 10, "refresh": True,
+                                     "since_activity_id": 7364323447457402881})
+    main.dashboard_stats.job_started(refresh, "aiml")
+    client.post("/scrape", json={"input_keyword": "aiml", "target_posts": 20})
+    _run_job(queue, "aiml", [_url(7364323447457402882)])
+
+    # The refresh is merged even though a newer job of the keyword exists
+    result = client.get("/results/aiml").json()
+    assert result["links"] == [_url(7364323447457402882), _url(7364323447457402881)]
+    assert client.get("/status/aiml").json()["status"] == "in_progress"
+
+    _run_job(queue, "aiml", [_url(7364323447457402883)])
+    totals = client.get("/dashboard/summary").json()["totals"]
+    assert totals["jobs_started"] == 3
+    assert totals["finished_jobs"] == 3
+    assert totals["active_jobs"] == 0
+    assert client.get("/results/aiml").json()["links"] == [_url(7364323447457402883)]
+
+
+def test_summary_does_not_read_results(api, monkeypatch):
+    client, queue = api
+    client.post("/scrape", json={"input_keyword": "aiml"})
+    _run_job(queue, "aiml", [_url(7364323447457402881)])
+
+    def no_results(*args):
+        raise AssertionError("summary read a job")
+    monkeypatch.setattr(queue, "get", no_results)
+    monkeypatch.setattr(queue, "latest_by_keyword", no_results)
+    summary = client.get("/dashboard/summary").json()
+    assert summary["totals"]["completed"] == 1
+    assert summary["keywords"]["aiml"]["posts_collected"] == 1
+
+
+def test_trace_of_a_job_run_on_another_host(api, tmp_path, monkeypatch):
+    client, queue = api
+    monkeypatch.setitem(TRACE_CONFIG, "trace_dir", str(tmp_path / "traces"))
+    job_id = client.post("/scrape", json={"input_keyword": "aiml", "trace": "profile"}).json()["job_id"]
+    response = client.get(f"/jobs/{job_id}/trace")
+    assert response.status_code == 409
+    assert "queued" in response.json()["detail"]
+
+    job = queue.claim("w1", lease_seconds=60)
+    queue.complete(job_id, "w1", {
+        "success": True, "links": [], "total_posts": 0, "timestamp": job["created_at"], "keyword": "aiml",
+        "trace_file": f"traces/{job_id}.prof", "trace_host": "worker-7"
+    })
+    response = client.get(f"/jobs/{job_id}/trace")
+    assert response.status_code == 409
+    assert "worker-7" in response.json()["detail"]
+
+    # Served when the worker shares the API's machine
+    (tmp_path / "traces").mkdir()
+    (tmp_path / "traces" / f"{job_id}.prof").write_bytes(b"profile")
+    assert client.get(f"/jobs/{job_id}/trace").content == b"profile"
+
+
+def test_no_trace_for_untraced_job(api):
+    client, _ = api
+    job_id = client.post("/scrape", json={"input_keyword": "aiml"}).json()["job_id"]
+    assert client.get(f"/jobs/{job_id}/trace").status_code == 404
+    assert client.get("/jobs/unknown/trace").status_code == 404
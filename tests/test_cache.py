@@ -0,0 +1,81 @@
+import pytest
+
+import cache
+from cache import FRESH, MISS, STALE, ResultCache
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = {"t": 1_000.0}
+    monkeypatch.setattr(cache.time, "time", lambda: now["t"])
+    return now
+
+
+def test_fresh_then_stale_then_miss(clock):
+    results = ResultCache(ttl_seconds=60, stale_ttl_seconds=30, max_entries=10)
+    results.set(("aiml", 50), {"links": []})
+
+    clock["t"] += 60
+    assert results.get(("aiml", 50)) == ({"links": []}, FRESH)
+    clock["t"] += 1
+    assert results.get(("aiml", 50)) == ({"links": []}, STALE)
+    clock["t"] += 29
+    assert results.get(("aiml", 50))[1] == STALE
+    clock["t"] += 1
+    assert results.get(("aiml", 50)) == (None, MISS)
+    assert results.stats()["entries"] == 0  # expired entries are evicted on read
+
+
+def test_counts_hits_stale_hits_and_misses(clock):
+    results = ResultCache(ttl_seconds=60, stale_ttl_seconds=30, max_entries=10)
+    results.get(("aiml", 50))
+    results.set(("aiml", 50), "v")
+    results.get(("aiml", 50))
+    clock["t"] += 70
+    results.get(("aiml", 50))
+    stats = results.stats()
+    assert (stats["hits"], stats["stale_hits"], stats["misses"]) == (1, 1, 1)
+
+
+def test_older_result_never_replaces_newer(clock):
+    results = ResultCache(ttl_seconds=60, stale_ttl_seconds=30, max_entries=10)
+    results.set(("aiml", 50), "new", stored_at=clock["t"])
+    results.set(("aiml", 50), "old", stored_at=clock["t"] - 10)
+    assert results.get(("aiml", 50))[0] == "new"
+
+
+def test_stored_at_sets_the_age(clock):
+    results = ResultCache(ttl_seconds=60, stale_ttl_seconds=30, max_entries=10)
+    results.set(("aiml", 50), "v", stored_at=clock["t"] - 75)
+    assert results.get(("aiml", 50)) == ("v", STALE)
+
+
+def test_evicts_least_recently_used(clock):
+    results = ResultCache(ttl_seconds=60, stale_ttl_seconds=30, max_entries=2)
+    results.set(("a", 1), 1)
+    results.set(("b", 1), 2)
+    results.get(("a", 1))  # "b" is now the least recently used
+    results.set(("c", 1), 3)
+    assert results.get(("b", 1)) == (None, MISS)
+    assert results.get(("a", 1))[0] == 1
+    assert results.get(("c", 1))[0] == 3
+
+
+def test_one_background_refresh_per_key():
+    results = ResultCache(ttl_seconds=60, stale_ttl_seconds=30, max_entries=10)
+    assert results.begin_refresh(("aiml", 50))
+    assert not results.begin_refresh(("aiml", 50))
+    assert results.begin_refresh(("aiml", 100))
+    results.end_refresh(("aiml", 50))
+    assert results.begin_refresh(("aiml", 50))
+
+
+def test_invalidate_drops_every_entry_of_the_keyword(clock):
+    results = ResultCache(ttl_seconds=60, stale_ttl_seconds=30, max_entries=10)
+    results.set(("aiml", 50), 1)
+    results.set(("aiml", 100), 2)
+    results.set(("data", 50), 3)
+    results.invalidate("aiml")
+    assert results.get(("aiml", 50))[1] == MISS
+    assert results.get(("aiml", 100))[1] == MISS
+    assert results.get(("data", 50))[1] == FRESH
@@ -0,0 +1,84 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from challenge import (CHALLENGE, LOGGED_OUT, RATE_LIMITED, ChallengeDetected, RateLimited, check_page,
+                       classify_page, detect_block)
+
+
+class FakePage:
+    """Page whose PAGE_FACTS_JS answer is given: `selectors` are the ones that match"""
+
+    def __init__(self, path="/feed/", text="", selectors=()):
+        self.url = f"https://www.linkedin.com{path}"
+        self.path = path
+        self.text = text.lower()
+        self.selectors = set(selectors)
+
+    def _matches(self, selector_list):
+        return any(s.strip() in self.selectors for s in selector_list.split(","))
+
+    async def evaluate(self, js, arg):
+        challenge_selector, login_form_selector, content_selector = arg
+        content = self._matches(content_selector)
+        return {"path": self.path, "challenge": self._matches(challenge_selector),
+                "loginForm": self._matches(login_form_selector), "content": content,
+                "text": "" if content else self.text}
+
+
+def detect(page, **kwargs):
+    return asyncio.run(detect_block(page, **kwargs))
+
+
+def test_normal_page():
+    assert detect(FakePage(selectors=[".feed-shared-update-v2"])) is None
+
+
+def test_post_quoting_a_rate_limit_message_is_not_a_block():
+    page = FakePage("/search/results/content/", text="Hiring! We got too many requests for this role",
+                    selectors=[".feed-shared-update-v2"])
+    assert detect(page) is None
+
+
+def test_ready_element_rules_out_rate_limit_text():
+    page = FakePage(text="You've reached the weekly limit of invitations", selectors=[".search-results-container"])
+    assert detect(page, ready_selector=".search-results-container") is None
+    # Without it the same page is taken for a rate-limit page
+    assert isinstance(detect(page), RateLimited)
+
+
+def test_rate_limit_page():
+    blocked = detect(FakePage("/search/results/content/", text="Too many requests. Try again later"))
+    assert isinstance(blocked, RateLimited)
+    assert blocked.kind == RATE_LIMITED
+
+
+def test_rate_limit_status():
+    blocked = detect(FakePage(), response=SimpleNamespace(status=999))
+    assert isinstance(blocked, RateLimited)
+
+
+def test_challenge_page():
+    assert isinstance(detect(FakePage("/checkpoint/challenge/abc")), ChallengeDetected)
+    # A captcha inside a page that also shows posts is still a challenge
+    assert isinstance(detect(FakePage(selectors=["#captcha-internal", ".feed-shared-update-v2"])), ChallengeDetected)
+
+
+def test_login_page():
+    assert detect(FakePage("/login", selectors=["form.login__form"])).kind == LOGGED_OUT
+    assert detect(FakePage("/login", selectors=["form.login__form"]), allow_login=True) is None
+
+
+def test_check_page_raises():
+    with pytest.raises(ChallengeDetected):
+        asyncio.run(check_page(FakePage("/captcha/")))
+
+
+def test_classify_page():
+    facts = {"path": "/feed/", "challenge": False, "loginForm": False, "content": False, "text": ""}
+    assert classify_page(facts) is None
+    assert classify_page(dict(facts, path="/checkpoint/rp/123")) == CHALLENGE
+    assert classify_page(dict(facts, text="you've reached the commercial use limit")) == RATE_LIMITED
+    assert classify_page(dict(facts, content=True, text="too many requests")) is None
+    assert classify_page(dict(facts, path="/authwall")) == LOGGED_OUT
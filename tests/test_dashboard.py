@@ -0,0 +1,74 @@
+from datetime import date
+
+from dashboard import DashboardStats
+from work_queue import COMPLETED, EXPIRED, FAILED
+
+
+def test_counts_started_and_finished_jobs():
+    stats = DashboardStats(days=7, recent_activity=10)
+    stats.job_started("j1", "aiml")
+    stats.job_started("j2", "aiml")
+    assert stats.summary()["totals"]["active_jobs"] == 2
+
+    stats.job_finished("j1", "aiml", COMPLETED, posts=5, duration_seconds=10)
+    stats.job_finished("j2", "aiml", FAILED, duration_seconds=20, error="boom")
+    summary = stats.summary()
+    assert summary["totals"]["jobs_started"] == 2
+    assert summary["totals"]["active_jobs"] == 0
+    assert summary["totals"]["finished_jobs"] == 2
+    assert summary["success_rate"] == 0.5
+    assert summary["failure_rate"] == 0.5
+    assert summary["average_duration_seconds"] == 15
+    keyword = summary["keywords"]["aiml"]
+    assert (keyword["jobs"], keyword[COMPLETED], keyword[FAILED]) == (2, 1, 1)
+    assert keyword["posts_collected"] == 5
+    assert keyword["last_status"] == FAILED
+    assert summary["posts_per_day"] == {date.today().isoformat(): 5}
+
+
+def test_job_counts_once():
+    stats = DashboardStats(days=7, recent_activity=10)
+    stats.job_started("j1", "aiml")
+    stats.job_finished("j1", "aiml", COMPLETED, posts=5)
+    stats.job_finished("j1", "aiml", COMPLETED, posts=5)
+    stats.job_started("j1", "aiml")
+    totals = stats.summary()["totals"]
+    assert (totals["jobs_started"], totals["finished_jobs"], totals["active_jobs"]) == (1, 1, 0)
+
+
+def test_job_never_seen_starting_still_counts_as_started():
+    # Enqueued by another API process
+    stats = DashboardStats(days=7, recent_activity=10)
+    stats.job_finished("j1", "aiml", EXPIRED)
+    totals = stats.summary()["totals"]
+    assert (totals["jobs_started"], totals[EXPIRED]) == (1, 1)
+
+
+def test_results_shown_and_deleted():
+    stats = DashboardStats(days=7, recent_activity=10)
+    stats.result_shown("aiml", 5)
+    stats.result_shown("data", 3)
+    stats.result_shown("aiml", 8)  # a refresh replaced the result
+    totals = stats.summary()["totals"]
+    assert (totals["keywords_with_results"], totals["posts_in_results"]) == (2, 11)
+
+    stats.results_deleted("aiml")
+    stats.results_deleted("aiml")
+    totals = stats.summary()["totals"]
+    assert (totals["keywords_with_results"], totals["posts_in_results"]) == (1, 3)
+    assert stats.summary()["keywords"]["aiml"]["latest_posts"] is None
+
+
+def test_recent_activity_is_bounded_and_newest_first():
+    stats = DashboardStats(days=7, recent_activity=3)
+    for i in range(5):
+        stats.job_started(f"j{i}", "aiml")
+    recent = stats.summary()["recent_activity"]
+    assert [event["job_id"] for event in recent] == ["j4", "j3", "j2"]
+    assert all(event["event"] == "started" for event in recent)
+
+
+def test_no_rates_before_any_job_finished():
+    summary = DashboardStats(days=7, recent_activity=10).summary()
+    assert summary["success_rate"] is None
+    assert summary["average_duration_seconds"] is None
@@ -0,0 +1,117 @@
+import asyncio
+
+import pytest
+
+from job_control import CANCELLED, EXPIRED, JobControl, JobStopped, absorb_cancel
+
+
+def test_cancel_wakes_sleep_right_away():
+    async def scenario():
+        control = JobControl(60, grace_seconds=5)
+        asyncio.get_running_loop().call_later(0.01, control.cancel)
+        started = asyncio.get_running_loop().time()
+        await control.sleep(30)
+        assert asyncio.get_running_loop().time() - started < 1
+        assert control.stop_requested()
+        assert control.stop_reason == CANCELLED
+        control.close()
+
+    asyncio.run(scenario())
+
+
+def test_first_stop_reason_wins():
+    async def scenario():
+        control = JobControl(60, grace_seconds=5)
+        control.cancel()
+        control.cancel(EXPIRED)
+        assert control.stop_reason == CANCELLED
+        control.close()
+
+    asyncio.run(scenario())
+
+
+def test_soft_stop_before_the_deadline():
+    async def scenario():
+        control = JobControl(0.4, grace_seconds=10)  # grace capped at a quarter of the deadline
+        assert control.grace_seconds == pytest.approx(0.1)
+        await asyncio.sleep(0.35)
+        assert control.stop_reason == EXPIRED
+        control.close()
+
+    asyncio.run(scenario())
+
+
+def test_run_returns_the_result():
+    async def scenario():
+        control = JobControl(60, grace_seconds=5)
+        assert await control.run(asyncio.sleep(0, result="done")) == "done"
+        control.close()
+
+    asyncio.run(scenario())
+
+
+def test_run_abandons_the_awaitable_on_stop():
+    async def scenario():
+        control = JobControl(60, grace_seconds=5)
+        waiting = asyncio.create_task(control.run(asyncio.sleep(30)))
+        await asyncio.sleep(0.01)
+        control.cancel()
+        with pytest.raises(JobStopped) as stopped:
+            await waiting
+        assert stopped.value.reason == CANCELLED
+        control.close()
+
+    asyncio.run(scenario())
+
+
+def test_stuck_task_is_cancelled_after_the_grace_period():
+    async def stuck(control):
+        try:
+            await asyncio.sleep(30)  # ignores stop_requested()
+        except asyncio.CancelledError:
+            if not absorb_cancel(control):
+                raise
+            return "partial"
+
+    async def scenario():
+        control = JobControl(60, grace_seconds=0.05)
+        task = asyncio.create_task(stuck(control))
+        control.attach(task)
+        await asyncio.sleep(0)
+        control.cancel()
+        assert await task == "partial"
+        control.close()
+
+    asyncio.run(scenario())
+
+
+def test_detached_task_is_not_cancelled():
+    async def scenario():
+        control = JobControl(60, grace_seconds=0.01)
+        task = asyncio.create_task(asyncio.sleep(0.1, result="stored"))
+        control.attach(task)
+        control.detach()
+        control.cancel()
+        assert await task == "stored"
+        control.close()
+
+    asyncio.run(scenario())
+
+
+def test_foreign_cancellation_is_not_absorbed():
+    assert not absorb_cancel(None)
+
+    async def scenario():
+        control = JobControl(60, grace_seconds=5)
+        assert not absorb_cancel(control)
+        control.close()
+
+    asyncio.run(scenario())
+
+
+def test_negative_deadline_is_rejected():
+    async def scenario():
+        with pytest.raises(ValueError):
+            JobControl(-1)
+
+    asyncio.run(scenario())
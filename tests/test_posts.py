@@ -0,0 +1,66 @@
+import pytest
+
+from posts import ACTIVITY, SHARE, UGC_POST, PostBatch, PostRecord, canonical_url, parse_post
+
+ID = 7364323447457402881
+CANONICAL = f"https://www.linkedin.com/feed/update/urn:li:activity:{ID}/"
+
+
+@pytest.mark.parametrize("href", [
+    f"/posts/jane-doe_hiring-activity-{ID}-AbCd?utm_source=share",
+    f"/feed/update/urn:li:activity:{ID}/",
+    f"https://www.linkedin.com/feed/update/urn%3Ali%3Aactivity%3A{ID}?trk=public_post",
+    f"https://www.linkedin.com/feed/update/urn%3aLi%3aactivity%3a{ID}",
+])
+def test_every_link_shape_has_one_canonical_url(href):
+    assert canonical_url(href) == CANONICAL
+
+
+def test_urn_kind_is_kept():
+    assert parse_post(f"/feed/update/urn:li:ugcPost:{ID}/").kind == UGC_POST
+    assert canonical_url(f"urn:li:share:{ID}") == f"https://www.linkedin.com/feed/update/urn:li:share:{ID}/"
+
+
+@pytest.mark.parametrize("href", [None, "", "/feed/", "/posts/jane-doe_activity-2024-recap"])
+def test_hrefs_without_a_post(href):
+    assert parse_post(href) is None
+    assert canonical_url(href) is None
+
+
+def test_records_are_equal_by_id():
+    assert PostRecord(ID, ACTIVITY) == PostRecord(ID, SHARE)
+    assert len({PostRecord(ID, ACTIVITY), PostRecord(ID, UGC_POST)}) == 1
+
+
+def test_batch_keeps_insertion_order_without_duplicates():
+    batch = PostBatch()
+    assert batch.add(PostRecord(3))
+    assert batch.add(PostRecord(1))
+    assert not batch.add(PostRecord(3, SHARE))  # same ID, other kind
+    assert batch.add(PostRecord(2, UGC_POST))
+    assert [post.activity_id for post in batch] == [3, 1, 2]
+    assert [post.kind for post in batch] == [ACTIVITY, ACTIVITY, UGC_POST]
+    assert len(batch) == 3
+
+
+def test_batch_membership():
+    batch = PostBatch([PostRecord(5), PostRecord(9)])
+    assert PostRecord(9) in batch
+    assert 5 in batch
+    assert 7 not in batch
+
+
+def test_batch_from_urls_skips_non_posts():
+    batch = PostBatch.from_urls([
+        f"/posts/x-activity-{ID}-a", "/feed/", f"/feed/update/urn:li:activity:{ID}/",
+        f"/feed/update/urn:li:ugcPost:{ID + 1}/"
+    ])
+    assert batch.urls() == [CANONICAL, f"https://www.linkedin.com/feed/update/urn:li:ugcPost:{ID + 1}/"]
+
+
+def test_batch_keeps_text_of_the_first_card():
+    batch = PostBatch()
+    batch.add(PostRecord(1), "first")
+    batch.add(PostRecord(1), "second")
+    batch.add(PostRecord(2))
+    assert batch.texts == {1: "first"}
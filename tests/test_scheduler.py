@@ -0,0 +1,126 @@
+from datetime import datetime
+
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+import scheduler
+from scheduler import CronSchedule, WatchedKeyword
+
+CONFIG = {'jitter_fraction': 0.1, 'max_jitter_seconds': 300}
+NOW = 1_790_000_000.0
+
+
+@pytest.fixture
+def frozen_time(monkeypatch):
+    monkeypatch.setattr(scheduler.time, "time", lambda: NOW)
+
+
+def test_parses_fields():
+    cron = CronSchedule("*/15 8-10 1,15 * 1-5")
+    assert cron.minutes == {0, 15, 30, 45}
+    assert cron.hours == {8, 9, 10}
+    assert cron.days == {1, 15}
+    assert cron.months == set(range(1, 13))
+    assert cron.weekdays == {1, 2, 3, 4, 5}
+
+
+def test_step_from_a_number_runs_to_the_end_of_the_range():
+    assert CronSchedule("50/5 * * * *").minutes == {50, 55}
+    assert CronSchedule("0-30/10 * * * *").minutes == {0, 10, 20, 30}
+
+
+def test_sunday_is_0_or_7():
+    assert CronSchedule("0 0 * * 7").weekdays == {0}
+
+
+@pytest.mark.parametrize("expression", [
+    "* * * *",  # 4 fields
+    "60 * * * *",
+    "* 24 * * *",
+    "* * 0 * *",
+    "* * * 13 *",
+    "* * * * 8",
+    "10-5 * * * *",
+    "a * * * *",
+])
+def test_invalid_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_next_after_is_strictly_later():
+    cron = CronSchedule("*/30 * * * *")
+    assert cron.next_after(datetime(2026, 10, 19, 9, 0)) == datetime(2026, 10, 19, 9, 30)
+    assert cron.next_after(datetime(2026, 10, 19, 9, 29, 59)) == datetime(2026, 10, 19, 9, 30)
+
+
+def test_next_after_rolls_over_hours_days_and_months():
+    cron = CronSchedule("0 8-20 * * *")
+    assert cron.next_after(datetime(2026, 10, 19, 20, 0)) == datetime(2026, 10, 20, 8, 0)
+    assert CronSchedule("0 0 1 * *").next_after(datetime(2026, 12, 15)) == datetime(2027, 1, 1)
+
+
+def test_next_after_on_weekdays():
+    # 2026-10-17 is a Saturday
+    cron = CronSchedule("0 9 * * 1-5")
+    assert cron.next_after(datetime(2026, 10, 17, 12, 0)) == datetime(2026, 10, 19, 9, 0)
+
+
+def test_day_of_month_or_weekday():
+    # Both restricted: either one matching fires, like cron. 2026-10-13 is a Tuesday.
+    cron = CronSchedule("0 0 15 * 2")
+    assert cron.next_after(datetime(2026, 10, 12)) == datetime(2026, 10, 13)
+    assert cron.next_after(datetime(2026, 10, 13)) == datetime(2026, 10, 15)
+
+
+def test_never_firing_expression():
+    with pytest.raises(ValueError):
+        CronSchedule("0 0 31 2 *").next_after(datetime(2026, 10, 19))
+
+
+def test_interval_or_cron_required():
+    with pytest.raises(ValueError):
+        WatchedKeyword("aiml")
+
+
+@pytest.mark.parametrize("interval", [0, -60])
+def test_interval_must_be_positive(interval):
+    with pytest.raises(ValueError):
+        WatchedKeyword("aiml", interval_seconds=interval)
+
+
+def test_first_interval_run_is_spread_over_the_interval(frozen_time):
+    entry = WatchedKeyword("aiml", interval_seconds=600)
+    for _ in range(200):
+        entry.schedule_next(CONFIG, first=True)
+        assert NOW <= entry.next_run_at <= NOW + 600
+
+
+def test_interval_jitter_bounds(frozen_time):
+    entry = WatchedKeyword("aiml", interval_seconds=600)
+    for _ in range(200):
+        entry.schedule_next(CONFIG)
+        assert NOW + 540 <= entry.next_run_at <= NOW + 660
+
+
+def test_interval_jitter_is_capped(frozen_time):
+    entry = WatchedKeyword("aiml", interval_seconds=86400)
+    for _ in range(200):
+        entry.schedule_next(CONFIG)
+        assert NOW + 86400 - 300 <= entry.next_run_at <= NOW + 86400 + 300
+
+
+def test_cron_jitter_only_delays(frozen_time):
+    entry = WatchedKeyword("aiml", cron="0 * * * *")
+    fire_at = entry.cron.next_after(datetime.fromtimestamp(NOW)).timestamp()
+    for _ in range(200):
+        entry.schedule_next(CONFIG)
+        assert fire_at <= entry.next_run_at <= fire_at + 300
+
+
+@pytest.mark.parametrize("interval", [0, -60])
+def test_watch_endpoint_rejects_non_positive_interval(interval):
+    client = TestClient(main.app)
+    response = client.post("/schedule", json={"keyword": "aiml", "interval_seconds": interval})
+    assert response.status_code == 422
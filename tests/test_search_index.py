@@ -0,0 +1,87 @@
+import pytest
+
+from search_index import PostIndex
+
+
+def _url(activity_id):
+    return f"https://www.linkedin.com/feed/update/urn:li:activity:{activity_id}/"
+
+
+@pytest.fixture
+def index(tmp_path):
+    index = PostIndex(str(tmp_path / "posts.db"))
+    index.add_posts([
+        {"url": _url(1), "keyword": "AIML", "text": "Hiring a remote MLOps engineer, pytorch a plus",
+         "collected_at": "2026-10-18T10:00:00"},
+        {"url": _url(2), "keyword": "aiml", "text": "Data engineer wanted in Berlin",
+         "collected_at": "2026-10-18T11:00:00"},
+        {"url": _url(3), "keyword": "data", "text": "Remote data analyst role",
+         "collected_at": "2026-10-19T09:00:00"},
+    ])
+    return index
+
+
+def test_any_word_matches_best_first(index):
+    result = index.search("remote MLOps pytorch")
+    assert result["total"] == 2
+    assert result["results"][0]["url"] == _url(1)
+    assert "<mark>" in result["results"][0]["snippet"]
+
+
+def test_all_words_mode(index):
+    assert [r["url"] for r in index.search("remote data", mode="all")["results"]] == [_url(3)]
+
+
+def test_fts_syntax_is_passed_through(index):
+    assert index.search('"data engineer"')["total"] == 1
+    assert index.search("engin*")["total"] == 2
+
+
+def test_invalid_fts_syntax(index):
+    with pytest.raises(ValueError):
+        index.search('"unbalanced')
+
+
+def test_query_without_words(index):
+    assert index.search("!!!")["total"] == 0
+
+
+def test_keyword_filter_and_pages(index):
+    result = index.search("engineer OR remote", keyword="aiml", page_size=1)
+    assert result["total"] == 2
+    assert len(result["results"]) == 1
+    second = index.search("engineer OR remote", keyword="aiml", page=2, page_size=1)
+    assert second["results"][0]["url"] != result["results"][0]["url"]
+
+
+def test_post_collected_for_several_keywords(index):
+    index.add_posts([{"url": _url(1), "keyword": "mlops", "collected_at": "2026-10-19T12:00:00"}])
+    assert index.count() == 3
+    hit = index.search("pytorch")["results"][0]
+    assert hit["keywords"] == ["aiml", "mlops"]
+    assert hit["collected_at"] == "2026-10-19T12:00:00"
+    # A re-collection without text keeps the text and its index entry
+    assert index.search("pytorch", keyword="mlops")["total"] == 1
+
+
+def test_new_text_is_reindexed(index):
+    index.add_posts([{"url": _url(2), "keyword": "aiml", "text": "Golang developer"}])
+    assert index.search("Berlin")["total"] == 0
+    assert index.search("golang")["total"] == 1
+
+
+def test_partitions_since_seq(index):
+    assert sorted(index.partitions_since(0)) == [("aiml", "2026-10-18"), ("data", "2026-10-19")]
+    watermark = index.latest_seq()
+    assert index.partitions_since(watermark) == []
+
+    # Written after the watermark with an older collection time: still picked up
+    index.add_posts([{"url": _url(4), "keyword": "aiml", "collected_at": "2026-10-18T08:00:00"}])
+    assert index.partitions_since(watermark) == [("aiml", "2026-10-18")]
+    assert index.latest_seq() > watermark
+
+
+def test_partition_rows(index):
+    rows = index.partition_rows("aiml", "2026-10-18")
+    assert [row["url"] for row in rows] == [_url(1), _url(2)]
+    assert index.partition_rows("aiml", "2026-10-19") == []
@@ -0,0 +1,226 @@
+import pytest
+
+from work_queue import (CANCELLED, COMPLETED, FAILED, QUEUED, RUNNING, MemoryWorkQueue,
+                        RedisWorkQueue, SQLiteWorkQueue)
+
+
+@pytest.fixture(params=["memory", "sqlite", "redis"])
+def queue(request, tmp_path, monkeypatch):
+    if request.param == "memory":
+        return MemoryWorkQueue(max_attempts=2)
+    if request.param == "sqlite":
+        return SQLiteWorkQueue(str(tmp_path / "queue.db"), max_attempts=2)
+    # In-process Redis server; WATCH/MULTI behave like the real one
+    fakeredis = pytest.importorskip("fakeredis")
+    redis = pytest.importorskip("redis")
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis.Redis, "from_url",
+                        lambda url, **kwargs: fakeredis.FakeRedis(server=server, **kwargs))
+    return RedisWorkQueue("redis://localhost:6379/0", max_attempts=2)
+
+
+def test_claims_oldest_job_first(queue):
+    first = queue.enqueue("aiml", {"target_posts": 10})
+    queue.enqueue("data science", {})
+
+    job = queue.claim("w1", lease_seconds=60)
+    assert job["id"] == first
+    assert job["status"] == RUNNING
+    assert job["worker_id"] == "w1"
+    assert job["attempts"] == 1
+    assert job["payload"] == {"target_posts": 10}
+
+
+def test_claim_on_empty_queue(queue):
+    assert queue.claim("w1", lease_seconds=60) is None
+
+
+def test_complete_stores_result(queue):
+    job_id = queue.enqueue("aiml", {})
+    queue.claim("w1", lease_seconds=60)
+
+    assert queue.complete(job_id, "w1", {"total_posts": 3})
+    job = queue.get(job_id)
+    assert job["status"] == COMPLETED
+    assert job["result"] == {"total_posts": 3}
+    assert job["worker_id"] is None
+
+
+def test_only_lease_holder_can_finish(queue):
+    job_id = queue.enqueue("aiml", {})
+    queue.claim("w1", lease_seconds=60)
+
+    assert not queue.complete(job_id, "w2", {})
+    assert not queue.heartbeat(job_id, "w2", 60)
+    assert queue.get(job_id)["status"] == RUNNING
+
+
+def test_expired_lease_is_requeued(queue):
+    job_id = queue.enqueue("aiml", {})
+    queue.claim("w1", lease_seconds=-1)  # lease already over
+
+    assert queue.requeue_expired() == 1
+    assert queue.get(job_id)["status"] == QUEUED
+    # The first worker lost the job and can't write a result any more
+    assert not queue.heartbeat(job_id, "w1", 60)
+    assert not queue.complete(job_id, "w1", {})
+
+    job = queue.claim("w2", lease_seconds=60)
+    assert job["id"] == job_id
+    assert job["attempts"] == 2
+
+
+def test_heartbeat_keeps_lease(queue):
+    job_id = queue.enqueue("aiml", {})
+    queue.claim("w1", lease_seconds=60)
+
+    assert queue.heartbeat(job_id, "w1", 60)
+    assert queue.requeue_expired() == 0
+    assert queue.get(job_id)["status"] == RUNNING
+
+
+def test_fails_after_max_attempts(queue):
+    job_id = queue.enqueue("aiml", {})
+    queue.claim("w1", lease_seconds=-1)
+    queue.requeue_expired()
+    queue.claim("w2", lease_seconds=-1)
+
+    assert queue.requeue_expired() == 0
+    job = queue.get(job_id)
+    assert job["status"] == FAILED
+    assert "expired" in job["error"]
+    assert queue.claim("w3", lease_seconds=60) is None
+
+
+def test_cancel_queued_job(queue):
+    job_id = queue.enqueue("aiml", {})
+
+    assert queue.request_cancel(job_id) == CANCELLED
+    assert queue.claim("w1", lease_seconds=60) is None
+    assert queue.get(job_id)["status"] == CANCELLED
+
+
+def test_cancel_running_job_asks_worker(queue):
+    job_id = queue.enqueue("aiml", {})
+    queue.claim("w1", lease_seconds=60)
+    assert not queue.cancel_requested(job_id)
+
+    assert queue.request_cancel(job_id) == RUNNING
+    assert queue.cancel_requested(job_id)
+    # The worker stops and stores what it collected
+    assert queue.complete(job_id, "w1", {"total_posts": 1}, status=CANCELLED)
+    assert queue.get(job_id)["status"] == CANCELLED
+
+
+def test_cancel_finished_or_unknown_job(queue):
+    job_id = queue.enqueue("aiml", {})
+    queue.claim("w1", lease_seconds=60)
+    queue.fail(job_id, "w1", "boom")
+
+    assert queue.request_cancel(job_id) == FAILED
+    assert queue.request_cancel("missing") is None
+
+
+def test_latest_job_per_keyword(queue):
+    queue.enqueue("aiml", {"n": 1})
+    latest = queue.enqueue("aiml", {"n": 2})
+    other = queue.enqueue("ml", {})
+
+    jobs = queue.latest_by_keyword()
+    assert jobs["aiml"]["id"] == latest
+    assert jobs["ml"]["id"] == other
+    assert queue.latest_for_keyword("aiml")["id"] == latest
+    assert queue.latest_for_keyword("unknown") is None
+
+
+def test_cleared_keyword_hides_earlier_jobs(queue):
+    old = queue.enqueue("aiml", {})
+    queue.claim("w1", lease_seconds=60)
+    queue.complete(old, "w1", {"total_posts": 3})
+    other = queue.enqueue("ml", {})
+
+    queue.clear_keyword("aiml")
+    assert queue.latest_for_keyword("aiml") is None
+    assert "aiml" not in queue.latest_by_keyword()
+    assert queue.latest_for_keyword("ml")["id"] == other
+    # The job itself is still there
+    assert queue.get(old)["status"] == COMPLETED
+
+    new = queue.enqueue("aiml", {})
+    assert queue.latest_for_keyword("aiml")["id"] == new
+    assert queue.latest_by_keyword()["aiml"]["id"] == new
+
+
+def test_account_belongs_to_one_worker(queue):
+    assert queue.register_worker("w1", ["a@x", "b@x"], {"available": 2}, ttl_seconds=60) == {}
+    # Renewing keeps the accounts, another worker can't take them
+    assert queue.register_worker("w1", ["a@x", "b@x"], {"available": 1}, ttl_seconds=60) == {}
+    assert queue.register_worker("w2", ["b@x", "c@x"], {}, ttl_seconds=60) == {"b@x": "w1"}
+    assert queue.register_worker("w2", ["c@x"], {}, ttl_seconds=60) == {}
+
+    workers = queue.workers()
+    assert set(workers) == {"w1", "w2"}
+    assert workers["w1"]["accounts"] == ["a@x", "b@x"]
+    assert workers["w1"]["status"] == {"available": 1}
+
+    queue.unregister_worker("w1")
+    assert set(queue.workers()) == {"w2"}
+    assert queue.register_worker("w3", ["a@x"], {}, ttl_seconds=60) == {}
+
+
+def test_dead_worker_frees_its_accounts(queue):
+    queue.register_worker("w1", ["a@x"], {}, ttl_seconds=-1)  # registration already expired
+
+    assert queue.workers() == {}
+    assert queue.register_worker("w2", ["a@x"], {}, ttl_seconds=60) == {}
+
+
+def test_events_of_finished_jobs(queue):
+    assert queue.last_event_seq() == 0
+    done = queue.enqueue("aiml", {})
+    failed = queue.enqueue("ml", {})
+    cancelled = queue.enqueue("ml", {})
+    queue.claim("w1", lease_seconds=60)
+    queue.claim("w1", lease_seconds=60)
+    queue.complete(done, "w1", {"total_posts": 4})
+    queue.request_cancel(cancelled)
+    queue.fail(failed, "w1", "boom")
+
+    events = queue.events_since(0)
+    assert [(e["job_id"], e["status"]) for e in events] == [(done, COMPLETED), (cancelled, CANCELLED),
+                                                             (failed, FAILED)]
+    assert [e["seq"] for e in events] == [1, 2, 3]
+    assert events[0]["posts"] == 4 and events[0]["keyword"] == "aiml"
+    assert events[2]["error"] == "boom"
+    assert not any(e["hidden"] for e in events)
+    assert queue.last_event_seq() == 3
+    assert [e["job_id"] for e in queue.events_since(1, limit=1)] == [cancelled]
+    assert queue.events_since(3) == []
+
+    queue.clear_keyword("ml")
+    assert [e["hidden"] for e in queue.events_since(0)] == [False, True, True]
+
+
+def test_lease_running_out_for_good_is_an_event(queue):
+    job_id = queue.enqueue("aiml", {})
+    queue.claim("w1", lease_seconds=-1)
+    queue.requeue_expired()
+    assert queue.events_since(0) == []
+    queue.claim("w2", lease_seconds=-1)
+    queue.requeue_expired()
+
+    assert [(e["job_id"], e["status"]) for e in queue.events_since(0)] == [(job_id, FAILED)]
+
+
+def test_active_jobs(queue):
+    running = queue.enqueue("aiml", {})
+    queued = queue.enqueue("ml", {})
+    done = queue.enqueue("aiml", {})
+    queue.claim("w1", lease_seconds=60)
+    queue.request_cancel(done)
+
+    assert [job["id"] for job in queue.active_jobs()] == [running, queued]
+    assert [job["id"] for job in queue.active_jobs("aiml")] == [running]
+
+    queue.clear_keyword("aiml")
+    assert [job["id"] for job in queue.active_jobs()] == [queued]
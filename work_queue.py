@@ -0,0 +1,854 @@
+"""
+Shared scrape job queue
+
+The API enqueues scrape jobs and reads their results; worker.py processes
+pull jobs from the same queue, possibly on other machines. Workers hold a
+lease on the job they run and extend it with heartbeats. When a worker dies
+its lease expires and the job is put back in the queue for someone else.
+
+Backends:
+    - SQLiteWorkQueue: file backed, shared by every process that can reach
+      the database file (default)
+    - RedisWorkQueue: for workers spread over several nodes (needs `redis`)
+    - MemoryWorkQueue: in-process stand-in for local runs and tests
+
+Every job that reaches a final state (completed, failed, cancelled, expired)
+also gets an event with a sequence number; the API reads them with
+`events_since` to count finished jobs and pick up their results in order.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from config import QUEUE_CONFIG
+
+logger = logging.getLogger(__name__)
+
+# Job states
+QUEUED = "queued"
+RUNNING = "running"
+COMPLETED = "completed"
+FAILED = "failed"
+CANCELLED = "cancelled"
+EXPIRED = "expired"  # ran into its deadline
+ACTIVE_STATES = (QUEUED, RUNNING)
+STOPPED_STATES = (CANCELLED, EXPIRED)
+
+
+def _now_iso():
+    return datetime.now().isoformat()
+
+
+def _event(job: dict) -> dict:
+    """Event of a job that reached a final state (without its sequence number)"""
+    return {
+        "job_id": job["id"],
+        "keyword": job["keyword"],
+        "status": job["status"],
+        "posts": (job["result"] or {}).get("total_posts", 0),
+        "error": job["error"],
+        "created_at": job["created_at"],
+        "finished_at": job["updated_at"]
+    }
+
+
+def _held_accounts(workers, worker_id: str, accounts: List[str], now: float) -> Dict[str, str]:
+    """{email: holder} for the `accounts` another live worker holds;
+    `workers` is (worker_id, {"accounts", "expires", ...}) pairs"""
+    return {
+        email: other
+        for other, info in workers if other != worker_id and info["expires"] > now
+        for email in info["accounts"] if email in accounts
+    }
+
+
+class WorkQueue:
+    """Interface shared by all queue backends.
+
+    A job is a plain dict with the keys: id, keyword, payload, status,
+    worker_id, lease_expires, attempts, result, error, cancel_requested,
+    created_at, updated_at.
+    """
+
+    def __init__(self, max_attempts=3):
+        self.max_attempts = max_attempts
+
+    def enqueue(self, keyword: str, payload: Dict[str, Any]) -> str:
+        raise NotImplementedError
+
+    def claim(self, worker_id: str, lease_seconds: float) -> Optional[dict]:
+        """Lease the oldest queued job to `worker_id`, or return None"""
+        raise NotImplementedError
+
+    def heartbeat(self, job_id: str, worker_id: str, lease_seconds: float) -> bool:
+        """Extend a lease. Returns False if the worker no longer owns the job"""
+        raise NotImplementedError
+
+    def complete(self, job_id: str, worker_id: str, result: Dict[str, Any], status: str = COMPLETED) -> bool:
+        """Store the result of a job; `status` is CANCELLED/EXPIRED for partial results"""
+        raise NotImplementedError
+
+    def fail(self, job_id: str, worker_id: str, error: str) -> bool:
+        raise NotImplementedError
+
+    def requeue_expired(self) -> int:
+        """Put jobs whose lease has run out back in the queue"""
+        raise NotImplementedError
+
+    def request_cancel(self, job_id: str) -> Optional[str]:
+        """Cancel a queued job right away, or ask the worker of a running one to stop it.
+        Returns the job's status afterwards, None for an unknown job"""
+        raise NotImplementedError
+
+    def cancel_requested(self, job_id: str) -> bool:
+        raise NotImplementedError
+
+    def get(self, job_id: str) -> Optional[dict]:
+        raise NotImplementedError
+
+    def latest_by_keyword(self) -> Dict[str, dict]:
+        """Most recent job for every keyword, leaving out jobs hidden by clear_keyword"""
+        raise NotImplementedError
+
+    def latest_for_keyword(self, keyword: str) -> Optional[dict]:
+        return self.latest_by_keyword().get(keyword)
+
+    def active_jobs(self, keyword: Optional[str] = None) -> List[dict]:
+        """Queued and running jobs (of `keyword`), oldest first, leaving out hidden ones"""
+        raise NotImplementedError
+
+    def clear_keyword(self, keyword: str):
+        """Hide the keyword's jobs so far from latest_by_keyword/latest_for_keyword and
+        active_jobs, after its results were deleted. Jobs enqueued later show up as usual"""
+        raise NotImplementedError
+
+    def events_since(self, seq: int = 0, limit: int = 1000) -> List[dict]:
+        """Up to `limit` events after event `seq`, oldest first: dicts with seq, job_id,
+        keyword, status, posts, error, created_at, finished_at, and hidden (the
+        job's keyword was cleared since)"""
+        raise NotImplementedError
+
+    def last_event_seq(self) -> int:
+        raise NotImplementedError
+
+    def register_worker(self, worker_id: str, accounts: List[str], status: Dict[str, Any],
+                        ttl_seconds: float) -> Dict[str, str]:
+        """Record a live worker for `ttl_seconds` with the accounts it scrapes with and
+        their pool status. Every account belongs to one worker: returns {email: worker_id}
+        for accounts another live worker holds, and records nothing then"""
+        raise NotImplementedError
+
+    def unregister_worker(self, worker_id: str):
+        raise NotImplementedError
+
+    def workers(self) -> Dict[str, dict]:
+        """Live workers: worker_id -> {"accounts", "status", "updated_at"}"""
+        raise NotImplementedError
+
+
+class MemoryWorkQueue(WorkQueue):
+    """In-process queue, only shared between threads/tasks of one process"""
+
+    def __init__(self, max_attempts=3):
+        super().__init__(max_attempts)
+        self._jobs: Dict[str, dict] = {}
+        self._order: List[str] = []
+        self._positions: Dict[str, int] = {}  # job id -> index in _order
+        self._cleared: Dict[str, int] = {}  # keyword -> jobs in _order when it was cleared
+        self._events: List[dict] = []
+        self._workers: Dict[str, dict] = {}
+        self._lock = threading.Lock()
+
+    def enqueue(self, keyword, payload):
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                "id": job_id, "keyword": keyword, "payload": payload, "status": QUEUED,
+                "worker_id": None, "lease_expires": None, "attempts": 0,
+                "result": None, "error": None, "cancel_requested": False,
+                "created_at": _now_iso(), "updated_at": _now_iso()
+            }
+            self._positions[job_id] = len(self._order)
+            self._order.append(job_id)
+        return job_id
+
+    def _hidden(self, job):
+        return self._positions[job["id"]] < self._cleared.get(job["keyword"], 0)
+
+    def _record_event(self, job):
+        self._events.append(dict(_event(job), seq=len(self._events) + 1))
+
+    def _requeue_expired_locked(self, now):
+        count = 0
+        for job in self._jobs.values():
+            if job["status"] == RUNNING and job["lease_expires"] < now:
+                self._expire(job)
+                count += job["status"] == QUEUED
+        return count
+
+    def _expire(self, job):
+        if job["attempts"] >= self.max_attempts:
+            job["status"] = FAILED
+            job["error"] = "Worker lease expired too many times"
+        else:
+            job["status"] = QUEUED
+        job["worker_id"] = None
+        job["lease_expires"] = None
+        job["updated_at"] = _now_iso()
+        if job["status"] == FAILED:
+            self._record_event(job)
+
+    def claim(self, worker_id, lease_seconds):
+        with self._lock:
+            now = time.time()
+            self._requeue_expired_locked(now)
+            for job_id in self._order:
+                job = self._jobs[job_id]
+                if job["status"] == QUEUED:
+                    job.update(status=RUNNING, worker_id=worker_id, lease_expires=now + lease_seconds,
+                               attempts=job["attempts"] + 1, updated_at=_now_iso())
+                    return dict(job)
+        return None
+
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job["status"] != RUNNING or job["worker_id"] != worker_id:
+                return False
+            job["lease_expires"] = time.time() + lease_seconds
+            return True
+
+    def _finish(self, job_id, worker_id, **fields):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job or job["status"] != RUNNING or job["worker_id"] != worker_id:
+                return False
+            job.update(worker_id=None, lease_expires=None, updated_at=_now_iso(), **fields)
+            self._record_event(job)
+            return True
+
+    def complete(self, job_id, worker_id, result, status=COMPLETED):
+        return self._finish(job_id, worker_id, status=status, result=result)
+
+    def fail(self, job_id, worker_id, error):
+        return self._finish(job_id, worker_id, status=FAILED, error=error)
+
+    def requeue_expired(self):
+        with self._lock:
+            return self._requeue_expired_locked(time.time())
+
+    def request_cancel(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            if not job:
+                return None
+            if job["status"] == QUEUED:
+                job.update(status=CANCELLED, updated_at=_now_iso())
+                self._record_event(job)
+            elif job["status"] == RUNNING:
+                job["cancel_requested"] = True
+            return job["status"]
+
+    def cancel_requested(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return bool(job and job["cancel_requested"])
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job else None
+
+    def latest_by_keyword(self):
+        with self._lock:
+            jobs = (self._jobs[j] for j in self._order if not self._hidden(self._jobs[j]))
+            return {job["keyword"]: dict(job) for job in jobs}
+
+    def active_jobs(self, keyword=None):
+        with self._lock:
+            jobs = (self._jobs[j] for j in self._order)
+            return [dict(job) for job in jobs
+                    if job["status"] in ACTIVE_STATES and keyword in (None, job["keyword"])
+                    and not self._hidden(job)]
+
+    def clear_keyword(self, keyword):
+        with self._lock:
+            self._cleared[keyword] = len(self._order)
+
+    def events_since(self, seq=0, limit=1000):
+        with self._lock:
+            return [dict(event, hidden=self._hidden(self._jobs[event["job_id"]]))
+                    for event in self._events[seq:seq + limit]]
+
+    def last_event_seq(self):
+        with self._lock:
+            return len(self._events)
+
+    def register_worker(self, worker_id, accounts, status, ttl_seconds):
+        with self._lock:
+            now = time.time()
+            held = _held_accounts(self._workers.items(), worker_id, accounts, now)
+            if not held:
+                self._workers[worker_id] = {"accounts": list(accounts), "status": status,
+                                            "expires": now + ttl_seconds, "updated_at": _now_iso()}
+            return held
+
+    def unregister_worker(self, worker_id):
+        with self._lock:
+            self._workers.pop(worker_id, None)
+
+    def workers(self):
+        with self._lock:
+            now = time.time()
+            return {worker_id: {k: info[k] for k in ("accounts", "status", "updated_at")}
+                    for worker_id, info in self._workers.items() if info["expires"] > now}
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """Queue stored in a SQLite file. Safe across processes on the same host/share"""
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            keyword TEXT NOT NULL,
+            payload TEXT NOT NULL,
+            status TEXT NOT NULL,
+            worker_id TEXT,
+            lease_expires REAL,
+            attempts INTEGER NOT NULL DEFAULT 0,
+            result TEXT,
+            error TEXT,
+            created_at TEXT NOT NULL,
+            updated_at TEXT NOT NULL,
+            seq INTEGER,
+            cancel_requested INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, seq);
+        CREATE INDEX IF NOT EXISTS idx_jobs_keyword ON jobs (keyword, seq);
+
+        -- Keywords whose results were deleted: their jobs up to seq are hidden
+        CREATE TABLE IF NOT EXISTS cleared_keywords (
+            keyword TEXT PRIMARY KEY,
+            seq INTEGER NOT NULL
+        );
+
+        -- One row per job that reached a final state, in the order they did
+        CREATE TABLE IF NOT EXISTS job_events (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            keyword TEXT NOT NULL,
+            status TEXT NOT NULL,
+            posts INTEGER NOT NULL DEFAULT 0,
+            error TEXT,
+            created_at TEXT NOT NULL,
+            finished_at TEXT NOT NULL
+        );
+
+        -- Live workers, the accounts they hold (JSON list) and their account pool status
+        CREATE TABLE IF NOT EXISTS workers (
+            worker_id TEXT PRIMARY KEY,
+            accounts TEXT NOT NULL,
+            status TEXT NOT NULL,
+            expires REAL NOT NULL,
+            updated_at TEXT NOT NULL
+        );
+    """
+
+    def __init__(self, path, max_attempts=3):
+        super().__init__(max_attempts)
+        self.path = path
+        with self._connect() as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self.SCHEMA)
+            # Queue files created before cancellation support
+            columns = {row["name"] for row in conn.execute("PRAGMA table_info(jobs)")}
+            if "cancel_requested" not in columns:
+                conn.execute("ALTER TABLE jobs ADD COLUMN cancel_requested INTEGER NOT NULL DEFAULT 0")
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        conn.row_factory = sqlite3.Row
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """Connection in a write transaction, taking the write lock up front"""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            yield conn
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        finally:
+            conn.close()
+
+    @staticmethod
+    def _add_event(conn, job_id, posts=0):
+        conn.execute(
+            "INSERT INTO job_events (job_id, keyword, status, posts, error, created_at, finished_at) "
+            "SELECT id, keyword, status, ?, error, created_at, updated_at FROM jobs WHERE id = ?",
+            (posts, job_id)
+        )
+
+    @staticmethod
+    def _row_to_job(row):
+        if row is None:
+            return None
+        job = dict(row)
+        job.pop("seq", None)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"]) if job["result"] else None
+        job["cancel_requested"] = bool(job["cancel_requested"])
+        return job
+
+    def enqueue(self, keyword, payload):
+        job_id = uuid.uuid4().hex
+        now = _now_iso()
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, keyword, payload, status, created_at, updated_at, seq) "
+                "VALUES (?, ?, ?, ?, ?, ?, (SELECT COALESCE(MAX(seq), 0) + 1 FROM jobs))",
+                (job_id, keyword, json.dumps(payload), QUEUED, now, now)
+            )
+        return job_id
+
+    def _requeue_expired_conn(self, conn, now):
+        failed = [row["id"] for row in conn.execute(
+            "SELECT id FROM jobs WHERE status = ? AND lease_expires < ? AND attempts >= ?",
+            (RUNNING, now, self.max_attempts)
+        )]
+        for job_id in failed:
+            conn.execute(
+                "UPDATE jobs SET status = ?, error = 'Worker lease expired too many times', "
+                "worker_id = NULL, lease_expires = NULL, updated_at = ? WHERE id = ?",
+                (FAILED, _now_iso(), job_id)
+            )
+            self._add_event(conn, job_id)
+        cur = conn.execute(
+            "UPDATE jobs SET status = ?, worker_id = NULL, lease_expires = NULL, updated_at = ? "
+            "WHERE status = ? AND lease_expires < ?",
+            (QUEUED, _now_iso(), RUNNING, now)
+        )
+        return cur.rowcount
+
+    def claim(self, worker_id, lease_seconds):
+        # The write lock is taken up front, so two workers never claim the same row
+        with self._transaction() as conn:
+            now = time.time()
+            self._requeue_expired_conn(conn, now)
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE status = ? ORDER BY seq LIMIT 1", (QUEUED,)
+            ).fetchone()
+            if row is None:
+                return None
+            conn.execute(
+                "UPDATE jobs SET status = ?, worker_id = ?, lease_expires = ?, "
+                "attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                (RUNNING, worker_id, now + lease_seconds, _now_iso(), row["id"])
+            )
+            return self._row_to_job(conn.execute("SELECT * FROM jobs WHERE id = ?", (row["id"],)).fetchone())
+
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        with self._connect() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET lease_expires = ? WHERE id = ? AND status = ? AND worker_id = ?",
+                (time.time() + lease_seconds, job_id, RUNNING, worker_id)
+            )
+            return cur.rowcount == 1
+
+    def _finish(self, job_id, worker_id, status, result=None, error=None):
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, worker_id = NULL, "
+                "lease_expires = NULL, updated_at = ? WHERE id = ? AND status = ? AND worker_id = ?",
+                (status, json.dumps(result) if result is not None else None, error,
+                 _now_iso(), job_id, RUNNING, worker_id)
+            )
+            if cur.rowcount != 1:
+                return False
+            self._add_event(conn, job_id, (result or {}).get("total_posts", 0))
+            return True
+
+    def complete(self, job_id, worker_id, result, status=COMPLETED):
+        return self._finish(job_id, worker_id, status, result=result)
+
+    def fail(self, job_id, worker_id, error):
+        return self._finish(job_id, worker_id, FAILED, error=error)
+
+    def requeue_expired(self):
+        with self._transaction() as conn:
+            return self._requeue_expired_conn(conn, time.time())
+
+    def request_cancel(self, job_id):
+        with self._transaction() as conn:
+            cur = conn.execute(
+                "UPDATE jobs SET status = ?, updated_at = ? WHERE id = ? AND status = ?",
+                (CANCELLED, _now_iso(), job_id, QUEUED)
+            )
+            if cur.rowcount == 1:
+                self._add_event(conn, job_id)
+            conn.execute(
+                "UPDATE jobs SET cancel_requested = 1 WHERE id = ? AND status = ?", (job_id, RUNNING)
+            )
+            row = conn.execute("SELECT status FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return row["status"] if row else None
+
+    def cancel_requested(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT cancel_requested FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row["cancel_requested"])
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            return self._row_to_job(conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone())
+
+    def latest_by_keyword(self):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM jobs WHERE seq IN ("
+                "    SELECT MAX(jobs.seq) FROM jobs LEFT JOIN cleared_keywords AS cleared USING (keyword)"
+                "    WHERE jobs.seq > COALESCE(cleared.seq, 0) GROUP BY keyword"
+                ")"
+            ).fetchall()
+        return {row["keyword"]: self._row_to_job(row) for row in rows}
+
+    def latest_for_keyword(self, keyword):
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT * FROM jobs WHERE keyword = ? "
+                "AND seq > COALESCE((SELECT seq FROM cleared_keywords WHERE keyword = ?), 0) "
+                "ORDER BY seq DESC LIMIT 1", (keyword, keyword)
+            ).fetchone()
+        return self._row_to_job(row)
+
+    def active_jobs(self, keyword=None):
+        query = ("SELECT jobs.* FROM jobs LEFT JOIN cleared_keywords AS cleared ON cleared.keyword = jobs.keyword "
+                 "WHERE jobs.status IN (?, ?) AND jobs.seq > COALESCE(cleared.seq, 0)")
+        params = list(ACTIVE_STATES)
+        if keyword is not None:
+            query += " AND jobs.keyword = ?"
+            params.append(keyword)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY jobs.seq", params).fetchall()
+        return [self._row_to_job(row) for row in rows]
+
+    def clear_keyword(self, keyword):
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO cleared_keywords (keyword, seq) "
+                "SELECT ?, COALESCE(MAX(seq), 0) FROM jobs", (keyword,)
+            )
+
+    def events_since(self, seq=0, limit=1000):
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT job_events.*, jobs.seq <= COALESCE(cleared.seq, 0) AS hidden FROM job_events "
+                "JOIN jobs ON jobs.id = job_events.job_id "
+                "LEFT JOIN cleared_keywords AS cleared ON cleared.keyword = job_events.keyword "
+                "WHERE job_events.seq > ? ORDER BY job_events.seq LIMIT ?", (seq, limit)
+            ).fetchall()
+        return [dict(row, hidden=bool(row["hidden"])) for row in rows]
+
+    def last_event_seq(self):
+        with self._connect() as conn:
+            return conn.execute("SELECT COALESCE(MAX(seq), 0) FROM job_events").fetchone()[0]
+
+    def register_worker(self, worker_id, accounts, status, ttl_seconds):
+        # Write lock up front: two workers starting together can't both take an account
+        with self._transaction() as conn:
+            now = time.time()
+            conn.execute("DELETE FROM workers WHERE expires <= ?", (now,))
+            workers = [(row["worker_id"], {"accounts": json.loads(row["accounts"]), "expires": row["expires"]})
+                       for row in conn.execute("SELECT worker_id, accounts, expires FROM workers")]
+            held = _held_accounts(workers, worker_id, accounts, now)
+            if not held:
+                conn.execute(
+                    "INSERT OR REPLACE INTO workers (worker_id, accounts, status, expires, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?)",
+                    (worker_id, json.dumps(list(accounts)), json.dumps(status), now + ttl_seconds, _now_iso())
+                )
+            return held
+
+    def unregister_worker(self, worker_id):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM workers WHERE worker_id = ?", (worker_id,))
+
+    def workers(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT * FROM workers WHERE expires > ?", (time.time(),)).fetchall()
+        return {row["worker_id"]: {"accounts": json.loads(row["accounts"]), "status": json.loads(row["status"]),
+                                   "updated_at": row["updated_at"]}
+                for row in rows}
+
+
+class RedisWorkQueue(WorkQueue):
+    """Queue stored in Redis, for workers running on several nodes.
+
+    Status changes go through `_update`, which re-reads the job under WATCH and
+    writes it back in a MULTI transaction, so a cancel and a worker finishing
+    the same job can't overwrite each other. Events are appended to a list in
+    the same transaction; an event's seq is its position in the list.
+    """
+
+    def __init__(self, url, prefix="linkedin_scraper", max_attempts=3):
+        super().__init__(max_attempts)
+        try:
+            import redis
+        except ImportError as e:
+            raise RuntimeError("Redis queue backend needs the `redis` package (pip install redis)") from e
+
+        self.redis = redis.Redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._watch_error = redis.WatchError
+
+    def _key(self, *parts):
+        return ":".join((self.prefix,) + parts)
+
+    def _save(self, job, pipe=None):
+        data = dict(job)
+        data["payload"] = json.dumps(data["payload"])
+        data["result"] = json.dumps(data["result"])
+        (pipe or self.redis).set(self._key("job", job["id"]), json.dumps(data))
+
+    @staticmethod
+    def _decode(raw):
+        if not raw:
+            return None
+        job = json.loads(raw)
+        job["payload"] = json.loads(job["payload"])
+        job["result"] = json.loads(job["result"])
+        return job
+
+    def get(self, job_id):
+        return self._decode(self.redis.get(self._key("job", job_id)))
+
+    def _update(self, job_id, change):
+        """Atomically apply `change(job, pipe)` to a job and save it.
+
+        `change` edits the job in place, may queue more commands on `pipe` and
+        returns False to leave the job as it is. Retried when another process
+        wrote the job in between. Returns (job, changed); job is None if unknown.
+        """
+        key = self._key("job", job_id)
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    job = self._decode(pipe.get(key))
+                    if job is None:
+                        return None, False
+                    pipe.multi()
+                    job["updated_at"] = _now_iso()
+                    if not change(job, pipe):
+                        return job, False
+                    self._save(job, pipe)
+                    pipe.execute()
+                    return job, True
+                except self._watch_error:
+                    continue
+
+    def _add_event(self, job, pipe):
+        pipe.rpush(self._key("events"), json.dumps(_event(job)))
+
+    def enqueue(self, keyword, payload):
+        job_id = uuid.uuid4().hex
+        job = {
+            "id": job_id, "keyword": keyword, "payload": payload, "status": QUEUED,
+            "worker_id": None, "lease_expires": None, "attempts": 0,
+            "result": None, "error": None, "cancel_requested": False,
+            "created_at": _now_iso(), "updated_at": _now_iso()
+        }
+        pipe = self.redis.pipeline()
+        self._save(job, pipe)
+        pipe.hset(self._key("latest"), keyword, job_id)
+        pipe.lpush(self._key("queued"), job_id)
+        pipe.execute()
+        return job_id
+
+    def requeue_expired(self):
+        def expire(job, pipe):
+            if job["status"] != RUNNING:
+                return False
+            job["worker_id"] = None
+            job["lease_expires"] = None
+            if job["attempts"] >= self.max_attempts:
+                job["status"] = FAILED
+                job["error"] = "Worker lease expired too many times"
+                self._add_event(job, pipe)
+            else:
+                job["status"] = QUEUED
+                pipe.rpush(self._key("queued"), job["id"])
+            return True
+
+        count = 0
+        for job_id in self.redis.zrangebyscore(self._key("leases"), 0, time.time()):
+            # zrem doubles as a lock: only one process gets to requeue each job
+            if not self.redis.zrem(self._key("leases"), job_id):
+                continue
+            job, changed = self._update(job_id, expire)
+            if changed and job["status"] == QUEUED:
+                count += 1
+        return count
+
+    def claim(self, worker_id, lease_seconds):
+        self.requeue_expired()
+        job_id = self.redis.rpop(self._key("queued"))
+        if not job_id:
+            return None
+        lease_expires = time.time() + lease_seconds
+
+        def lease(job, pipe):
+            if job["status"] != QUEUED:  # e.g. cancelled while queued
+                return False
+            job.update(status=RUNNING, worker_id=worker_id, lease_expires=lease_expires,
+                       attempts=job["attempts"] + 1)
+            pipe.zadd(self._key("leases"), {job_id: lease_expires})
+            return True
+
+        job, changed = self._update(job_id, lease)
+        return job if changed else None
+
+    def heartbeat(self, job_id, worker_id, lease_seconds):
+        job = self.get(job_id)
+        if not job or job["status"] != RUNNING or job["worker_id"] != worker_id:
+            return False
+        # xx=True: never resurrect a lease that was already reclaimed
+        return self.redis.zadd(self._key("leases"), {job_id: time.time() + lease_seconds}, xx=True, ch=True) == 1
+
+    def _finish(self, job_id, worker_id, **fields):
+        def finish(job, pipe):
+            if job["status"] != RUNNING or job["worker_id"] != worker_id:
+                return False
+            job.update(worker_id=None, lease_expires=None, **fields)
+            pipe.zrem(self._key("leases"), job_id)
+            self._add_event(job, pipe)
+            return True
+
+        return self._update(job_id, finish)[1]
+
+    def complete(self, job_id, worker_id, result, status=COMPLETED):
+        return self._finish(job_id, worker_id, status=status, result=result)
+
+    def fail(self, job_id, worker_id, error):
+        return self._finish(job_id, worker_id, status=FAILED, error=error)
+
+    def request_cancel(self, job_id):
+        def cancel(job, pipe):
+            if job["status"] == QUEUED:
+                job["status"] = CANCELLED
+                pipe.lrem(self._key("queued"), 0, job_id)
+                self._add_event(job, pipe)
+                return True
+            if job["status"] == RUNNING and not job.get("cancel_requested"):
+                job["cancel_requested"] = True
+                return True
+            return False
+
+        job, _ = self._update(job_id, cancel)
+        return job["status"] if job else None
+
+    def cancel_requested(self, job_id):
+        job = self.get(job_id)
+        return bool(job and job.get("cancel_requested"))
+
+    def latest_by_keyword(self):
+        latest = self.redis.hgetall(self._key("latest"))
+        jobs = {keyword: self.get(job_id) for keyword, job_id in latest.items()}
+        return {keyword: job for keyword, job in jobs.items() if job}
+
+    def latest_for_keyword(self, keyword):
+        job_id = self.redis.hget(self._key("latest"), keyword)
+        return self.get(job_id) if job_id else None
+
+    def _cleared(self) -> Dict[str, str]:
+        """keyword -> creation time of its last job when it was cleared"""
+        return self.redis.hgetall(self._key("cleared"))
+
+    @staticmethod
+    def _hidden(job, cleared):
+        return job["created_at"] <= cleared.get(job["keyword"], "")
+
+    def active_jobs(self, keyword=None):
+        job_ids = self.redis.lrange(self._key("queued"), 0, -1) + self.redis.zrange(self._key("leases"), 0, -1)
+        cleared = self._cleared()
+        jobs = [job for job in map(self.get, set(job_ids))
+                if job and job["status"] in ACTIVE_STATES and keyword in (None, job["keyword"])
+                and not self._hidden(job, cleared)]
+        return sorted(jobs, key=lambda job: job["created_at"])
+
+    def clear_keyword(self, keyword):
+        job = self.latest_for_keyword(keyword)
+        pipe = self.redis.pipeline()
+        if job:
+            pipe.hset(self._key("cleared"), keyword, job["created_at"])
+        # latest_* only look at the latest job of a keyword; the next enqueue sets it again
+        pipe.hdel(self._key("latest"), keyword)
+        pipe.execute()
+
+    def events_since(self, seq=0, limit=1000):
+        raw = self.redis.lrange(self._key("events"), seq, seq + limit - 1)
+        cleared = self._cleared() if raw else {}
+        events = []
+        for position, data in enumerate(raw, start=seq + 1):
+            event = json.loads(data)
+            job = {"keyword": event["keyword"], "created_at": event["created_at"]}
+            events.append(dict(event, seq=position, hidden=self._hidden(job, cleared)))
+        return events
+
+    def last_event_seq(self):
+        return self.redis.llen(self._key("events"))
+
+    def register_worker(self, worker_id, accounts, status, ttl_seconds):
+        key = self._key("workers")
+        with self.redis.pipeline() as pipe:
+            while True:
+                try:
+                    pipe.watch(key)
+                    now = time.time()
+                    workers = {w: json.loads(raw) for w, raw in pipe.hgetall(key).items()}
+                    held = _held_accounts(workers.items(), worker_id, accounts, now)
+                    if held:
+                        return held
+                    pipe.multi()
+                    expired = [w for w, info in workers.items() if info["expires"] <= now]
+                    if expired:
+                        pipe.hdel(key, *expired)
+                    pipe.hset(key, worker_id, json.dumps({
+                        "accounts": list(accounts), "status": status,
+                        "expires": now + ttl_seconds, "updated_at": _now_iso()
+                    }))
+                    pipe.execute()
+                    return {}
+                except self._watch_error:
+                    continue
+
+    def unregister_worker(self, worker_id):
+        self.redis.hdel(self._key("workers"), worker_id)
+
+    def workers(self):
+        now = time.time()
+        workers = {w: json.loads(raw) for w, raw in self.redis.hgetall(self._key("workers")).items()}
+        return {worker_id: {k: info[k] for k in ("accounts", "status", "updated_at")}
+                for worker_id, info in workers.items() if info["expires"] > now}
+
+
+def create_queue(config: Optional[dict] = None) -> WorkQueue:
+    """Build the queue backend selected in QUEUE_CONFIG"""
+    config = config or QUEUE_CONFIG
+    backend = config['backend']
+    if backend == "sqlite":
+        return SQLiteWorkQueue(config['sqlite_path'], max_attempts=config['max_attempts'])
+    if backend == "redis":
+        return RedisWorkQueue(config['redis_url'], max_attempts=config['max_attempts'])
+    if backend == "memory":
+        return MemoryWorkQueue(max_attempts=config['max_attempts'])
+    raise ValueError(f"Unknown queue backend: {backend}")
@@ -0,0 +1,399 @@
+"""
+Scrape worker
+
+Pulls scrape jobs from the shared work queue (see work_queue.py), runs them
+with an account from the account pool and writes the results back. The API
+only enqueues jobs and reads results when EXECUTION_CONFIG['mode'] is 'queue',
+so scraping capacity scales by starting more workers, on any machine that can
+reach the queue:
+
+    python worker.py --worker-id node1-a --accounts a@example.com,b@example.com
+
+Account budgets, cooldowns and the circuit breaker live in the worker's own
+AccountPool, so each account must be used by one worker only: give every
+worker its own --accounts. A worker registers its accounts in the queue and
+refuses to start when a live worker already holds one of them.
+"""
+
+import argparse
+import asyncio
+import cProfile
+import logging
+import os
+import socket
+import time
+import uuid
+from datetime import datetime
+from typing import Any, Callable, Dict, Optional
+
+from accounts import AccountPool, load_accounts
+from config import HAR_CONFIG, ISOLATION_CONFIG, QUEUE_CONFIG, TRACE_CONFIG
+from isolation import run_isolated
+from job_control import JobControl, JobStopped, absorb_cancel
+from log_utils import current_job_id, job_context, setup_logging
+from posts import PostBatch
+from search_index import get_post_index
+from work_queue import WorkQueue, create_queue
+
+logger = logging.getLogger(__name__)
+
+
+def har_path_for(name: Optional[str]) -> str:
+    """Archive path for a HAR name; names can't point outside HAR_CONFIG['har_dir']"""
+    name = os.path.basename(name or HAR_CONFIG['default_name'])
+    return os.path.join(HAR_CONFIG['har_dir'], f"{name}.har")
+
+
+def trace_path_for(job_id: str, kind: str) -> str:
+    """Where the Playwright trace ("playwright") or cProfile dump ("profile") of a job goes"""
+    extension = "zip" if kind == "playwright" else "prof"
+    return os.path.join(TRACE_CONFIG['trace_dir'], f"{os.path.basename(job_id)}.{extension}")
+
+
+class _ReplayAccount:
+    """Stand-in for a pooled account while replaying: no network, no budget"""
+
+    def __init__(self, har_path):
+        # The archive only answers the login request it recorded, so reuse its account
+        accounts = load_accounts()
+        email = None
+        if os.path.exists(har_path + ".account"):
+            with open(har_path + ".account", encoding='utf-8') as f:
+                email = f.read().strip()
+        match = next((a for a in accounts if a['email'] == email), accounts[0])
+        self.email = match['email']
+        self.password = match['password']
+        self.storage_state_path = None
+
+
+class ScrapeFailed(Exception):
+    """A scrape run failed; `challenged` tells whether LinkedIn showed a checkpoint
+    or rate limit, `kind` which blocking page it was (see challenge.py)"""
+
+    def __init__(self, message, challenged=False, kind=None):
+        super().__init__(message)
+        self.challenged = challenged
+        self.kind = kind
+
+
+async def store_posts(keyword: str, posts: PostBatch) -> str:
+    """Add collected posts to the post index; returns their collection timestamp"""
+    keyword = keyword.lower().strip()
+    collected_at = datetime.now().isoformat()
+    # Blocking SQLite write, keep it off the event loop
+    await asyncio.to_thread(get_post_index().add_posts, [
+        {
+            "url": post.url,
+            "activity_id": post.activity_id,
+            "keyword": keyword,
+            "text": posts.texts.get(post.activity_id),
+            "collected_at": collected_at
+        }
+        for post in posts
+    ])
+    return collected_at
+
+
+def stopped_result(payload: Dict[str, Any], reason: str, posts: Optional[PostBatch] = None,
+                   collected_at=None) -> Dict[str, Any]:
+    """Result of a job that was cancelled or expired, with the posts it got so far"""
+    links = posts.urls() if posts else []
+    return {
+        "success": True,
+        "stopped": reason,
+        "links": links,
+        "total_posts": len(links),
+        "timestamp": collected_at or datetime.now().isoformat(),
+        "keyword": payload["input_keyword"]
+    }
+
+
+async def run_scrape(payload: Dict[str, Any], account, on_post: Optional[Callable[[str], None]] = None,
+                     scraper=None, control: Optional[JobControl] = None) -> Dict[str, Any]:
+    """Run the scraper for one job with the given account and store its posts.
+
+    `scraper` is a pre-warmed scraper of the same account to use instead of
+    starting a new browser. When `control` stops the job the posts collected so
+    far are stored and returned with `stopped` set. Raises ScrapeFailed on any
+    scraper error.
+    """
+    from jobs import LinkedInPostScraperPlaywright
+
+    hashtags = [payload["input_keyword"] + " hiring"]
+    har_mode = payload.get("har_mode")
+    har_path = har_path_for(payload.get("har_name")) if har_mode else None
+    trace = payload.get("trace")
+    trace_path = trace_path_for(current_job_id() or uuid.uuid4().hex, trace) if trace else None
+    if scraper is None:
+        scraper = LinkedInPostScraperPlaywright(
+            account.email, account.password, headless=payload.get("headless", True),
+            storage_state_path=account.storage_state_path,
+            har_mode=har_mode, har_path=har_path,
+            trace_path=trace_path if trace == "playwright" else None
+        )
+    scraper.control = control
+    scraper.posts = PostBatch()  # a warm scraper still holds the posts of its previous job
+    warm_start = scraper.warm
+    # Profiles the whole event loop thread, so concurrent jobs of this process show up too
+    profiler = cProfile.Profile() if trace == "profile" else None
+
+    if profiler:
+        try:
+            profiler.enable()
+        except ValueError:
+            # Only one profiler per thread: another job of this process is being profiled
+            logger.warning("Another job is being profiled, running without profile")
+            profiler = trace_path = None
+    stopped = None
+    try:
+        async for link in scraper.stream_posts(
+            hashtags=hashtags,
+            target_posts=payload.get("target_posts", 50),
+            save_format="both",   # will auto-save CSV + JSON
+            since_activity_id=payload.get("since_activity_id")
+        ):
+            if on_post:
+                on_post(link)
+        stopped = scraper.stopped
+    except asyncio.CancelledError:
+        # Stuck past the grace period: the run was cut off, keep what it collected
+        if not absorb_cancel(control):
+            raise
+        stopped = control.stop_reason
+    except Exception as e:
+        if control and control.stop_requested():
+            stopped = control.stop_reason
+        else:
+            raise ScrapeFailed(str(e), challenged=scraper.challenged, kind=scraper.blocked) from e
+    finally:
+        if control:
+            control.detach()
+        if profiler:
+            profiler.disable()
+            os.makedirs(os.path.dirname(trace_path), exist_ok=True)
+            profiler.dump_stats(trace_path)
+
+    if har_mode == "record":
+        with open(har_path + ".account", 'w', encoding='utf-8') as f:
+            f.write(account.email)
+
+    posts = scraper.posts
+    collected_at = await store_posts(payload["input_keyword"], posts)
+    if stopped:
+        logger.info(f"Job {stopped} after {len(posts)} posts")
+        return dict(stopped_result(payload, stopped, posts, collected_at),
+                    high_water_mark=scraper.high_water_mark, trace_file=trace_path,
+                    trace_host=socket.gethostname() if trace_path else None)
+
+    return {
+        "success": True,
+        "links": posts.urls(),
+        "total_posts": len(posts),
+        "timestamp": collected_at,
+        "keyword": payload["input_keyword"],
+        "high_water_mark": scraper.high_water_mark,
+        "scroll_count": scraper.scroll_stats[-1]["scroll"] if scraper.scroll_stats else 0,
+        "scroll_summary": scraper.scroll_summary(),
+        # The per-scroll curve is kept for traced runs only, results are stored and served often
+        "scroll_stats": scraper.scroll_stats if trace else None,
+        "warm_start": warm_start,
+        "trace_file": trace_path,
+        "trace_host": socket.gethostname() if trace_path else None,  # GET /jobs/{id}/trace only serves local files
+        "csv_filename": "linkedin_posts_playwright.csv",
+        "json_filename": "linkedin_posts_playwright.json"
+    }
+
+
+async def scrape_keyword(payload: Dict[str, Any], account_pool: AccountPool,
+                         on_post: Optional[Callable[[str], None]] = None,
+                         prewarmer=None, control: Optional[JobControl] = None) -> Dict[str, Any]:
+    """Run one scrape job and return the result record stored for its keyword.
+
+    Takes an account from the pool and runs the scraper inline or, with
+    ISOLATION_CONFIG['mode'] = 'process', in a watched child process.
+    `on_post` is called with every post URL as soon as it is collected.
+    Inline runs use the account's browser from `prewarmer` (prewarm.py) if it has one.
+    `control` (default: payload['deadline_seconds'] or the configured deadline)
+    cancels the job; a stopped job returns its partial result with `stopped` set.
+    """
+    own_control = control is None
+    if own_control:
+        control = JobControl(payload.get("deadline_seconds"))
+    control.attach(asyncio.current_task())
+
+    replaying = payload.get("har_mode") == "replay"
+    try:
+        account = (_ReplayAccount(har_path_for(payload.get("har_name"))) if replaying
+                   else await control.run(account_pool.acquire()))
+    except JobStopped as e:
+        logger.info(f"Job {e.reason} while waiting for an account")
+        control.detach()
+        return stopped_result(payload, e.reason)
+    succeeded = False
+    challenged = False
+    warm_scraper = None
+    result = {}
+
+    try:
+        if ISOLATION_CONFIG['mode'] == "process":
+            result = await run_isolated(payload, account, on_post=on_post, control=control)
+        else:
+            # HAR and traced runs need a browser context set up for them
+            if prewarmer is not None and not payload.get("har_mode") and not payload.get("trace"):
+                warm_scraper = await prewarmer.take(account)
+            result = await run_scrape(payload, account, on_post=on_post, scraper=warm_scraper, control=control)
+        succeeded = True
+        return result
+    except asyncio.CancelledError:
+        if not absorb_cancel(control):
+            raise
+        return stopped_result(payload, control.stop_reason)
+    except ScrapeFailed as e:
+        challenged = e.challenged
+        raise
+    finally:
+        # The account goes back right away, also for cancelled and expired jobs
+        control.detach()
+        if own_control:
+            control.close()
+        if not replaying:
+            await account_pool.release(account, success=succeeded, challenged=challenged)
+        # Also after failed and stopped runs; an account that hit a challenge stays cold
+        if warm_scraper is not None:
+            if challenged:
+                prewarmer.retire(account)
+            else:
+                prewarmer.rewarm(account)
+
+
+class ScrapeWorker:
+    """Claims jobs from the queue and keeps their leases alive while they run"""
+
+    def __init__(self, queue: WorkQueue, account_pool: AccountPool,
+                 worker_id: Optional[str] = None, config: Optional[dict] = None):
+        self.queue = queue
+        self.account_pool = account_pool
+        self.worker_id = worker_id or f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self.config = config or QUEUE_CONFIG
+        self._stopping = False
+
+    async def _keep_lease(self, job_id: str, task: asyncio.Task, control: JobControl):
+        """Heartbeat the lease and pass on cancel requests; cancel the job if another
+        worker took it over"""
+        last_beat = time.monotonic()
+        while not task.done():
+            await asyncio.sleep(self.config['poll_seconds'])
+            # Queue calls block (SQLite locks, Redis round trips), keep them off the event loop
+            if not control.stop_requested() and await asyncio.to_thread(self.queue.cancel_requested, job_id):
+                logger.info(f"Cancel requested for job {job_id}")
+                control.cancel()
+            if time.monotonic() - last_beat < self.config['heartbeat_seconds']:
+                continue
+            last_beat = time.monotonic()
+            if not await asyncio.to_thread(self.queue.heartbeat, job_id, self.worker_id,
+                                           self.config['lease_seconds']):
+                logger.warning(f"Lost lease on job {job_id}, abandoning it")
+                task.cancel()
+                return
+
+    async def run_job(self, job: dict):
+        logger.info(f"Worker {self.worker_id} running job {job['id']} ({job['keyword']})")
+        # The deadline counts from when a worker picks the job up
+        control = JobControl(job["payload"].get("deadline_seconds"))
+        with job_context(job["id"]):
+            task = asyncio.create_task(scrape_keyword(job["payload"], self.account_pool, control=control))
+        heartbeat = asyncio.create_task(self._keep_lease(job["id"], task, control))
+
+        try:
+            result = await task
+            if result.get("stopped"):
+                await asyncio.to_thread(self.queue.complete, job["id"], self.worker_id, result,
+                                        status=result["stopped"])
+                logger.info(f"Job {job['id']} {result['stopped']} with {result['total_posts']} posts")
+            else:
+                await asyncio.to_thread(self.queue.complete, job["id"], self.worker_id, result)
+                logger.info(f"Job {job['id']} completed with {result['total_posts']} posts")
+        except asyncio.CancelledError:
+            # Lease lost: the job is already back in the queue, nothing to write
+            if self._stopping:
+                raise
+        except Exception as e:
+            logger.error(f"Job {job['id']} failed: {e}")
+            await asyncio.to_thread(self.queue.fail, job["id"], self.worker_id, str(e))
+        finally:
+            heartbeat.cancel()
+            control.close()
+
+    async def _register(self):
+        """Hold this worker's accounts in the queue and publish their status (GET /accounts)"""
+        held = await asyncio.to_thread(
+            self.queue.register_worker, self.worker_id, [a.email for a in self.account_pool.accounts],
+            self.account_pool.summary(), self.config['lease_seconds']
+        )
+        if held:
+            taken = ", ".join(f"{email} (worker {owner})" for email, owner in held.items())
+            raise RuntimeError(f"Accounts already used by another worker: {taken}. "
+                               f"Give each worker its own --accounts")
+
+    async def run_forever(self, concurrency: int = 1):
+        """Process jobs until stopped, running up to `concurrency` at a time"""
+        running = set()
+        await self._register()
+        registered_at = time.monotonic()
+        logger.info(f"Worker {self.worker_id} started (concurrency={concurrency})")
+
+        try:
+            while not self._stopping:
+                if time.monotonic() - registered_at >= self.config['heartbeat_seconds']:
+                    await self._register()
+                    registered_at = time.monotonic()
+                running = {t for t in running if not t.done()}
+                job = None
+                # Leave jobs in the queue while the circuit breaker is open
+                if len(running) < concurrency and not self.account_pool.paused():
+                    job = await asyncio.to_thread(self.queue.claim, self.worker_id, self.config['lease_seconds'])
+
+                if job:
+                    running.add(asyncio.create_task(self.run_job(job)))
+                else:
+                    await asyncio.sleep(self.config['poll_seconds'])
+        finally:
+            self._stopping = True
+            for task in running:
+                task.cancel()
+            await asyncio.to_thread(self.queue.unregister_worker, self.worker_id)
+
+    def stop(self):
+        self._stopping = True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="LinkedIn scrape worker")
+    parser.add_argument("--worker-id", default=None)
+    parser.add_argument("--concurrency", type=int, default=1,
+                        help="Scrape jobs (browsers) to run at the same time")
+    parser.add_argument("--accounts", default=None,
+                        help="Comma-separated emails of the accounts this worker uses (default: all)")
+    args = parser.parse_args()
+
+    accounts = load_accounts()
+    if args.accounts:
+        emails = [email.strip() for email in args.accounts.split(",") if email.strip()]
+        unknown = set(emails) - {a['email'] for a in accounts}
+        if unknown:
+            parser.error(f"Unknown accounts: {', '.join(sorted(unknown))}")
+        accounts = [a for a in accounts if a['email'] in emails]
+
+    setup_logging()
+    worker = ScrapeWorker(create_queue(), AccountPool(accounts), worker_id=args.worker_id)
+
+    try:
+        asyncio.run(worker.run_forever(concurrency=args.concurrency))
+    except KeyboardInterrupt:
+        logger.info("Worker stopped")
+    except RuntimeError as e:
+        parser.exit(1, f"{e}\n")
+
+
+if __name__ == "__main__":
+    main()